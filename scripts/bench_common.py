@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the benchmark and advisor tools in scripts/.
+
+    LOCAL_HOSTS         hosts the benchmark tools treat as local scratch servers
+    handler_counts()    Handler_* session counters, for rows-read deltas
+    portable_create()   CREATE TABLE from sql_schema that MariaDB accepts too
+    percentiles()       p50/p90/... of a list of timings
+"""
+
+import re
+import statistics
+from typing import Dict, Iterable, List, Sequence
+
+LOCAL_HOSTS = {'localhost', '127.0.0.1', '::1', '0.0.0.0'}
+HANDLER_READ_VARS = ('Handler_read_first', 'Handler_read_key', 'Handler_read_last',
+                     'Handler_read_next', 'Handler_read_prev', 'Handler_read_rnd',
+                     'Handler_read_rnd_next')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def handler_counts(cursor, names: Iterable[str] = HANDLER_READ_VARS) -> Dict[str, int]:
+    """Current values of the named Handler_* session counters."""
+    names = set(names)
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_%'")
+    return {name: int(value) for name, value in cursor.fetchall() if name in names}
+
+
+def handler_reads(cursor) -> int:
+    """Total rows read through the storage engine handler so far this session."""
+    return sum(handler_counts(cursor).values())
+
+
+def portable_create(table) -> str:
+    """table.create_statement() without the table-level COLLATE.
+
+    MariaDB lacks the utf8mb4_0900 collations the test schema names.
+    """
+    return re.sub(r'\s*COLLATE=\w+', '', table.create_statement())
+
+
+def percentiles(values: List[float], points: Sequence[int] = PERCENTILES) -> Dict[str, float]:
+    """{"p50": ..., ...} by inclusive interpolation; a single value fills every point."""
+    if len(values) < 2:
+        return {f"p{p}": values[0] if values else 0.0 for p in points}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {f"p{p}": cuts[p - 1] for p in points}
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark collection_stamps sampling strategies on a local MySQL/MariaDB.
+
+Builds a scratch database holding collection_stamps (schema from
+test-schema.sql) with synthetic volume, then compares:
+
+  window   - the ROW_NUMBER() OVER (PARTITION BY collection_id) join that
+             extract-seed-data.py used before seed_sampling
+  batched  - seed_sampling.sample_top_k with UNION ALL'd per-group range reads
+  lateral  - seed_sampling.sample_top_k with one LATERAL join (MySQL >= 8.0.14)
+
+Each strategy reports median/min wall time and the InnoDB rows read
+(Handler_read_* deltas from SHOW SESSION STATUS), and all strategies are
+checked to return the same rows.
+
+Usage:
+    python3 scripts/benchmark-collection-stamps.py --user root --password ''
+    python3 scripts/benchmark-collection-stamps.py --collections 5000 --stamps 400 --runs 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import pymysql
+
+from bench_common import HANDLER_READ_VARS, LOCAL_HOSTS, handler_counts, portable_create
+from seed_sampling import distinct_groups, sample_top_k, server_supports_lateral
+from sql_schema import parse_schema
+
+INSERT_BATCH = 5000
+HANDLER_VARS = HANDLER_READ_VARS + ('Handler_write',)
+K = 5
+
+
+def populate(conn, collections: int, stamps: int, seed: int):
+    """Create collection_stamps with a skewed number of stamps per collection."""
+    rng = random.Random(seed)
+    table = parse_schema()['collection_stamps']
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS `collection_stamps`")
+    # MariaDB lacks the utf8mb4_0900 collations; neither column is textual
+    cur.execute(portable_create(table))
+
+    sql = "INSERT INTO `collection_stamps` (`collection_id`, `stamp`) VALUES (%s, %s)"
+    batch, total, next_stamp = [], 0, 1
+    for _ in range(collections):
+        cid = rng.randbytes(16)
+        # Long-tailed sizes: most collections are small, a few are huge
+        size = max(1, int(rng.paretovariate(1.2) * stamps / 5))
+        for _ in range(size):
+            batch.append((cid, next_stamp))
+            next_stamp += rng.randint(1, 3)
+        if len(batch) >= INSERT_BATCH:
+            cur.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cur.executemany(sql, batch)
+        total += len(batch)
+    conn.commit()
+    cur.execute("ANALYZE TABLE `collection_stamps`")
+    cur.fetchall()
+    return total
+
+
+def run_window(cur):
+    cur.execute(f"""
+        SELECT cs.`collection_id`, cs.`stamp` FROM collection_stamps cs
+        INNER JOIN (
+            SELECT collection_id, stamp,
+            ROW_NUMBER() OVER (PARTITION BY collection_id ORDER BY stamp) as rn
+            FROM collection_stamps
+        ) ranked ON cs.collection_id = ranked.collection_id
+            AND cs.stamp = ranked.stamp
+        WHERE ranked.rn <= {K}
+    """)
+    return list(cur.fetchall())
+
+
+def run_sampler(cur, use_lateral: bool):
+    _, rows = sample_top_k(cur, "collection_stamps", ["collection_id", "stamp"],
+                           group_col="collection_id", order_col="stamp", k=K,
+                           use_lateral=use_lateral)
+    return rows
+
+
+def measure(cur, fn, runs: int) -> dict:
+    times, rows, reads = [], None, None
+    for _ in range(runs):
+        before = handler_counts(cur, HANDLER_VARS)
+        start = time.perf_counter()
+        rows = fn()
+        times.append((time.perf_counter() - start) * 1000)
+        after = handler_counts(cur, HANDLER_VARS)
+        reads = {k: after[k] - before.get(k, 0) for k in after}
+    return {
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'rows': rows,
+        'handler': reads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark collection_stamps top-K sampling')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''))
+    parser.add_argument('--database', default='seed_sampling_bench',
+                        help='Scratch database (dropped and recreated)')
+    parser.add_argument('--collections', type=int, default=2000)
+    parser.add_argument('--stamps', type=int, default=250,
+                        help='Scale of stamps per collection (long-tailed)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch database')
+    args = parser.parse_args()
+
+    if args.host not in LOCAL_HOSTS:
+        print(f"✗ Refusing to create a scratch database on non-local host {args.host}")
+        sys.exit(2)
+
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user,
+                           password=args.password, autocommit=False)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cur.execute(f"CREATE DATABASE `{args.database}`")
+    cur.execute(f"USE `{args.database}`")
+
+    try:
+        cur.execute("SELECT VERSION()")
+        print(f"Server: {cur.fetchone()[0]}")
+        start = time.perf_counter()
+        total = populate(conn, args.collections, args.stamps, args.seed)
+        groups = len(distinct_groups(cur, "collection_stamps", "collection_id"))
+        print(f"Loaded {total:,} rows across {groups:,} collections "
+              f"in {time.perf_counter() - start:.1f}s\n")
+
+        strategies = [('window', run_window), ('batched', lambda c: run_sampler(c, False))]
+        if server_supports_lateral(cur):
+            strategies.append(('lateral', lambda c: run_sampler(c, True)))
+        else:
+            print("LATERAL not supported by this server; skipping lateral strategy\n")
+
+        results = {}
+        for name, fn in strategies:
+            results[name] = measure(cur, lambda: fn(cur), args.runs)
+
+        print("=" * 80)
+        print(f"collection_stamps top-{K} per collection ({args.runs} runs)")
+        print("=" * 80)
+        print(f"{'strategy':<10} {'median ms':>10} {'min ms':>10} {'rows':>8} "
+              f"{'read_key':>10} {'read_next':>12} {'rnd_next':>12}")
+        for name, r in results.items():
+            h = r['handler']
+            print(f"{name:<10} {r['median_ms']:>10.1f} {r['min_ms']:>10.1f} {len(r['rows']):>8} "
+                  f"{h.get('Handler_read_key', 0):>10,} {h.get('Handler_read_next', 0):>12,} "
+                  f"{h.get('Handler_read_rnd_next', 0):>12,}")
+
+        expected = sorted(results['window']['rows'])
+        print()
+        for name, r in results.items():
+            same = sorted(r['rows']) == expected
+            print(f"{'✓' if same else '✗'} {name} returns the same rows as window")
+        if 'batched' in results:
+            speedup = results['window']['median_ms'] / max(results['batched']['median_ms'], 1e-6)
+            print(f"\nbatched vs window: {speedup:.1f}x")
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Benchmark the explorer's hot read paths on a local MySQL/MariaDB.
+
+Builds a scratch database holding StampTableV4, SRC20Valid, balances and
+SRC101 (schema and indexes from test-schema.sql, or --schema) filled with
+synthetic, long-tailed data at each --scales size. Then it runs the
+QUERIES catalogue: each query is a parameterized read path paired with
+the index it exists for, for example latest stamps via idx_stamp,
+SRC-20 history via idx_tick_block_index, wallet balances via
+idx_address_tick_amt_update and SRC-101 lookups via
+idx_deploy_hash_tokenid.
+
+Every query gets --warmup untimed executions and then --reps timed ones,
+each with freshly drawn parameters from a seeded RNG, so runs are
+repeatable. The report gives latency percentiles, InnoDB rows read per
+execution (Handler_read_* deltas) and the key EXPLAIN chose.
+
+Results are written as JSON (--out) tagged with the git commit and a hash
+of the schema. --compare OLD.json diffs a run against an earlier one, so
+a schema or index change can be judged across commits. It exits 1 when a
+query's p95 regresses by more than --threshold or its chosen key changes.
+
+Usage:
+    python3 scripts/benchmark-hot-queries.py --password ''
+    python3 scripts/benchmark-hot-queries.py --scales 10000 100000 1000000 --reps 500
+    python3 scripts/benchmark-hot-queries.py --schema /tmp/test-schema-new-index.sql \\
+        --compare scripts/performance/hot-queries/abc1234.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pymysql
+
+from bench_common import LOCAL_HOSTS, handler_reads, percentiles, portable_create
+from sql_schema import SCHEMA_PATH, parse_schema
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, phase
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'performance' / 'hot-queries'
+RESULTS_VERSION = 1
+INSERT_BATCH = 5000
+TABLES = ('StampTableV4', 'SRC20Valid', 'balances', 'SRC101')
+
+FIRST_BLOCK = 779652
+GENESIS_TIME = datetime(2023, 3, 1)
+IDENTS = ('STAMP', 'SRC-20', 'SRC-721', 'SRC-101')
+IDENT_WEIGHTS = (70, 20, 5, 5)
+
+
+# ============================================================
+# Query catalogue
+# ============================================================
+# "params" draws one execution's parameters from the pools gathered while
+# populating; "index" is the index the read path is meant to use.
+QUERIES = [
+    {"name": "latest_stamps", "index": "idx_stamp",
+     "sql": "SELECT stamp, cpid, creator, tx_hash FROM StampTableV4 "
+            "WHERE is_btc_stamp = 1 AND ident = %s ORDER BY stamp DESC, tx_index DESC LIMIT 50",
+     "params": lambda rng, p: (rng.choices(IDENTS, IDENT_WEIGHTS)[0],)},
+    {"name": "latest_stamps_deep_page", "index": "idx_stamp",
+     "sql": "SELECT stamp, cpid, creator, tx_hash FROM StampTableV4 "
+            "WHERE is_btc_stamp = 1 AND ident = 'STAMP' ORDER BY stamp DESC, tx_index DESC "
+            "LIMIT 50 OFFSET %s",
+     "params": lambda rng, p: (rng.randrange(0, max(1, p["stamps"] // 4), 50),)},
+    {"name": "stamp_by_cpid", "index": "unique_cpid_stamp",
+     "sql": "SELECT * FROM StampTableV4 WHERE cpid = %s",
+     "params": lambda rng, p: (rng.choice(p["cpids"]),)},
+    {"name": "stamps_by_ident_range", "index": "idx_ident_stamp",
+     "sql": "SELECT stamp, cpid FROM StampTableV4 WHERE ident = %s AND stamp BETWEEN %s AND %s",
+     "params": lambda rng, p: _stamp_range(rng, p)},
+    {"name": "stamps_by_creator", "index": "creator_index",
+     "sql": "SELECT stamp, cpid FROM StampTableV4 WHERE creator = %s ORDER BY stamp DESC LIMIT 50",
+     "params": lambda rng, p: (rng.choice(p["creators"]),)},
+    {"name": "src20_tick_history", "index": "idx_tick_block_index",
+     "sql": "SELECT * FROM SRC20Valid WHERE tick = %s ORDER BY block_index DESC LIMIT 50",
+     "params": lambda rng, p: (rng.choice(p["ticks"]),)},
+    {"name": "src20_tick_block_range", "index": "idx_tick_block_index",
+     "sql": "SELECT * FROM SRC20Valid WHERE tick = %s AND block_index BETWEEN %s AND %s",
+     "params": lambda rng, p: (rng.choice(p["ticks"]),) + _block_range(rng, p)},
+    {"name": "src20_tick_ops", "index": "tick",
+     "sql": "SELECT op, COUNT(*) FROM SRC20Valid WHERE tick = %s GROUP BY op",
+     "params": lambda rng, p: (rng.choice(p["ticks"]),)},
+    {"name": "wallet_balances", "index": "idx_address_tick_amt_update",
+     "sql": "SELECT tick, amt, last_update FROM balances WHERE address = %s AND amt > 0 "
+            "ORDER BY last_update DESC",
+     "params": lambda rng, p: (rng.choice(p["holders"]),)},
+    {"name": "wallet_tick_balance", "index": "idx_address_tick_amt_update",
+     "sql": "SELECT amt FROM balances WHERE address = %s AND tick = %s",
+     "params": lambda rng, p: rng.choice(p["holdings"])},
+    {"name": "tick_top_holders", "index": "tick_tick_hash",
+     "sql": "SELECT address, amt FROM balances WHERE tick = %s AND amt > 0 "
+            "ORDER BY amt DESC LIMIT 50",
+     "params": lambda rng, p: (rng.choice(p["ticks"]),)},
+    {"name": "src101_token", "index": "idx_deploy_hash_tokenid",
+     "sql": "SELECT * FROM SRC101 WHERE deploy_hash = %s AND tokenid = %s",
+     "params": lambda rng, p: rng.choice(p["tokens"])},
+    {"name": "src101_deploy_tokens", "index": "idx_deploy_hash_tokenid",
+     "sql": "SELECT tokenid, owner FROM SRC101 WHERE deploy_hash = %s ORDER BY tokenid LIMIT 100",
+     "params": lambda rng, p: (rng.choice(p["tokens"])[0],)},
+]
+
+
+def _stamp_range(rng, pools):
+    start = rng.randrange(1, max(2, pools["stamps"]))
+    return rng.choices(IDENTS, IDENT_WEIGHTS)[0], start, start + 1000
+
+
+def _block_range(rng, pools):
+    start = rng.randrange(FIRST_BLOCK, pools["last_block"] + 1)
+    return start, start + 1000
+
+
+# ============================================================
+# Synthetic data
+# ============================================================
+
+def _hex(rng, bits=256):
+    return f"{rng.getrandbits(bits):0{bits // 4}x}"
+
+
+def _skewed(rng, values, alpha=1.2):
+    """Pick from values with a long tail: low indexes are far more popular."""
+    return values[min(len(values) - 1, int(rng.paretovariate(alpha)) - 1)]
+
+
+def _block_time(block):
+    return (GENESIS_TIME + timedelta(minutes=10 * (block - FIRST_BLOCK))).strftime(
+        '%Y-%m-%d %H:%M:%S')
+
+
+def create_tables(cur, schema):
+    for name in TABLES:
+        cur.execute(f"DROP TABLE IF EXISTS `{name}`")
+        # Table-level collations differ between MySQL 8 and MariaDB
+        cur.execute(portable_create(schema[name]))
+
+
+def insert_rows(conn, table, columns, rows):
+    """executemany in INSERT_BATCH chunks from a row iterator; returns the count."""
+    cur = conn.cursor()
+    sql = (f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            cur.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cur.executemany(sql, batch)
+        total += len(batch)
+    conn.commit()
+    return total
+
+
+def populate(conn, stamps: int, seed: int) -> dict:
+    """Fill the scratch tables for one scale; return parameter pools and row counts."""
+    rng = random.Random(seed)
+    addresses = [f"bc1q{_hex(rng, 152)}" for _ in range(max(200, stamps // 10))]
+    ticks = [f"t{i:04d}" for i in range(max(20, stamps // 500))]
+    deploys = [_hex(rng) for _ in range(max(5, stamps // 20000))]
+    pools = {"stamps": stamps, "cpids": [], "creators": [], "ticks": ticks,
+             "holders": [], "holdings": [], "tokens": []}
+    counts = {}
+
+    def stamp_rows():
+        for i in range(1, stamps + 1):
+            cursed = rng.random() < 0.05
+            block = FIRST_BLOCK + i // 20
+            cpid = f"A{10 ** 17 + i * 7919}"
+            creator = _skewed(rng, addresses)
+            if len(pools["cpids"]) < 10000 and rng.random() < 0.1:
+                pools["cpids"].append(cpid)
+                pools["creators"].append(creator)
+            yield (-i if cursed else i, block, cpid, creator, _hex(rng), i,
+                   rng.choices(IDENTS, IDENT_WEIGHTS)[0], _hex(rng, 128), 0 if cursed else 1,
+                   'image/png', _block_time(block))
+
+    counts['StampTableV4'] = insert_rows(
+        conn, 'StampTableV4',
+        ['stamp', 'block_index', 'cpid', 'creator', 'tx_hash', 'tx_index', 'ident',
+         'stamp_hash', 'is_btc_stamp', 'stamp_mimetype', 'block_time'],
+        stamp_rows())
+    pools["last_block"] = FIRST_BLOCK + stamps // 20
+
+    def src20_rows():
+        for i in range(1, 2 * stamps + 1):
+            block = FIRST_BLOCK + i // 40
+            op = rng.choices(('MINT', 'TRANSFER', 'DEPLOY'), (80, 18, 2))[0]
+            yield (str(i), _hex(rng), i, block, 'SRC-20', op, _skewed(rng, ticks),
+                   _skewed(rng, addresses), f"{rng.randint(1, 10 ** 6)}.000000000000000000",
+                   _skewed(rng, addresses), _block_time(block))
+
+    counts['SRC20Valid'] = insert_rows(
+        conn, 'SRC20Valid',
+        ['id', 'tx_hash', 'tx_index', 'block_index', 'p', 'op', 'tick', 'creator', 'amt',
+         'destination', 'block_time'],
+        src20_rows())
+
+    def balance_rows():
+        seen = set()
+        n = 0
+        while n < stamps:
+            address, tick = _skewed(rng, addresses, 1.05), _skewed(rng, ticks)
+            if (address, tick) in seen:
+                # Popular pairs collide; fall back to a uniform draw
+                address, tick = rng.choice(addresses), rng.choice(ticks)
+                if (address, tick) in seen:
+                    continue
+            seen.add((address, tick))
+            n += 1
+            if len(pools["holdings"]) < 10000 and rng.random() < 0.1:
+                pools["holdings"].append((address, tick))
+                pools["holders"].append(address)
+            yield (str(n), address, 'SRC-20', tick, f"{rng.randint(0, 10 ** 8)}.5",
+                   rng.randint(FIRST_BLOCK, pools["last_block"]))
+
+    counts['balances'] = insert_rows(
+        conn, 'balances', ['id', 'address', 'p', 'tick', 'amt', 'last_update'], balance_rows())
+
+    def src101_rows():
+        for i in range(1, max(100, stamps // 5) + 1):
+            deploy = _skewed(rng, deploys)
+            tokenid = f"TOKEN{i:08d}"
+            if len(pools["tokens"]) < 10000 and rng.random() < 0.2:
+                pools["tokens"].append((deploy, tokenid))
+            yield (str(i), _hex(rng), i, FIRST_BLOCK + i // 10, 'SRC-101', 'MINT', deploy,
+                   tokenid, _skewed(rng, addresses), _skewed(rng, addresses))
+
+    counts['SRC101'] = insert_rows(
+        conn, 'SRC101',
+        ['id', 'tx_hash', 'tx_index', 'block_index', 'p', 'op', 'deploy_hash', 'tokenid',
+         'creator', 'owner'],
+        src101_rows())
+
+    cur = conn.cursor()
+    for name in TABLES:
+        cur.execute(f"ANALYZE TABLE `{name}`")
+        cur.fetchall()
+    pools["counts"] = counts
+    return pools
+
+
+# ============================================================
+# Measurement
+# ============================================================
+
+def server_version(cur) -> str:
+    cur.execute("SELECT VERSION()")
+    return cur.fetchone()[0]
+
+
+def explain_key(cur, sql, params):
+    cur.execute("EXPLAIN " + sql, params)
+    names = [d[0].lower() for d in cur.description]
+    row = cur.fetchone()
+    return row[names.index('key')] if row else None
+
+
+def measure(cur, query, pools, rng, warmup: int, reps: int) -> dict:
+    sql, draw = query["sql"], query["params"]
+    for _ in range(warmup):
+        cur.execute(sql, draw(rng, pools))
+        cur.fetchall()
+
+    times, rows = [], 0
+    reads_before = handler_reads(cur)
+    for _ in range(reps):
+        params = draw(rng, pools)
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        rows += len(cur.fetchall())
+        times.append((time.perf_counter() - start) * 1000)
+    # Each SHOW STATUS probe reads a fixed handful of rows; negligible per execution
+    reads = handler_reads(cur) - reads_before
+
+    return {
+        "query": query["name"],
+        "expected_index": query["index"],
+        "key": explain_key(cur, sql, draw(rng, pools)),
+        "reps": reps,
+        "mean_ms": statistics.fmean(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        **{f"{k}_ms": v for k, v in percentiles(times).items()},
+        "rows_per_exec": rows / reps,
+        "reads_per_exec": reads / reps,
+    }
+
+
+def print_scale(scale, results):
+    print()
+    print("=" * 104)
+    print(f"scale {scale:,} stamps")
+    print("=" * 104)
+    print(f"{'query':<26} {'key':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'rows':>7} {'reads':>9}")
+    for r in results:
+        key = r['key'] or 'NONE'
+        mark = '' if r['key'] == r['expected_index'] else ' ⚠'
+        print(f"{r['query']:<26} {(key + mark)[:28]:<28} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['rows_per_exec']:>7.1f} {r['reads_per_exec']:>9.0f}")
+
+
+# ============================================================
+# Results
+# ============================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    """Print per-query deltas against an earlier run; return the regression count."""
+    before = {(r['scale'], r['query']): r for r in old['results']}
+    print()
+    print("=" * 96)
+    print(f"Compared with {old.get('commit', '?')} ({old.get('created', '?')}); "
+          f"regression threshold {threshold:.0%} on p95")
+    print("=" * 96)
+    print(f"{'scale':>9} {'query':<26} {'p50 ms':>17} {'p95 ms':>17} {'key':<20}")
+    regressions = 0
+    for r in new['results']:
+        b = before.get((r['scale'], r['query']))
+        if b is None:
+            print(f"{r['scale']:>9,} {r['query']:<26} {'(new)':>17}")
+            continue
+        change = (r['p95_ms'] - b['p95_ms']) / b['p95_ms'] if b['p95_ms'] else 0.0
+        key_changed = r['key'] != b['key']
+        bad = change > threshold or key_changed
+        regressions += bad
+        key = f"{b['key']} -> {r['key']}" if key_changed else (r['key'] or 'NONE')
+        print(f"{r['scale']:>9,} {r['query']:<26} {b['p50_ms']:>7.2f} -> {r['p50_ms']:<6.2f} "
+              f"{b['p95_ms']:>7.2f} -> {r['p95_ms']:<6.2f} {key[:20]:<20} "
+              f"{'✗' if bad else '✓'} {change:+.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hot explorer queries on synthetic data')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''))
+    parser.add_argument('--database', default='hot_query_bench',
+                        help='Scratch database (dropped and recreated)')
+    parser.add_argument('--schema', type=Path, default=SCHEMA_PATH,
+                        help='Schema whose tables and indexes are benchmarked')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10000, 100000],
+                        help='StampTableV4 sizes; other tables scale with it')
+    parser.add_argument('--queries', nargs='+', choices=[q['name'] for q in QUERIES],
+                        help='Run only these queries')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--reps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', type=Path,
+                        help=f"Results JSON (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument('--compare', type=Path, metavar='OLD_JSON',
+                        help='Diff against an earlier results file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative p95 increase counted as a regression')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch database')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    if args.host not in LOCAL_HOSTS:
+        print(f"✗ Refusing to create a scratch database on non-local host {args.host}")
+        sys.exit(2)
+
+    with instrument('benchmark-hot-queries', args) as metrics:
+        run(args, metrics)
+
+
+def run(args, metrics):
+    schema = parse_schema(args.schema)
+    queries = [q for q in QUERIES if not args.queries or q['name'] in args.queries]
+    conn = pymysql.connect(host=args.host, port=args.port, user=args.user,
+                           password=args.password, autocommit=False)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cur.execute(f"CREATE DATABASE `{args.database}`")
+    cur.execute(f"USE `{args.database}`")
+
+    report = {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'server': server_version(cur),
+        'schema_sha256': hashlib.sha256(args.schema.read_bytes()).hexdigest(),
+        'settings': {'scales': args.scales, 'warmup': args.warmup, 'reps': args.reps,
+                     'seed': args.seed},
+        'tables': {},
+        'results': [],
+    }
+    print(f"Server: {report['server']}")
+    try:
+        for scale in args.scales:
+            with phase(f"load/{scale}"):
+                start = time.perf_counter()
+                create_tables(cur, schema)
+                pools = populate(conn, scale, args.seed)
+            report['tables'][str(scale)] = pools['counts']
+            print(f"\nLoaded {sum(pools['counts'].values()):,} rows "
+                  f"({', '.join(f'{t} {n:,}' for t, n in pools['counts'].items())}) "
+                  f"in {time.perf_counter() - start:.1f}s")
+
+            results = []
+            with phase(f"run/{scale}"):
+                for query in queries:
+                    # Same parameter stream for a query at every scale and commit
+                    rng = random.Random(f"{args.seed}:{query['name']}")
+                    r = measure(cur, query, pools, rng, args.warmup, args.reps)
+                    results.append({'scale': scale, **r})
+            print_scale(scale, results)
+            report['results'].extend(results)
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        conn.close()
+
+    out = args.out or RESULTS_DIR / f"{report['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+    print(f"\nResults written to {out}")
+    metrics.count('queries', len(report['results']))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        metrics.count('regressions', regressions)
+        if regressions:
+            print(f"\n✗ {regressions} regression(s)")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+
+if __name__ == '__main__':
+    main()
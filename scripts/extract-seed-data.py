@@ -7,9 +7,23 @@ Uses the test variable values from Newman CI to ensure all test endpoints have d
 Only selects columns that exist in both production AND test schema.
 """
 
+import argparse
 import pymysql
+import pymysql.cursors
 import sys
+import time
 from datetime import datetime
+from pathlib import Path
+
+from seed_artifacts import available_codecs, write_artifacts
+from seed_blobs import BLOB_COLUMNS, BlobStore, fetch_missing
+from seed_blobs import select_clause as blob_select_clause
+from seed_keysets import KeyFilter, KeySets
+from seed_profiles import (clause_limit, merge_k, merge_key_query, merge_step, select_rows,
+                           top_k_rows)
+from seed_sampling import sample_top_k
+from sql_schema import parse_schema
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, phase
 
 # Production DB config (from .env)
 DB_CONFIG = {
@@ -123,6 +137,164 @@ TEST_SCHEMA_COLUMNS = {
                             "external_id", "data_source", "notes", "processed_at"],
 }
 
+# ============================================================
+# Extraction plan
+# ============================================================
+# One step per table, in dependency order. A step's mode is:
+#   "union" (default) - its fragments are UNIONed by query_union;
+#                       KeyFilter fragments restrict a column to a key set
+#                       gathered by an earlier step
+#   "all"             - the whole table
+#   "top_k"           - first k rows by order_col per group_col (seed_sampling)
+# "collect" gathers {key set: column} from the step's rows, and
+# "key_queries" loads {key set: (table, column, sql)} before the step runs.
+EXTRACT_PLAN = [
+    # 1. BLOCKS
+    {"table": "blocks", "fragments": [
+        ("WHERE block_index BETWEEN %s AND %s", (819990, 820010)),
+        ("ORDER BY block_index DESC LIMIT 5", ()),
+    ]},
+    # 2. StampTableV4, plus cpids with recent sales
+    {"table": "StampTableV4",
+     "key_queries": {"sale_cpids": (
+         "stamp_sales_history", "cpid",
+         "SELECT DISTINCT cpid FROM stamp_sales_history ORDER BY block_time DESC LIMIT 20")},
+     "fragments": [
+         ("WHERE stamp = %s", (TEST_VARS["test_stamp_id"],)),
+         ("WHERE cpid = %s", (TEST_VARS["test_cpid"],)),
+         ("WHERE tx_hash = %s", (TEST_VARS["test_tx_hash"],)),
+         ("WHERE stamp = %s", (TEST_VARS["test_cursed_id"],)),
+         ("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],)),
+         ("WHERE stamp < 0 ORDER BY stamp DESC LIMIT 15", ()),
+         ("WHERE stamp > 0 AND ident = 'STAMP' ORDER BY stamp DESC LIMIT 20", ()),
+         ("WHERE stamp > 0 AND ident = 'SRC-721' ORDER BY stamp DESC LIMIT 5", ()),
+         ("WHERE creator = %s LIMIT 10", (TEST_VARS["test_address"],)),
+         KeyFilter("sale_cpids", "cpid"),
+     ],
+     "collect": {"cpids": "cpid", "creators": "creator", "tx_hashes": "tx_hash"}},
+    # 3. CREATOR
+    {"table": "creator", "fragments": [
+        KeyFilter("creators", "address"),
+        ("LIMIT 10", ()),
+    ]},
+    # 4. TRANSACTIONS
+    {"table": "transactions", "fragments": [
+        KeyFilter("tx_hashes", "tx_hash"),
+        ("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],)),
+    ]},
+    # 5. SRC20Valid
+    {"table": "SRC20Valid", "fragments": [
+        ("WHERE tick = %s ORDER BY block_index DESC LIMIT 30", (TEST_VARS["test_src20_tick"],)),
+        ("WHERE op = 'DEPLOY' AND tick = %s LIMIT 5", (TEST_VARS["test_src20_tick"],)),
+        ("WHERE op = 'MINT' AND tick = %s LIMIT 10", (TEST_VARS["test_src20_tick"],)),
+        ("WHERE op = 'TRANSFER' AND tick = %s LIMIT 10", (TEST_VARS["test_src20_tick"],)),
+        ("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],)),
+    ]},
+    # 6. BALANCES
+    {"table": "balances", "fragments": [
+        ("WHERE address = %s LIMIT 20", (TEST_VARS["test_address"],)),
+        ("WHERE tick = %s ORDER BY CAST(amt AS DECIMAL) DESC LIMIT 20",
+         (TEST_VARS["test_src20_tick"],)),
+    ]},
+    # 7. SRC20_TOKEN_STATS
+    {"table": "src20_token_stats", "fragments": [
+        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
+        ("ORDER BY holders_count DESC LIMIT 15", ()),
+    ]},
+    # 8. SRC20_METADATA
+    {"table": "src20_metadata", "fragments": [
+        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
+        ("ORDER BY deploy_block_index DESC LIMIT 20", ()),
+    ]},
+    # 9. SRC20_MARKET_DATA
+    {"table": "src20_market_data", "fragments": [
+        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
+        ("ORDER BY market_cap_btc DESC LIMIT 10", ()),
+    ]},
+    # 10. SRC101Valid
+    {"table": "SRC101Valid", "fragments": [
+        ("WHERE deploy_hash = %s LIMIT 20", (TEST_VARS["test_deploy_hash"],)),
+        ("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)),
+        ("WHERE op = 'DEPLOY' LIMIT 10", ()),
+        ("WHERE op = 'MINT' LIMIT 10", ()),
+        ("WHERE op = 'TRANSFER' LIMIT 5", ()),
+     ],
+     "collect": {"deploy_hashes": "deploy_hash"}},
+    # 11. SRC101
+    {"table": "SRC101", "fragments": [
+        ("WHERE deploy_hash = %s LIMIT 20", (TEST_VARS["test_deploy_hash"],)),
+        ("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)),
+        ("WHERE op = 'DEPLOY' LIMIT 10", ()),
+        ("WHERE op = 'MINT' LIMIT 10", ()),
+    ]},
+    # 12. SRC101PRICE
+    {"table": "src101price", "fragments": [
+        KeyFilter("deploy_hashes", "deploy_hash"),
+        ("LIMIT 20", ()),
+    ]},
+    # 13. RECIPIENTS
+    {"table": "recipients", "fragments": [
+        KeyFilter("deploy_hashes", "deploy_hash"),
+        ("LIMIT 20", ()),
+    ]},
+    # 14. OWNERS
+    {"table": "owners", "fragments": [
+        KeyFilter("deploy_hashes", "deploy_hash", "LIMIT 30"),
+        ("LIMIT 10", ()),
+        ("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)),
+    ]},
+    # 15. COLLECTIONS (all 66 rows)
+    {"table": "collections", "mode": "all"},
+    # 16. COLLECTION_CREATORS (all 20 rows)
+    {"table": "collection_creators", "mode": "all"},
+    # 17. COLLECTION_STAMPS: first 5 stamps per collection as bounded
+    # PRIMARY KEY (collection_id, stamp) range reads
+    {"table": "collection_stamps", "mode": "top_k",
+     "group_col": "collection_id", "order_col": "stamp", "k": 5},
+    # 18. COLLECTION_MARKET_DATA (all 66 rows)
+    {"table": "collection_market_data", "mode": "all"},
+    # 19. STAMP_MARKET_DATA
+    {"table": "stamp_market_data", "fragments": [
+        KeyFilter("cpids", "cpid"),
+        ("WHERE activity_level = 'high' ORDER BY last_updated DESC LIMIT 15", ()),
+        ("WHERE floor_price_btc > 0 ORDER BY floor_price_btc DESC LIMIT 10", ()),
+    ]},
+    # 20. STAMP_HOLDER_CACHE
+    {"table": "stamp_holder_cache", "fragments": [
+        KeyFilter("cpids", "cpid", "LIMIT 30"),
+        ("ORDER BY id DESC LIMIT 20", ()),
+    ]},
+    # 21. STAMP_SALES_HISTORY (CRITICAL for Recent Sales endpoint)
+    {"table": "stamp_sales_history", "fragments": [
+        KeyFilter("cpids", "cpid"),
+        ("ORDER BY block_time DESC LIMIT 50", ()),
+    ]},
+]
+
+# Seed variants written together by --profiles from one extraction; a
+# profile scales the plan's LIMITs and may add fragments (see seed_profiles.py)
+SEED_PROFILES = {
+    # Every test variable still resolves, with a handful of rows around it
+    "smoke": {"output": "scripts/test-seed-data.smoke.sql", "scale": 0.2},
+    # The Newman seed: EXTRACT_PLAN as written
+    "newman": {"output": "scripts/test-seed-data.sql"},
+    # Load tests: ten times the rows, plus deep history on the hot tables
+    "load": {"output": "scripts/test-seed-data.load.sql", "scale": 10, "extra": {
+        "StampTableV4": [("WHERE stamp > 0 ORDER BY stamp DESC LIMIT 2000", ())],
+        "SRC20Valid": [("ORDER BY block_index DESC LIMIT 2000", ())],
+        "stamp_sales_history": [("ORDER BY block_time DESC LIMIT 2000", ())],
+    }},
+}
+
+# Row identity per table for client-side UNION ALL dedup
+TABLE_KEYS = {name: table.key_columns() for name, table in parse_schema().items()}
+
+# Session counters recorded around each query by --query-stats; Bytes_received
+# is what the client sent (SQL text and parameters)
+QUERY_STATUS_VARS = ("Created_tmp_tables", "Created_tmp_disk_tables", "Handler_write",
+                     "Bytes_received")
+STREAM_BATCH = 500
+
 
 def escape_sql(val):
     """Escape a value for SQL INSERT."""
@@ -199,10 +371,41 @@ def query_table(cursor, table, where_clause, params=(), limit=None):
     return result_cols, rows
 
 
-def query_union(cursor, table, queries):
-    """Execute multiple queries as UNION and return deduplicated results."""
+def session_status(cursor, names):
+    """Read SHOW SESSION STATUS counters as ints."""
+    cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN ({})".format(
+        ",".join(["%s"] * len(names))), tuple(names))
+    return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def row_key_index(table, columns):
+    """Positions of the table's primary key in columns, or None for whole rows."""
+    key_cols = TABLE_KEYS.get(table, ())
+    if key_cols and all(c in columns for c in key_cols):
+        return [columns.index(c) for c in key_cols]
+    # Key not selected: fall back to the whole row as identity
+    return None
+
+
+def row_key(row, key_idx):
+    return row if key_idx is None else tuple(row[i] for i in key_idx)
+
+
+def query_union(cursor, table, queries, dedup="client", stats=None, blobs=None):
+    """Execute multiple queries as one UNION and return deduplicated results.
+
+    dedup="server" sends a plain UNION, which makes the server build a
+    temporary table and compare full rows (including stamp_base64/src_data).
+    dedup="client" sends UNION ALL and streams the result through a hash set
+    keyed on the table's primary key from test-schema.sql, so each duplicate
+    is dropped as it arrives. When stats is a dict, the time and session
+    counters spent on this query are recorded in it under the table name.
+    With a BlobStore in blobs, large blob cells come back as hash references.
+    """
     prod_cols = get_prod_columns(cursor, table)
     select_clause, result_cols = build_select(table, prod_cols)
+    if blobs is not None:
+        select_clause = blob_select_clause(table, result_cols) or select_clause
 
     parts = []
     all_params = []
@@ -211,320 +414,366 @@ def query_union(cursor, table, queries):
         parts.append(part)
         all_params.extend(params)
 
-    sql = " UNION ".join(parts)
-    cursor.execute(sql, tuple(all_params))
-    rows = cursor.fetchall()
+    if stats is not None:
+        before = session_status(cursor, QUERY_STATUS_VARS)
+        start = time.perf_counter()
+
+    if dedup == "server":
+        sql = " UNION ".join(parts)
+        cursor.execute(sql, tuple(all_params))
+        rows = cursor.fetchall()
+    else:
+        key_idx = row_key_index(table, result_cols)
+        sql = " UNION ALL ".join(parts)
+        seen = set()
+        rows = []
+        stream = cursor.connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            stream.execute(sql, tuple(all_params))
+            while True:
+                batch = stream.fetchmany(STREAM_BATCH)
+                if not batch:
+                    break
+                for row in batch:
+                    key = row_key(row, key_idx)
+                    if key not in seen:
+                        seen.add(key)
+                        rows.append(row)
+        finally:
+            stream.close()
+
+    if stats is not None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        after = session_status(cursor, QUERY_STATUS_VARS)
+        # Includes the SHOW STATUS probe itself, equally in every mode
+        stats[table] = {k: after[k] - before[k] for k in after}
+        stats[table]["ms"] = round(elapsed_ms, 1)
     return result_cols, rows
 
 
-def extract_all(conn):
-    """Extract seed data for all 20 tables."""
+def extract_all(conn, union_dedup="client", query_stats=None, keysets="temp", blobs=None,
+                plan=EXTRACT_PLAN):
+    """Extract seed data for every table in the plan."""
     cur = conn.cursor()
     sections = []
+    # Key sets reused across dependent tables live in session temporary tables
+    keys = KeySets(cur, mode=keysets, stats=query_stats)
+
+    for step in plan:
+        table = step["table"]
+        with phase(table):
+            mode = step.get("mode", "union")
+            print(f"Extracting {table}...")
+
+            for name, (src_table, column, sql) in step.get("key_queries", {}).items():
+                cur.execute(sql)
+                keys.load(name, [r[0] for r in cur.fetchall()], src_table, column)
+
+            if mode == "all":
+                cols, rows = query_table(cur, table, "")
+            elif mode == "top_k":
+                prod_cols = get_prod_columns(cur, table)
+                _, cols = build_select(table, prod_cols)
+                cols, rows = sample_top_k(cur, table, cols, group_col=step["group_col"],
+                                          order_col=step["order_col"], k=step["k"])
+            else:
+                queries = []
+                for fragment in step["fragments"]:
+                    if isinstance(fragment, KeyFilter):
+                        # Dependent fragments are skipped when their key set is empty
+                        if keys.has(fragment.keyset):
+                            queries.append(keys.filter(fragment.keyset, table,
+                                                       fragment.column, fragment.rest))
+                    else:
+                        queries.append(fragment)
+                cols, rows = query_union(cur, table, queries, dedup=union_dedup,
+                                         stats=query_stats, blobs=blobs)
+            sections.append((table, cols, rows))
+            print(f"  {table}: {len(rows)} rows")
+
+            if blobs is not None and table in BLOB_COLUMNS:
+                # Only bodies the local store doesn't already hold cross the wire
+                fetched = fetch_missing(cur, blobs, table, cols, rows, TABLE_KEYS[table][0])
+                print(f"  blobs: {blobs.written} new, {blobs.reused} already stored, "
+                      f"{fetched:,} bytes fetched")
+
+            for name, column in step.get("collect", {}).items():
+                if column in cols:
+                    idx = cols.index(column)
+                    keys.load(name, [row[idx] for row in rows if row[idx]], table, column)
+
+    keys.close()
+    return sections
 
-    # ============================================================
-    # 1. BLOCKS
-    # ============================================================
-    print("Extracting blocks...")
-    cols, rows = query_union(cur, "blocks", [
-        ("WHERE block_index BETWEEN %s AND %s", (819990, 820010)),
-        ("ORDER BY block_index DESC LIMIT 5", ()),
-    ])
-    sections.append(("blocks", cols, rows))
-    print(f"  blocks: {len(rows)} rows")
-
-    # ============================================================
-    # 2. StampTableV4
-    # ============================================================
-    print("Extracting StampTableV4...")
-    # First get cpids with recent sales
-    cur.execute("SELECT DISTINCT cpid FROM stamp_sales_history ORDER BY block_time DESC LIMIT 20")
-    sale_cpids = [r[0] for r in cur.fetchall()]
-
-    stamp_queries = [
-        ("WHERE stamp = %s", (TEST_VARS["test_stamp_id"],)),
-        ("WHERE cpid = %s", (TEST_VARS["test_cpid"],)),
-        ("WHERE tx_hash = %s", (TEST_VARS["test_tx_hash"],)),
-        ("WHERE stamp = %s", (TEST_VARS["test_cursed_id"],)),
-        ("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],)),
-        ("WHERE stamp < 0 ORDER BY stamp DESC LIMIT 15", ()),
-        ("WHERE stamp > 0 AND ident = 'STAMP' ORDER BY stamp DESC LIMIT 20", ()),
-        ("WHERE stamp > 0 AND ident = 'SRC-721' ORDER BY stamp DESC LIMIT 5", ()),
-        ("WHERE creator = %s LIMIT 10", (TEST_VARS["test_address"],)),
-    ]
-    if sale_cpids:
-        placeholders = ",".join(["%s"] * len(sale_cpids))
-        stamp_queries.append((f"WHERE cpid IN ({placeholders})", tuple(sale_cpids)))
-
-    cols, rows = query_union(cur, "StampTableV4", stamp_queries)
-    sections.append(("StampTableV4", cols, rows))
-    print(f"  StampTableV4: {len(rows)} rows")
-
-    # Collect cpids and creators for related data
-    stamp_cpids = set()
-    stamp_creators = set()
-    stamp_tx_hashes = set()
-    cpid_idx = cols.index("cpid") if "cpid" in cols else None
-    creator_idx = cols.index("creator") if "creator" in cols else None
-    tx_idx = cols.index("tx_hash") if "tx_hash" in cols else None
-    for row in rows:
-        if cpid_idx is not None:
-            stamp_cpids.add(row[cpid_idx])
-        if creator_idx is not None:
-            stamp_creators.add(row[creator_idx])
-        if tx_idx is not None:
-            stamp_tx_hashes.add(row[tx_idx])
-
-    # ============================================================
-    # 3. CREATOR
-    # ============================================================
-    print("Extracting creator...")
-    creator_queries = [("LIMIT 10", ())]
-    if stamp_creators:
-        ph = ",".join(["%s"] * len(stamp_creators))
-        creator_queries.insert(0, (f"WHERE address IN ({ph})", tuple(stamp_creators)))
-    cols, rows = query_union(cur, "creator", creator_queries)
-    sections.append(("creator", cols, rows))
-    print(f"  creator: {len(rows)} rows")
-
-    # ============================================================
-    # 4. TRANSACTIONS
-    # ============================================================
-    print("Extracting transactions...")
-    tx_queries = [("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],))]
-    if stamp_tx_hashes:
-        ph = ",".join(["%s"] * len(stamp_tx_hashes))
-        tx_queries.insert(0, (f"WHERE tx_hash IN ({ph})", tuple(stamp_tx_hashes)))
-    cols, rows = query_union(cur, "transactions", tx_queries)
-    sections.append(("transactions", cols, rows))
-    print(f"  transactions: {len(rows)} rows")
-
-    # ============================================================
-    # 5. SRC20Valid
-    # ============================================================
-    print("Extracting SRC20Valid...")
-    cols, rows = query_union(cur, "SRC20Valid", [
-        ("WHERE tick = %s ORDER BY block_index DESC LIMIT 30", (TEST_VARS["test_src20_tick"],)),
-        ("WHERE op = 'DEPLOY' AND tick = %s LIMIT 5", (TEST_VARS["test_src20_tick"],)),
-        ("WHERE op = 'MINT' AND tick = %s LIMIT 10", (TEST_VARS["test_src20_tick"],)),
-        ("WHERE op = 'TRANSFER' AND tick = %s LIMIT 10", (TEST_VARS["test_src20_tick"],)),
-        ("WHERE block_index = %s LIMIT 10", (TEST_VARS["test_block"],)),
-    ])
-    sections.append(("SRC20Valid", cols, rows))
-    print(f"  SRC20Valid: {len(rows)} rows")
 
-    # ============================================================
-    # 6. BALANCES
-    # ============================================================
-    print("Extracting balances...")
-    cols, rows = query_union(cur, "balances", [
-        ("WHERE address = %s LIMIT 20", (TEST_VARS["test_address"],)),
-        ("WHERE tick = %s ORDER BY CAST(amt AS DECIMAL) DESC LIMIT 20",
-         (TEST_VARS["test_src20_tick"],)),
-    ])
-    sections.append(("balances", cols, rows))
-    print(f"  balances: {len(rows)} rows")
+def extract_profiles(conn, profiles, keysets="temp", blobs=None, plan=EXTRACT_PLAN):
+    """Extract every profile's seed in one pass over one consistent snapshot.
 
-    # ============================================================
-    # 7. SRC20_TOKEN_STATS
-    # ============================================================
-    print("Extracting src20_token_stats...")
-    cols, rows = query_union(cur, "src20_token_stats", [
-        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
-        ("ORDER BY holders_count DESC LIMIT 15", ()),
-    ])
-    sections.append(("src20_token_stats", cols, rows))
-    print(f"  src20_token_stats: {len(rows)} rows")
+    Each fragment runs once, at the largest limit any profile uses, and
+    the profiles are cut out of the rows in memory. Returns
+    {profile name: sections}.
+    """
+    cur = conn.cursor()
+    cur.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+    # Server-side key sets hold the union of every profile's keys; each
+    # profile filters by its own set in memory
+    keys = KeySets(cur, mode=keysets)
+    profile_keys = {name: {} for name in profiles}
+    sections = {name: [] for name in profiles}
+
+    def load_keys(name, per_profile, table, column):
+        for p, values in per_profile.items():
+            profile_keys[p][name] = set(values)
+        keys.load(name, set().union(*per_profile.values()), table, column)
 
-    # ============================================================
-    # 8. SRC20_METADATA
-    # ============================================================
-    print("Extracting src20_metadata...")
-    cols, rows = query_union(cur, "src20_metadata", [
-        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
-        ("ORDER BY deploy_block_index DESC LIMIT 20", ()),
-    ])
-    sections.append(("src20_metadata", cols, rows))
-    print(f"  src20_metadata: {len(rows)} rows")
+    try:
+        for step in plan:
+            table = step["table"]
+            with phase(table):
+                mode = step.get("mode", "union")
+                print(f"Extracting {table}...")
+
+                for name, (src_table, column, sql) in step.get("key_queries", {}).items():
+                    sql, limits = merge_key_query(sql, profiles)
+                    cur.execute(sql)
+                    values = [r[0] for r in cur.fetchall()]
+                    load_keys(name, {p: values[:limit] for p, limit in limits.items()},
+                              src_table, column)
+
+                if mode == "all":
+                    cols, rows = query_table(cur, table, "")
+                    fetched = rows
+                    per_profile = {p: rows for p in profiles}
+                elif mode == "top_k":
+                    _, cols = build_select(table, get_prod_columns(cur, table))
+                    ks = merge_k(step["k"], profiles)
+                    cols, fetched = sample_top_k(cur, table, cols, group_col=step["group_col"],
+                                                 order_col=step["order_col"], k=max(ks.values()))
+                    per_profile = {p: top_k_rows(cols, fetched, step["group_col"],
+                                                 step["order_col"], k) for p, k in ks.items()}
+                else:
+                    _, cols = build_select(table, get_prod_columns(cur, table))
+                    by_key = {}
+                    results = []
+                    for fragment, limits in merge_step(step, profiles):
+                        if isinstance(fragment, KeyFilter):
+                            if not keys.has(fragment.keyset):
+                                continue
+                            query = keys.filter(fragment.keyset, table, fragment.column,
+                                                fragment.rest)
+                        else:
+                            query = fragment
+                        cols, frows = query_union(cur, table, [query], blobs=blobs)
+                        key_idx = row_key_index(table, cols)
+                        fkeys = []
+                        for row in frows:
+                            key = row_key(row, key_idx)
+                            by_key.setdefault(key, row)
+                            fkeys.append(key)
+                        results.append((fragment, limits, fkeys))
+                    fetched = list(by_key.values())
+
+                    def accept(fragment, row, p):
+                        if not isinstance(fragment, KeyFilter):
+                            return True
+                        wanted = profile_keys[p].get(fragment.keyset, ())
+                        return row[cols.index(fragment.column)] in wanted
+
+                    per_profile = {
+                        p: select_rows(results, p, by_key,
+                                       lambda fragment, row, p=p: accept(fragment, row, p))
+                        for p in profiles}
+
+                for p, rows in per_profile.items():
+                    sections[p].append((table, cols, rows))
+                print(f"  {table}: {len(fetched)} rows fetched; " +
+                      ", ".join(f"{p} {len(rows)}" for p, rows in per_profile.items()))
+
+                if blobs is not None and table in BLOB_COLUMNS:
+                    fetched_bytes = fetch_missing(cur, blobs, table, cols, fetched,
+                                                  TABLE_KEYS[table][0])
+                    print(f"  blobs: {blobs.written} new, {blobs.reused} already stored, "
+                          f"{fetched_bytes:,} bytes fetched")
+
+                for name, column in step.get("collect", {}).items():
+                    if column in cols:
+                        idx = cols.index(column)
+                        load_keys(name, {p: [row[idx] for row in rows if row[idx]]
+                                         for p, rows in per_profile.items()}, table, column)
+
+        keys.close()
+    finally:
+        # Read-only: ending the transaction releases the snapshot
+        conn.rollback()
+    return sections
 
-    # ============================================================
-    # 9. SRC20_MARKET_DATA
-    # ============================================================
-    print("Extracting src20_market_data...")
-    cols, rows = query_union(cur, "src20_market_data", [
-        ("WHERE tick = %s", (TEST_VARS["test_src20_tick"],)),
-        ("ORDER BY market_cap_btc DESC LIMIT 10", ()),
-    ])
-    sections.append(("src20_market_data", cols, rows))
-    print(f"  src20_market_data: {len(rows)} rows")
-
-    # ============================================================
-    # 9. SRC101Valid
-    # ============================================================
-    print("Extracting SRC101Valid...")
-    cols, rows = query_union(cur, "SRC101Valid", [
-        ("WHERE deploy_hash = %s LIMIT 20", (TEST_VARS["test_deploy_hash"],)),
-        ("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)),
-        ("WHERE op = 'DEPLOY' LIMIT 10", ()),
-        ("WHERE op = 'MINT' LIMIT 10", ()),
-        ("WHERE op = 'TRANSFER' LIMIT 5", ()),
-    ])
-    sections.append(("SRC101Valid", cols, rows))
-    print(f"  SRC101Valid: {len(rows)} rows")
 
-    # Collect deploy_hashes
-    deploy_hashes = set()
+# ============================================================
+# --estimate: predicted cost without fetching rows
+# ============================================================
+
+# Quoting, escaping and separators make a row's SQL text larger than its
+# stored size; these are rough factors, not a calibration
+SQL_EXPANSION = 1.2
+SQL_ROW_OVERHEAD = 6
+# Rough server cost per row examined, for sizing sections against each other
+EXAMINE_US_PER_ROW = 1.0
+
+
+def table_stats(cursor):
+    """TABLE_ROWS and AVG_ROW_LENGTH per table from information_schema."""
+    cursor.execute(
+        "SELECT TABLE_NAME, TABLE_ROWS, AVG_ROW_LENGTH FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE()")
+    return {name: (int(rows or 0), int(avg or 0)) for name, rows, avg in cursor.fetchall()}
+
+
+def leading_cardinality(cursor):
+    """Distinct-value estimate for every column that leads an index."""
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME, MAX(CARDINALITY) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND SEQ_IN_INDEX = 1 "
+        "GROUP BY TABLE_NAME, COLUMN_NAME")
+    return {(t, c): int(card or 0) for t, c, card in cursor.fetchall()}
+
+
+def explain(cursor, sql, params=()):
+    """Return (rows examined, rows returned) from EXPLAIN's estimates."""
+    cursor.execute("EXPLAIN " + sql, params)
+    names = [d[0].lower() for d in cursor.description]
+    plan = cursor.fetchall()
+    rows_idx = names.index("rows")
+    examined = sum(int(r[rows_idx] or 0) for r in plan)
+    returned = float(plan[0][rows_idx] or 0)
+    # MySQL reports the share of rows left after the WHERE; MariaDB omits it
+    if "filtered" in names and plan[0][names.index("filtered")] is not None:
+        returned *= float(plan[0][names.index("filtered")]) / 100
+    return examined, returned
+
+
+def estimate_all(conn, plan=EXTRACT_PLAN):
+    """Predict rows, bytes and server time per plan step using only metadata."""
+    cur = conn.cursor()
+    stats = table_stats(cur)
+    cardinality = leading_cardinality(cur)
+    keyset_sizes = {}
+    estimates = []
+
+    def keyed_rows(table, fragment, table_rows):
+        keys = keyset_sizes.get(fragment.keyset, 0)
+        distinct = cardinality.get((table, fragment.column))
+        per_key = table_rows / distinct if distinct else 1
+        rows = keys * per_key
+        limit = clause_limit(fragment.rest)
+        rows = min(rows, limit) if limit is not None else rows
+        # Without an index on the column every key probe is a scan
+        return (rows if distinct else table_rows), rows
+
+    for step in plan:
+        table = step["table"]
+        mode = step.get("mode", "union")
+        table_rows, avg_len = stats.get(table, (0, 0))
+        examined = 0.0
+
+        for name, (_, _, sql) in step.get("key_queries", {}).items():
+            ex, _ = explain(cur, sql)
+            examined += ex
+            keyset_sizes[name] = clause_limit(sql) or ex
+
+        if mode == "all":
+            rows = table_rows
+            examined += table_rows
+        elif mode == "top_k":
+            groups = cardinality.get((table, step["group_col"]), table_rows)
+            rows = min(table_rows, groups * step["k"])
+            examined += rows + groups
+        else:
+            select_clause, _ = build_select(table, get_prod_columns(cur, table))
+            rows = 0.0
+            for fragment in step["fragments"]:
+                if isinstance(fragment, KeyFilter):
+                    ex, out = keyed_rows(table, fragment, table_rows)
+                else:
+                    where_clause, params = fragment
+                    ex, out = explain(cur, f"SELECT {select_clause} FROM `{table}` {where_clause}",
+                                      params)
+                    limit = clause_limit(where_clause)
+                    out = min(out, limit) if limit is not None else out
+                examined += ex
+                rows += out
+            # UNION ALL before dedup can't exceed the table itself
+            rows = min(rows, table_rows) if table_rows else rows
+
+        for name in step.get("collect", {}):
+            keyset_sizes[name] = rows
+        transfer = rows * avg_len
+        estimates.append({
+            "table": table,
+            "rows": int(rows),
+            "bytes": int(transfer),
+            "sql_bytes": int(transfer * SQL_EXPANSION + rows * SQL_ROW_OVERHEAD),
+            "examined": int(examined),
+            "server_ms": examined * EXAMINE_US_PER_ROW / 1000,
+        })
+    return estimates
+
+
+def print_estimates(estimates, max_bytes=None):
+    """Print the estimate table; return False when max_bytes is exceeded."""
+    print()
+    print("=" * 78)
+    print(f"{'table':<24} {'rows':>10} {'transfer':>12} {'SQL out':>12} {'examined':>10} {'~ms':>6}")
+    print("=" * 78)
+    for e in estimates:
+        print(f"{e['table']:<24} {e['rows']:>10,} {e['bytes']:>12,} {e['sql_bytes']:>12,} "
+              f"{e['examined']:>10,} {e['server_ms']:>6.0f}")
+    total = {k: sum(e[k] for e in estimates) for k in ("rows", "bytes", "sql_bytes", "examined",
+                                                       "server_ms")}
+    print("-" * 78)
+    print(f"{'TOTAL':<24} {total['rows']:>10,} {total['bytes']:>12,} {total['sql_bytes']:>12,} "
+          f"{total['examined']:>10,} {total['server_ms']:>6.0f}")
+    print("\nEstimates come from EXPLAIN and information_schema statistics; "
+          "treat them as order-of-magnitude.")
+    if max_bytes is not None and total["bytes"] > max_bytes:
+        print(f"✗ Estimated transfer {total['bytes']:,} bytes exceeds --max-bytes {max_bytes:,}")
+        return False
+    return True
+
+
+def table_section(table, cols, rows):
+    """SQL lines for one table's block in a seed file."""
+    lines = []
+    lines.append(f"-- ============================================================")
+    lines.append(f"-- {table} ({len(rows)} rows)")
+    lines.append(f"-- ============================================================")
+    lines.append("")
     if rows:
-        dh_idx = cols.index("deploy_hash") if "deploy_hash" in cols else None
-        if dh_idx is not None:
-            for row in rows:
-                if row[dh_idx]:
-                    deploy_hashes.add(row[dh_idx])
-
-    # ============================================================
-    # 10. SRC101
-    # ============================================================
-    print("Extracting SRC101...")
-    cols, rows = query_union(cur, "SRC101", [
-        ("WHERE deploy_hash = %s LIMIT 20", (TEST_VARS["test_deploy_hash"],)),
-        ("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)),
-        ("WHERE op = 'DEPLOY' LIMIT 10", ()),
-        ("WHERE op = 'MINT' LIMIT 10", ()),
-    ])
-    sections.append(("SRC101", cols, rows))
-    print(f"  SRC101: {len(rows)} rows")
-
-    # ============================================================
-    # 11. SRC101PRICE
-    # ============================================================
-    print("Extracting src101price...")
-    price_queries = [("LIMIT 20", ())]
-    if deploy_hashes:
-        ph = ",".join(["%s"] * len(deploy_hashes))
-        price_queries.insert(0, (f"WHERE deploy_hash IN ({ph})", tuple(deploy_hashes)))
-    cols, rows = query_union(cur, "src101price", price_queries)
-    sections.append(("src101price", cols, rows))
-    print(f"  src101price: {len(rows)} rows")
-
-    # ============================================================
-    # 12. RECIPIENTS
-    # ============================================================
-    print("Extracting recipients...")
-    recip_queries = [("LIMIT 20", ())]
-    if deploy_hashes:
-        ph = ",".join(["%s"] * len(deploy_hashes))
-        recip_queries.insert(0, (f"WHERE deploy_hash IN ({ph})", tuple(deploy_hashes)))
-    cols, rows = query_union(cur, "recipients", recip_queries)
-    sections.append(("recipients", cols, rows))
-    print(f"  recipients: {len(rows)} rows")
-
-    # ============================================================
-    # 13. OWNERS
-    # ============================================================
-    print("Extracting owners...")
-    owner_queries = [("LIMIT 10", ())]
-    if deploy_hashes:
-        ph = ",".join(["%s"] * len(deploy_hashes))
-        owner_queries.insert(0, (f"WHERE deploy_hash IN ({ph}) LIMIT 30", tuple(deploy_hashes)))
-    owner_queries.append(("WHERE tokenid = %s LIMIT 10", (TEST_VARS["test_tokenid"],)))
-    cols, rows = query_union(cur, "owners", owner_queries)
-    sections.append(("owners", cols, rows))
-    print(f"  owners: {len(rows)} rows")
-
-    # ============================================================
-    # 14. COLLECTIONS (all 66 rows)
-    # ============================================================
-    print("Extracting collections...")
-    cols, rows = query_table(cur, "collections", "")
-    sections.append(("collections", cols, rows))
-    print(f"  collections: {len(rows)} rows")
-
-    # ============================================================
-    # 15. COLLECTION_CREATORS (all 20 rows)
-    # ============================================================
-    print("Extracting collection_creators...")
-    cols, rows = query_table(cur, "collection_creators", "")
-    sections.append(("collection_creators", cols, rows))
-    print(f"  collection_creators: {len(rows)} rows")
-
-    # ============================================================
-    # 16. COLLECTION_STAMPS (sample)
-    # ============================================================
-    print("Extracting collection_stamps...")
-    prod_cols = get_prod_columns(cur, "collection_stamps")
-    _, result_cols = build_select("collection_stamps", prod_cols)
-    # Use qualified column names to avoid ambiguity
-    qualified_select = ", ".join(f"cs.`{c}`" for c in result_cols)
-    cur.execute(f"""
-        SELECT {qualified_select} FROM collection_stamps cs
-        INNER JOIN (
-            SELECT collection_id, stamp,
-            ROW_NUMBER() OVER (PARTITION BY collection_id ORDER BY stamp) as rn
-            FROM collection_stamps
-        ) ranked ON cs.collection_id = ranked.collection_id
-            AND cs.stamp = ranked.stamp
-        WHERE ranked.rn <= 5
-    """)
-    rows = cur.fetchall()
-    sections.append(("collection_stamps", result_cols, rows))
-    print(f"  collection_stamps: {len(rows)} rows")
-
-    # ============================================================
-    # 17. COLLECTION_MARKET_DATA (all 66 rows)
-    # ============================================================
-    print("Extracting collection_market_data...")
-    cols, rows = query_table(cur, "collection_market_data", "")
-    sections.append(("collection_market_data", cols, rows))
-    print(f"  collection_market_data: {len(rows)} rows")
-
-    # ============================================================
-    # 18. STAMP_MARKET_DATA
-    # ============================================================
-    print("Extracting stamp_market_data...")
-    smd_queries = [
-        ("WHERE activity_level = 'high' ORDER BY last_updated DESC LIMIT 15", ()),
-        ("WHERE floor_price_btc > 0 ORDER BY floor_price_btc DESC LIMIT 10", ()),
-    ]
-    if stamp_cpids:
-        ph = ",".join(["%s"] * len(stamp_cpids))
-        smd_queries.insert(0, (f"WHERE cpid IN ({ph})", tuple(stamp_cpids)))
-    cols, rows = query_union(cur, "stamp_market_data", smd_queries)
-    sections.append(("stamp_market_data", cols, rows))
-    print(f"  stamp_market_data: {len(rows)} rows")
-
-    # ============================================================
-    # 19. STAMP_HOLDER_CACHE
-    # ============================================================
-    print("Extracting stamp_holder_cache...")
-    shc_queries = [("ORDER BY id DESC LIMIT 20", ())]
-    if stamp_cpids:
-        ph = ",".join(["%s"] * len(stamp_cpids))
-        shc_queries.insert(0, (f"WHERE cpid IN ({ph}) LIMIT 30", tuple(stamp_cpids)))
-    cols, rows = query_union(cur, "stamp_holder_cache", shc_queries)
-    sections.append(("stamp_holder_cache", cols, rows))
-    print(f"  stamp_holder_cache: {len(rows)} rows")
-
-    # ============================================================
-    # 20. STAMP_SALES_HISTORY (CRITICAL for Recent Sales endpoint)
-    # ============================================================
-    print("Extracting stamp_sales_history...")
-    ssh_queries = [
-        ("ORDER BY block_time DESC LIMIT 50", ()),
-    ]
-    if stamp_cpids:
-        ph = ",".join(["%s"] * len(stamp_cpids))
-        ssh_queries.insert(0, (f"WHERE cpid IN ({ph})", tuple(stamp_cpids)))
-    cols, rows = query_union(cur, "stamp_sales_history", ssh_queries)
-    sections.append(("stamp_sales_history", cols, rows))
-    print(f"  stamp_sales_history: {len(rows)} rows")
+        lines.append(format_insert(table, cols, rows))
+    else:
+        lines.append(f"-- No data found for {table}")
+    lines.append("")
+    return lines
 
-    return sections
+
+def generate_table_sql(table, cols, rows):
+    """Generate a self-contained SQL file for one table's artifact."""
+    lines = []
+    lines.append(f"-- BTCStampsExplorer Test Seed Data: {table}")
+    lines.append("SET FOREIGN_KEY_CHECKS = 0;")
+    lines.append("")
+    lines.extend(table_section(table, cols, rows))
+    lines.append("SET FOREIGN_KEY_CHECKS = 1;")
+    lines.append("")
+    return "\n".join(lines)
 
 
-def generate_sql(sections):
+def generate_sql(sections, profile=None):
     """Generate the full SQL file."""
     lines = []
     lines.append("-- BTCStampsExplorer Test Seed Data")
+    if profile:
+        lines.append(f"-- Profile: {profile}")
     lines.append("-- Auto-generated from production database")
     lines.append(f"-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     lines.append("-- Source: btc_stamps production database")
@@ -540,15 +789,7 @@ def generate_sql(sections):
     lines.append("")
 
     for table, cols, rows in sections:
-        lines.append(f"-- ============================================================")
-        lines.append(f"-- {table} ({len(rows)} rows)")
-        lines.append(f"-- ============================================================")
-        lines.append("")
-        if rows:
-            lines.append(format_insert(table, cols, rows))
-        else:
-            lines.append(f"-- No data found for {table}")
-        lines.append("")
+        lines.extend(table_section(table, cols, rows))
 
     lines.append("SET FOREIGN_KEY_CHECKS = 1;")
     lines.append("")
@@ -559,29 +800,123 @@ def generate_sql(sections):
     return "\n".join(lines)
 
 
+def print_query_stats(query_stats, union_dedup, keysets):
+    """Summarize time, bytes sent and temporary-table work per extraction query."""
+    print(f"\nQuery stats (union dedup: {union_dedup}, key sets: {keysets}):")
+    totals = {}
+    for name, counters in query_stats.items():
+        for k, v in counters.items():
+            totals[k] = totals.get(k, 0) + v
+        print(f"  {name}: " + ", ".join(f"{k}={v}" for k, v in counters.items()))
+    print("  TOTAL: " + ", ".join(f"{k}={round(v, 1)}" for k, v in totals.items()))
+
+
+def write_seed(args, sections, profile=None):
+    """Write one seed as a SQL file or artifacts; return (path, bytes written)."""
+    if args.artifacts:
+        output_path = Path(args.artifacts) / profile if profile else Path(args.artifacts)
+        manifest = write_artifacts(
+            output_path,
+            ((table, len(rows), generate_table_sql(table, cols, rows))
+             for table, cols, rows in sections),
+            codec=args.codec)
+        raw = sum(e["sql_bytes"] for e in manifest["tables"])
+        packed = sum(e["compressed_bytes"] for e in manifest["tables"])
+        print(f"Artifacts: {raw:,} bytes SQL -> {packed:,} bytes {args.codec}")
+        return output_path, packed
+    sql = generate_sql(sections, profile)
+    output_path = SEED_PROFILES[profile]["output"] if profile else "scripts/test-seed-data.sql"
+    with open(output_path, "w") as f:
+        f.write(sql)
+    return output_path, len(sql.encode("utf-8"))
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract Newman seed data from production")
+    parser.add_argument("--union-dedup", choices=["client", "server"], default="client",
+                        help="Dedupe UNION fragments by primary key on the client "
+                             "(UNION ALL, default) or with a server-side UNION")
+    parser.add_argument("--keysets", choices=["temp", "inline"], default="temp",
+                        help="Filter dependent tables through session TEMPORARY "
+                             "key tables (default) or inline IN-lists")
+    parser.add_argument("--externalize-blobs", action="store_true",
+                        help="Write large stamp_base64/src_data cells to the content-addressed "
+                             "store in scripts/seed-blobs and reference them by hash")
+    parser.add_argument("--artifacts", metavar="DIR",
+                        help="Write one compressed SQL file per table plus manifest.json "
+                             "to DIR (load with seed_artifacts.py) instead of "
+                             "scripts/test-seed-data.sql")
+    parser.add_argument("--codec", choices=available_codecs(), default="gzip",
+                        help="Artifact compression (zstd needs the zstandard package)")
+    parser.add_argument("--query-stats", action="store_true",
+                        help="Report time, Bytes_received and temporary-table counters "
+                             "per query (run once per mode to compare)")
+    parser.add_argument("--profiles", nargs="+", choices=list(SEED_PROFILES),
+                        help="Write these seed variants from one consistent-snapshot "
+                             "extraction (--artifacts DIR gets one subdirectory each)")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Predict rows, bytes and server time per table from EXPLAIN "
+                             "and information_schema without fetching any data")
+    parser.add_argument("--max-bytes", type=int,
+                        help="Refuse to extract when the estimated transfer exceeds this")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    if args.profiles and (args.query_stats or args.union_dedup != "client"):
+        parser.error("--profiles runs every fragment on its own; "
+                     "--query-stats and --union-dedup do not apply")
+
+    with instrument("extract-seed-data", args) as metrics:
+        run(args, metrics)
+
+
+def run(args, metrics):
     print("Connecting to production database...")
-    conn = pymysql.connect(**DB_CONFIG)
+    with phase("connect"):
+        conn = pymysql.connect(**DB_CONFIG)
     print("Connected!")
 
     try:
-        sections = extract_all(conn)
-
-        print("\nGenerating SQL...")
-        sql = generate_sql(sections)
-
-        output_path = "scripts/test-seed-data.sql"
-        with open(output_path, "w") as f:
-            f.write(sql)
-
-        total_rows = sum(len(rows) for _, _, rows in sections)
-        print(f"\nSeed data written to {output_path}")
-        print(f"Total: {total_rows} rows across {len(sections)} tables")
-
-        print("\nTable summary:")
-        for table, cols, rows in sections:
-            status = f"{len(rows)} rows ({len(cols)} cols)" if rows else "EMPTY"
-            print(f"  {table}: {status}")
+        if args.estimate or args.max_bytes is not None:
+            with phase("estimate"):
+                within = print_estimates(estimate_all(conn), args.max_bytes)
+            if args.estimate or not within:
+                sys.exit(0 if within else 1)
+
+        query_stats = {} if args.query_stats else None
+        blobs = BlobStore() if args.externalize_blobs else None
+        with phase("extract"):
+            if args.profiles:
+                profiles = {name: SEED_PROFILES[name] for name in args.profiles}
+                print(f"Profiles: {', '.join(profiles)} (one consistent snapshot)")
+                by_profile = extract_profiles(conn, profiles, keysets=args.keysets, blobs=blobs)
+            else:
+                sections = extract_all(conn, union_dedup=args.union_dedup,
+                                       query_stats=query_stats, keysets=args.keysets,
+                                       blobs=blobs)
+                by_profile = {None: sections}
+
+        for profile, sections in by_profile.items():
+            print(f"\nGenerating SQL{f' for {profile}' if profile else ''}...")
+            with phase(f"write/{profile}" if profile else "write"):
+                output_path, written = write_seed(args, sections, profile)
+            total_rows = sum(len(rows) for _, _, rows in sections)
+            print(f"\nSeed data written to {output_path}")
+            print(f"Total: {total_rows} rows across {len(sections)} tables")
+
+            print("\nTable summary:")
+            for table, cols, rows in sections:
+                status = f"{len(rows)} rows ({len(cols)} cols)" if rows else "EMPTY"
+                print(f"  {table}: {status}")
+            suffix = f"_{profile}" if profile else ""
+            metrics.count(f"rows{suffix}", total_rows)
+            metrics.count(f"bytes_written{suffix}", written)
+
+        if blobs is not None:
+            print("\nBlob cells reference scripts/seed-blobs; load with "
+                  "'python3 scripts/seed_blobs.py rehydrate' piped into mysql")
+
+        if query_stats is not None:
+            print_query_stats(query_stats, args.union_dedup, args.keysets)
 
     finally:
         conn.close()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Analyze Newman JSON reporter output for slow API endpoints.
+
+Streams one or more Newman run reports (`--reporter-json-export`), joins each
+execution back to its collection item using the same request index as
+validate_test_coverage.py, and reports per-endpoint latency percentiles,
+response-size distributions and Dev vs Prod comparisons for paired
+' - Dev' / ' - Prod' requests. Results can be saved as a baseline and later
+runs checked against it for regressions.
+
+Usage:
+    python3 scripts/newman_timing_analyzer.py reports/newman/*-results.json
+    python3 scripts/newman_timing_analyzer.py run.json --save-baseline reports/newman-baseline.json
+    python3 scripts/newman_timing_analyzer.py run.json --baseline reports/newman-baseline.json
+
+Reports are streamed with ijson when it is installed; otherwise the
+`run.executions` array is decoded one element at a time with the stdlib
+decoder, so the embedded collection and response bodies are never held in
+memory as a whole.
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from validate_test_coverage import find_all_requests
+
+try:
+    import ijson
+except ImportError:  # Optional: fall back to the chunked stdlib decoder
+    ijson = None
+
+DEFAULT_COLLECTION = Path('tests/postman/collections/comprehensive.json')
+
+PERCENTILES = (50, 90, 95, 99)
+
+ENV_RE = re.compile(r' - (Dev|Prod)\b')
+BASE_VAR_RE = re.compile(r'^\{\{[^}]*base_?url\}\}', re.IGNORECASE)
+EXECUTIONS_RE = re.compile(r'(?<!\\)"executions"\s*:\s*\[')
+
+CHUNK_SIZE = 1 << 20
+
+
+# ============================================================
+# Streaming
+# ============================================================
+
+def _iter_executions_stdlib(f) -> Iterator[dict]:
+    """Yield run.executions elements by raw-decoding them from a rolling buffer."""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = None
+    while pos is None:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        # Keep a tail so a key split across chunks is still found
+        buf = buf[-64:] + chunk
+        match = EXECUTIONS_RE.search(buf)
+        if match:
+            pos = match.end()
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf):
+                break
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            buf, pos = buf[pos:] + chunk, 0
+        if buf[pos] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield value
+        pos = end
+        # Trim consumed text only occasionally; slicing per value copies the buffer
+        if pos > CHUNK_SIZE:
+            buf, pos = buf[pos:], 0
+
+
+def iter_executions(path: Path) -> Iterator[dict]:
+    """Stream the executions of a Newman JSON report."""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'run.executions.item', use_float=True)
+        return
+    with open(path, encoding='utf-8') as f:
+        yield from _iter_executions_stdlib(f)
+
+
+# ============================================================
+# Collection index
+# ============================================================
+
+def url_path(url) -> str:
+    """Normalize a Postman or Newman URL to a path template without base URL."""
+    if isinstance(url, str):
+        raw = url
+    elif isinstance(url, dict):
+        if url.get('raw'):
+            raw = url['raw']
+        else:
+            raw = '/' + '/'.join(str(p) for p in url.get('path', []))
+    else:
+        return ''
+    raw = BASE_VAR_RE.sub('', raw.split('?', 1)[0])
+    raw = re.sub(r'^https?://[^/]+', '', raw)
+    return raw if raw.startswith('/') else '/' + raw
+
+
+class RequestIndex:
+    """Collection requests indexed by name, disambiguated by URL path."""
+
+    def __init__(self, collection: dict):
+        self.by_name: Dict[str, List[dict]] = {}
+        for req in find_all_requests(collection.get('item', [])):
+            request = req['item'].get('request', {})
+            req['method'] = request.get('method', 'GET') if isinstance(request, dict) else 'GET'
+            req['url_path'] = url_path(request.get('url') if isinstance(request, dict) else request)
+            req['url_re'] = re.compile(
+                '^' + re.sub(r'\\\{\\\{[^}]*\\\}\\\}', '[^/]+', re.escape(req['url_path'])) + '$')
+            self.by_name.setdefault(req['name'], []).append(req)
+
+    def lookup(self, name: str, path: str) -> Optional[dict]:
+        candidates = self.by_name.get(name, [])
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        for req in candidates:
+            if req['url_re'].match(path):
+                return req
+        return candidates[0]
+
+
+def endpoint_key(method: str, path: str) -> str:
+    return f"{method} {path}"
+
+
+# ============================================================
+# Statistics
+# ============================================================
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    values = sorted(values)
+    summary = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    summary.update({
+        'count': len(values),
+        'min': values[0] if values else 0,
+        'max': values[-1] if values else 0,
+        'mean': round(sum(values) / len(values), 1) if values else 0,
+    })
+    return summary
+
+
+def collect(report_paths: List[Path], index: RequestIndex) -> dict:
+    """Aggregate response times and sizes per endpoint and per request name."""
+    endpoints: Dict[str, dict] = {}
+    by_name: Dict[str, List[float]] = {}
+    unmatched = 0
+    errors = 0
+
+    for report in report_paths:
+        for execution in iter_executions(report):
+            item = execution.get('item', {})
+            response = execution.get('response') or {}
+            name = item.get('name', '')
+            exec_path = url_path((execution.get('request') or {}).get('url'))
+
+            req = index.lookup(name, exec_path)
+            if req is None:
+                unmatched += 1
+                method = (execution.get('request') or {}).get('method', 'GET')
+                key = endpoint_key(method, exec_path)
+            else:
+                key = endpoint_key(req['method'], req['url_path'])
+
+            entry = endpoints.setdefault(key, {'times': [], 'sizes': [], 'codes': {}, 'requests': set()})
+            entry['requests'].add(name)
+            if execution.get('requestError') or not response:
+                errors += 1
+                entry['codes']['error'] = entry['codes'].get('error', 0) + 1
+                continue
+
+            time_ms = response.get('responseTime', 0)
+            entry['times'].append(time_ms)
+            entry['sizes'].append(response.get('responseSize', 0))
+            code = str(response.get('code', 0))
+            entry['codes'][code] = entry['codes'].get(code, 0) + 1
+            by_name.setdefault(name, []).append(time_ms)
+
+    return {'endpoints': endpoints, 'by_name': by_name, 'unmatched': unmatched, 'errors': errors}
+
+
+def endpoint_stats(endpoints: Dict[str, dict]) -> Dict[str, dict]:
+    return {
+        key: {
+            'latency_ms': summarize(entry['times']),
+            'size_bytes': summarize(entry['sizes']),
+            'status_codes': entry['codes'],
+            'requests': sorted(entry['requests']),
+        }
+        for key, entry in endpoints.items()
+    }
+
+
+def dev_prod_pairs(by_name: Dict[str, List[float]]) -> List[dict]:
+    """Compare median latency of ' - Dev' requests with their ' - Prod' twins."""
+    pairs = []
+    for name, times in by_name.items():
+        if not ENV_RE.search(name) or ENV_RE.search(name).group(1) != 'Dev':
+            continue
+        prod_name = ENV_RE.sub(' - Prod', name, count=1)
+        prod_times = by_name.get(prod_name)
+        if not prod_times:
+            continue
+        dev_p50 = percentile(sorted(times), 50)
+        prod_p50 = percentile(sorted(prod_times), 50)
+        pairs.append({
+            'request': ENV_RE.sub('', name, count=1),
+            'dev_p50': dev_p50,
+            'prod_p50': prod_p50,
+            'ratio': round(dev_p50 / prod_p50, 2) if prod_p50 else None,
+        })
+    return sorted(pairs, key=lambda p: -(p['ratio'] or 0))
+
+
+def find_regressions(stats: Dict[str, dict], baseline: Dict[str, dict],
+                     threshold: float, min_delta_ms: float) -> List[dict]:
+    """Endpoints whose p50 or p95 grew past both the ratio and absolute thresholds."""
+    regressions = []
+    for key, current in stats.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ('p50', 'p95'):
+            old = base['latency_ms'].get(metric, 0)
+            new = current['latency_ms'].get(metric, 0)
+            if old and new > old * threshold and new - old >= min_delta_ms:
+                regressions.append({'endpoint': key, 'metric': metric, 'baseline': old,
+                                    'current': new, 'ratio': round(new / old, 2)})
+    return regressions
+
+
+# ============================================================
+# Main
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Find slow API endpoints in Newman JSON reports")
+    parser.add_argument('reports', nargs='+', type=Path, help='Newman JSON reporter output files')
+    parser.add_argument('--collection', type=Path, default=DEFAULT_COLLECTION,
+                        help=f'Collection the runs were made from (default: {DEFAULT_COLLECTION})')
+    parser.add_argument('--top', type=int, default=15, help='Slowest endpoints to show')
+    parser.add_argument('--baseline', type=Path, help='Baseline JSON to check for regressions')
+    parser.add_argument('--save-baseline', type=Path, help='Write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Flag endpoints slower than baseline by this factor (default: 1.25)')
+    parser.add_argument('--min-delta-ms', type=float, default=50,
+                        help='Ignore regressions smaller than this many ms (default: 50)')
+    parser.add_argument('--json-out', type=Path, help='Write the full analysis as JSON')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Newman Run Timing Analysis")
+    print("=" * 70)
+    print()
+
+    with open(args.collection) as f:
+        index = RequestIndex(json.load(f))
+
+    data = collect(args.reports, index)
+    stats = endpoint_stats(data['endpoints'])
+    total = sum(s['latency_ms']['count'] for s in stats.values())
+    print(f"Reports: {len(args.reports)}  Executions: {total}  Endpoints: {len(stats)}")
+    print(f"Unmatched executions: {data['unmatched']}  Request errors: {data['errors']}")
+    print()
+
+    print(f"SLOWEST ENDPOINTS (by p95, top {args.top}):")
+    print(f"  {'p50':>7} {'p95':>7} {'p99':>7} {'size p50':>10} {'n':>4}  endpoint")
+    ranked = sorted(stats.items(), key=lambda kv: -kv[1]['latency_ms']['p95'])
+    for key, s in ranked[:args.top]:
+        lat = s['latency_ms']
+        print(f"  {lat['p50']:>6}ms {lat['p95']:>6}ms {lat['p99']:>6}ms "
+              f"{s['size_bytes']['p50']:>9}B {lat['count']:>4}  {key}")
+    print()
+
+    pairs = dev_prod_pairs(data['by_name'])
+    if pairs:
+        print("DEV vs PROD (median latency):")
+        for p in pairs[:args.top]:
+            ratio = f"{p['ratio']}x" if p['ratio'] is not None else 'n/a'
+            print(f"  {p['dev_p50']:>6}ms vs {p['prod_p50']:>6}ms ({ratio:>6})  {p['request']}")
+        print()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['endpoints']
+        regressions = find_regressions(stats, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"✗ {len(regressions)} REGRESSIONS vs {args.baseline}:")
+            for r in regressions:
+                print(f"  {r['endpoint']} {r['metric']}: {r['baseline']}ms -> "
+                      f"{r['current']}ms ({r['ratio']}x)")
+        else:
+            print(f"✓ No regressions vs {args.baseline}")
+        print()
+
+    result = {'endpoints': stats, 'dev_vs_prod': pairs, 'regressions': regressions}
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Analysis written to {args.json_out}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'endpoints': stats}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
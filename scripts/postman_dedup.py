@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Find identical HTTP requests across the Postman collections.
+
+Every request in tests/postman/collections/ is reduced to a canonical key:
+
+    method, resolved URL (scheme, host, path), sorted enabled query
+    parameters, a hash of its enabled headers and a hash of its body
+
+{{variables}} are resolved from the collection's own variables, overridden
+by the --environment file, as Newman does. The base URL is part of the
+key, so a '- Dev' request and its '- Prod' twin never match. Headers are
+keyed too, so version-negotiation requests that differ only in
+X-API-Version stay separate. Body hashes use key-sorted JSON when the body
+parses.
+
+Requests with the same key form a group. A group can be merged only if
+none of its copies depend on run-time state: no pre-request script, no
+{{$dynamic}} variables, no {{variable}} that a test script sets during the
+run, and no test script that sets a variable other requests in its
+collection read. Collection-level and folder scripts count as part of
+every request under them, since Newman runs them around each one. A copy
+whose test script reads a variable the kept collection never defines
+blocks the merge too. Groups that fail these checks are reported but left
+alone.
+
+For each mergeable group the plan keeps the first copy, in --collections
+order, and drops the rest. The kept request's test script gains every
+other copy's script, each in its own { } block. Tests already present
+with an identical body are removed from those blocks, and tests with a
+clashing name are renamed after their collection. So every original
+assertion still runs once.
+
+Time saved is estimated from Newman JSON reports (--reports), using each
+endpoint's median response time, times the number of dropped copies.
+Endpoints without timings use --default-ms.
+
+Usage:
+    python3 scripts/postman_dedup.py
+    python3 scripts/postman_dedup.py --reports reports/newman/*.json --plan-out dedup-plan.json
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from newman_timing_analyzer import endpoint_key, iter_executions, url_path
+from postman_patch_engine import parse_script, render_script
+from validate_test_coverage import find_all_requests
+
+COLLECTIONS_DIR = Path('tests/postman/collections')
+DEFAULT_ENVIRONMENT = Path('tests/postman/environments/comprehensive.json')
+
+VAR_RE = re.compile(r'\{\{([^{}]+)\}\}')
+SETTER_RE = re.compile(
+    r'''pm\.(?:environment|collectionVariables|globals|variables)\.set\(\s*['"`]([^'"`]+)''')
+GETTER_RE = re.compile(
+    r'''pm\.(?:environment|collectionVariables|globals|variables)\.get\(\s*['"`]([^'"`]+)''')
+
+
+class Occurrence(NamedTuple):
+    """One copy of a request: where it lives and what it needs."""
+    collection: str
+    path: str
+    name: str
+    item: dict
+    stateful: Tuple[str, ...]
+    reads: Tuple[str, ...]
+    defined: frozenset
+
+
+# ============================================================
+# Canonical requests
+# ============================================================
+
+def load_variables(collection: dict, environment: Optional[dict]) -> Dict[str, str]:
+    variables = {v['key']: str(v.get('value', '')) for v in collection.get('variable', [])
+                 if 'key' in v}
+    if environment:
+        variables.update({v['key']: str(v.get('value', '')) for v in environment.get('values', [])
+                          if 'key' in v and v.get('enabled', True)})
+    return variables
+
+
+def resolve(text: str, variables: Dict[str, str]) -> str:
+    """Substitute {{variables}}; unknown and {{$dynamic}} ones stay as written."""
+    for _ in range(5):  # variables may refer to variables
+        new = VAR_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), text)
+        if new == text:
+            break
+        text = new
+    return text
+
+
+def _enabled(entries) -> List[Tuple[str, str]]:
+    return [(e.get('key', ''), str(e.get('value', ''))) for e in entries or []
+            if isinstance(e, dict) and not e.get('disabled')]
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def body_digest(body: Optional[dict], variables: Dict[str, str]) -> str:
+    if not body:
+        return ''
+    mode = body.get('mode', 'raw')
+    if mode == 'raw':
+        raw = resolve(body.get('raw', ''), variables)
+        try:
+            return _digest(['json', json.loads(raw)])
+        except ValueError:
+            return _digest(['raw', raw]) if raw else ''
+    if mode in ('urlencoded', 'formdata'):
+        return _digest([mode, sorted((k, resolve(v, variables))
+                                     for k, v in _enabled(body.get(mode)))])
+    return _digest([mode, body.get(mode)])
+
+
+def request_key(request, variables: Dict[str, str]) -> tuple:
+    """(method, scheme://host/path, query, header digest, body digest)."""
+    if isinstance(request, str):
+        request = {'url': request}
+    url = request.get('url', '')
+    raw = url if isinstance(url, str) else url.get('raw', '')
+    parts = urlsplit(resolve(raw, variables))
+    if isinstance(url, dict) and 'query' in url:
+        query = [(k, resolve(v, variables)) for k, v in _enabled(url['query'])]
+    else:
+        query = parse_qsl(parts.query, keep_blank_values=True)
+    headers = sorted((k.lower(), resolve(v, variables)) for k, v in _enabled(request.get('header')))
+    return (
+        request.get('method', 'GET').upper(),
+        f"{parts.scheme}://{parts.netloc}{parts.path}" if parts.netloc else parts.path,
+        tuple(sorted(query)),
+        _digest(headers) if headers else '',
+        body_digest(request.get('body'), variables),
+    )
+
+
+# ============================================================
+# State checks
+# ============================================================
+
+def _scripts(item: dict, listen: str) -> List[str]:
+    lines = []
+    for event in item.get('event', []):
+        if event.get('listen') == listen:
+            exec_lines = event.get('script', {}).get('exec', [])
+            lines.extend([exec_lines] if isinstance(exec_lines, str) else exec_lines)
+    return lines
+
+
+def ancestor_scripts(collection: dict) -> Dict[str, Dict[str, List[str]]]:
+    """Request path -> {listen: lines} of the collection and folder scripts around it."""
+    inherited: Dict[str, Dict[str, List[str]]] = {}
+
+    def walk(items: list, path: str, scripts: Dict[str, List[str]]):
+        for item in items:
+            current = f"{path}/{item['name']}" if path else item['name']
+            if 'request' in item:
+                inherited[current] = scripts
+            elif 'item' in item:
+                walk(item['item'], current,
+                     {listen: lines + _scripts(item, listen) for listen, lines in scripts.items()})
+
+    walk(collection.get('item', []), '',
+         {listen: _scripts(collection, listen) for listen in ('prerequest', 'test')})
+    return inherited
+
+
+def _request_scripts(req: dict, listen: str,
+                     inherited: Optional[Dict[str, Dict[str, List[str]]]]) -> List[str]:
+    outer = (inherited or {}).get(req['path'], {}).get(listen, [])
+    return outer + _scripts(req['item'], listen)
+
+
+def runtime_variables(requests: Sequence[dict],
+                      inherited: Optional[Dict[str, Dict[str, List[str]]]] = None
+                      ) -> Dict[str, set]:
+    """Variable name -> paths of requests whose scripts set it.
+
+    inherited (from ancestor_scripts) adds the collection and folder scripts.
+    """
+    setters: Dict[str, set] = {}
+    for req in requests:
+        for name in SETTER_RE.findall('\n'.join(_request_scripts(req, 'test', inherited)
+                                                 + _request_scripts(req, 'prerequest', inherited))):
+            setters.setdefault(name, set()).add(req['path'])
+    return setters
+
+
+def state_reasons(req: dict, setters: Dict[str, set], readers: Dict[str, set],
+                  inherited: Optional[Dict[str, Dict[str, List[str]]]] = None
+                  ) -> Tuple[str, ...]:
+    """Why this copy cannot be dropped or stand in for another; empty if it can."""
+    item = req['item']
+    reasons = []
+    if any(line.strip() for line in _request_scripts(req, 'prerequest', inherited)):
+        reasons.append('pre-request script')
+    request_text = json.dumps(item.get('request', {}))
+    used = set(VAR_RE.findall(request_text))
+    if any(name.startswith('$') for name in used):
+        reasons.append('dynamic variable')
+    runtime = sorted(n for n in used if n in setters)
+    if runtime:
+        reasons.append(f"uses run-time variable {', '.join(runtime)}")
+    for name in SETTER_RE.findall('\n'.join(_request_scripts(req, 'test', inherited))):
+        if readers.get(name, set()) - {req['path']}:
+            reasons.append(f"sets {name} for later requests")
+            break
+    return tuple(reasons)
+
+
+def variable_readers(requests: Sequence[dict],
+                     inherited: Optional[Dict[str, Dict[str, List[str]]]] = None
+                     ) -> Dict[str, set]:
+    """Variable name -> paths of requests that read it, in the request or a script."""
+    readers: Dict[str, set] = {}
+    for req in requests:
+        text = json.dumps(req['item'].get('request', {}))
+        scripts = '\n'.join(_request_scripts(req, 'test', inherited)
+                            + _request_scripts(req, 'prerequest', inherited))
+        for name in set(VAR_RE.findall(text)) | set(GETTER_RE.findall(scripts)):
+            readers.setdefault(name, set()).add(req['path'])
+    return readers
+
+
+def load_occurrences(paths: Sequence[Path], environment: Optional[dict]) -> Dict[tuple, list]:
+    """Canonical key -> [Occurrence] across all collections, in file and item order."""
+    groups: Dict[tuple, list] = {}
+    for path in paths:
+        with open(path) as f:
+            collection = json.load(f)
+        variables = load_variables(collection, environment)
+        requests = find_all_requests(collection.get('item', []))
+        inherited = ancestor_scripts(collection)
+        setters = runtime_variables(requests, inherited)
+        readers = variable_readers(requests, inherited)
+        defined = frozenset(variables) | frozenset(setters)
+        for req in requests:
+            key = request_key(req['item'].get('request', {}), variables)
+            groups.setdefault(key, []).append(Occurrence(
+                path.name, req['path'], req['name'], req['item'],
+                state_reasons(req, setters, readers, inherited),
+                tuple(sorted(set(GETTER_RE.findall('\n'.join(_scripts(req['item'], 'test')))))),
+                defined))
+    return groups
+
+
+# ============================================================
+# Merging
+# ============================================================
+
+def _rename_test(lines: List[str], old: str, new: str) -> List[str]:
+    out = list(lines)
+    for i, line in enumerate(out):
+        if 'pm.test(' in line and old in line:
+            out[i] = line.replace(old, new, 1)
+            break
+    return out
+
+
+def merge_tests(keep: Occurrence, others: Sequence[Occurrence]) -> Tuple[List[str], List[dict]]:
+    """The kept request's test script extended with every other copy's tests.
+
+    Returns (exec lines, [{"test", "from", "action"}]) where action is
+    "merged", "renamed" or "duplicate" (identical test already present).
+    """
+    merged = list(_scripts(keep.item, 'test'))
+    bodies = {s.name: s.lines for s in parse_script(merged) if s.name}
+    log = []
+    for other in others:
+        segments = []
+        for segment in parse_script(_scripts(other.item, 'test')):
+            if segment.name is None:
+                segments.append(segment)
+                continue
+            existing = bodies.get(segment.name)
+            if existing is not None and [l.strip() for l in existing] == \
+                    [l.strip() for l in segment.lines]:
+                log.append({'test': segment.name, 'from': other.collection, 'action': 'duplicate'})
+                continue
+            name, action = segment.name, 'merged'
+            if existing is not None:
+                name, action = f"{segment.name} [{Path(other.collection).stem}]", 'renamed'
+                segment = segment._replace(lines=_rename_test(segment.lines, segment.name, name))
+            bodies[name] = segment.lines
+            segments.append(segment)
+            log.append({'test': name, 'from': other.collection, 'action': action})
+        if not any(s.name for s in segments):
+            continue
+        # A block scope keeps the other script's const/let apart from this one's
+        merged += ['', f"// Merged from {other.collection}: {other.path}", '{']
+        merged += ['    ' + line if line.strip() else line for line in render_script(segments)]
+        merged.append('}')
+    return merged, log
+
+
+# ============================================================
+# Timing
+# ============================================================
+
+def load_timings(reports: Sequence[Path]) -> Dict[str, float]:
+    """Median response time per "METHOD /path" from Newman JSON reports."""
+    times: Dict[str, List[float]] = {}
+    for report in reports:
+        for execution in iter_executions(report):
+            request = execution.get('request') or {}
+            response = execution.get('response') or {}
+            if 'responseTime' not in response:
+                continue
+            key = endpoint_key(request.get('method', 'GET'), url_path(request.get('url')))
+            times.setdefault(key, []).append(response['responseTime'])
+    return {k: statistics.median(v) for k, v in times.items()}
+
+
+def timing_for(key: tuple, timings: Dict[str, float]) -> Optional[float]:
+    method, url = key[0], key[1]
+    return timings.get(endpoint_key(method, urlsplit(url).path or url))
+
+
+# ============================================================
+# Plan
+# ============================================================
+
+def build_plan(groups: Dict[tuple, list], timings: Dict[str, float], default_ms: float) -> dict:
+    duplicates = []
+    for key, occurrences in groups.items():
+        if len(occurrences) < 2:
+            continue
+        ms = timing_for(key, timings)
+        entry = {
+            'method': key[0], 'url': key[1], 'query': [list(q) for q in key[2]],
+            'headers': key[3], 'body': key[4],
+            'copies': [{'collection': o.collection, 'path': o.path} for o in occurrences],
+            'median_ms': ms,
+            'timed': ms is not None,
+        }
+        blocked = {f"{o.collection}: {o.path}": list(o.stateful)
+                   for o in occurrences if o.stateful}
+        # The merged tests run in the kept collection, so what they read must exist there
+        keep = occurrences[0]
+        for o in occurrences[1:]:
+            missing = [name for name in o.reads if name not in keep.defined]
+            if missing:
+                blocked.setdefault(f"{o.collection}: {o.path}", []).append(
+                    f"reads {', '.join(missing)}, not defined in {keep.collection}")
+        if blocked:
+            entry.update(mergeable=False, blocked=blocked, saved_ms=0)
+        else:
+            keep, others = occurrences[0], occurrences[1:]
+            exec_lines, tests = merge_tests(keep, others)
+            entry.update(
+                mergeable=True,
+                keep={'collection': keep.collection, 'path': keep.path},
+                drop=[{'collection': o.collection, 'path': o.path} for o in others],
+                tests=tests,
+                exec=exec_lines,
+                saved_ms=(ms if ms is not None else default_ms) * len(others),
+            )
+        duplicates.append(entry)
+    duplicates.sort(key=lambda d: (-d['saved_ms'], d['url']))
+    total = sum(len(o) for o in groups.values())
+    mergeable = [d for d in duplicates if d['mergeable']]
+    return {
+        'summary': {
+            'requests': total,
+            'unique': len(groups),
+            'duplicate_groups': len(duplicates),
+            'mergeable_groups': len(mergeable),
+            'dropped_requests': sum(len(d['drop']) for d in mergeable),
+            'saved_ms': sum(d['saved_ms'] for d in mergeable),
+            'untimed_groups': sum(not d['timed'] for d in mergeable),
+        },
+        'groups': duplicates,
+    }
+
+
+def print_plan(plan: dict, top: int):
+    s = plan['summary']
+    print(f"Requests: {s['requests']}  Unique: {s['unique']}  "
+          f"Duplicate groups: {s['duplicate_groups']} ({s['mergeable_groups']} mergeable)")
+    print()
+    print(f"LARGEST SAVINGS (top {top}):")
+    print(f"  {'saved':>8} {'copies':>6}  request")
+    for d in plan['groups'][:top]:
+        mark = '✓' if d['mergeable'] else '✗'
+        unit = 'ms' if d['timed'] else '*'
+        query = '?' + '&'.join(f'{k}={v}' for k, v in d['query']) if d['query'] else ''
+        extra = ''.join(f" [{part} {d[part][:8]}]" for part in ('headers', 'body') if d[part])
+        print(f"  {d['saved_ms']:>7.0f}{unit:<2}{len(d['copies']):>6}  {mark} {d['method']} "
+              f"{d['url']}{query}{extra}")
+        for copy in d['copies']:
+            print(f"  {'':>15}    {copy['collection']}: {copy['path']}")
+        for where, reasons in d.get('blocked', {}).items():
+            print(f"  {'':>15}    ⚠ {where}: {'; '.join(reasons)}")
+    print()
+    if s['untimed_groups']:
+        print(f"* {s['untimed_groups']} mergeable groups have no timings; --default-ms assumed")
+    print(f"Dropping {s['dropped_requests']} requests saves ~{s['saved_ms'] / 1000:.1f}s per run")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find duplicate requests across Postman collections")
+    parser.add_argument('collections', nargs='*', type=Path,
+                        help=f'Collections in priority order (default: all in {COLLECTIONS_DIR})')
+    parser.add_argument('--environment', type=Path, default=DEFAULT_ENVIRONMENT,
+                        help=f'Postman environment for resolving variables '
+                             f'(default: {DEFAULT_ENVIRONMENT})')
+    parser.add_argument('--reports', nargs='*', type=Path, default=[],
+                        help='Newman JSON reports with historical timings')
+    parser.add_argument('--default-ms', type=float, default=250,
+                        help='Assumed time for requests without timings (default: 250)')
+    parser.add_argument('--top', type=int, default=20, help='Groups to show')
+    parser.add_argument('--plan-out', type=Path, help='Write the dedup plan as JSON')
+    args = parser.parse_args()
+
+    paths = args.collections or sorted(COLLECTIONS_DIR.glob('*.json'))
+    environment = None
+    if args.environment and args.environment.exists():
+        with open(args.environment) as f:
+            environment = json.load(f)
+    else:
+        print(f"⚠ Environment {args.environment} not found; "
+              f"variables resolve from collections only")
+
+    print("=" * 70)
+    print("Cross-collection Duplicate Requests")
+    print("=" * 70)
+    print()
+
+    groups = load_occurrences(paths, environment)
+    timings = load_timings(args.reports)
+    plan = build_plan(groups, timings, args.default_ms)
+    print_plan(plan, args.top)
+
+    if args.plan_out:
+        with open(args.plan_out, 'w') as f:
+            json.dump(plan, f, indent=2)
+            f.write('\n')
+        print(f"Plan written to {args.plan_out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
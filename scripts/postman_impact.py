@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Select the Postman requests a change can affect.
+
+Every route file under routes/ is turned into a URL path template by the
+Fresh conventions:
+
+    routes/api/v2/stamps/index.ts        /api/v2/stamps
+    routes/api/v2/stamps/[id].ts         /api/v2/stamps/:id
+    routes/api/v2/[...path].ts           /api/v2/*  (catch-all)
+
+Each request in the collection (from find_all_requests, with variables
+resolved as Newman would) is matched to the route Fresh would serve it
+from: static segments beat [params], and [params] beat [...rest]. An
+_middleware, _app or other underscore file covers every request under
+its directory.
+
+Changed files are mapped through a static import graph of the app
+(routes/, server/, lib/, components/, islands/, client/, utils/,
+workers/, config/), resolving the deno.json import map. A change
+selects the requests served by every route that imports it, directly or
+transitively. Requests that read a variable another request's script
+sets pull the setter in too, so the subset runs on its own.
+
+The full suite is forced when:
+
+  * a file in FULL_SUITE_PATTERNS changes (entry points, deno.json, the
+    collections, seed data, the Newman CI setup);
+  * a changed module is shared, i.e. it reaches at least
+    --shared-threshold of the requests;
+  * a code file under the app directories was deleted, other than a
+    route, since the graph no longer says who imported it.
+
+A deleted route file selects the requests its template matched, or for
+an underscore file every request under its directory. Files outside the
+graph (docs, static assets, other scripts) select nothing. Requests no
+route matches always run.
+
+The file -> requests mapping is cached in .cache/test-impact/ and
+rebuilt when any app source, deno.json, the collection or the
+environment changes.
+
+Usage:
+    git diff --name-only origin/main... | python3 scripts/postman_impact.py
+    python3 scripts/postman_impact.py --base origin/main
+    python3 scripts/postman_impact.py routes/api/v2/stamps/[id].ts --out subset.json
+    NEWMAN_COLLECTION=.cache/test-impact/comprehensive.impact.json \\
+        scripts/run-newman-comprehensive.sh
+"""
+
+import argparse
+import copy
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from newman_timing_analyzer import url_path
+from postman_dedup import (DEFAULT_ENVIRONMENT, load_variables, resolve, runtime_variables,
+                           variable_readers)
+from validate_test_coverage import find_all_requests
+
+DEFAULT_COLLECTION = Path('tests/postman/collections/comprehensive.json')
+CACHE_DIR = Path('.cache/test-impact')
+MAP_VERSION = 1
+
+ROUTES_DIR = 'routes'
+APP_DIRS = ('routes', 'server', 'lib', 'components', 'islands', 'client', 'utils', 'workers',
+            'config')
+CODE_SUFFIXES = ('.ts', '.tsx', '.js', '.jsx', '.mjs')
+IMPORT_MAP = Path('deno.json')
+
+# fnmatch patterns ('*' crosses directories) that always run everything
+FULL_SUITE_PATTERNS = (
+    'deno.json', 'deno.lock', 'main.ts', 'dev.ts', 'fresh.config.ts', 'fresh.gen.ts',
+    'tests/postman/*',
+    'scripts/test-seed-data.sql', 'scripts/test-schema.sql', 'scripts/run-newman*',
+    'scripts/postman_impact.py',
+    '.github/workflows/newman-*', '.github/newman-ci-config.json',
+    'Dockerfile*', 'docker-compose*',
+)
+
+IMPORT_RE = re.compile(r'''(?:\bfrom|\bimport)\s*\(?\s*["']([^"']+)["']''')
+SEGMENT_RE = re.compile(r'^\[(\.\.\.)?[^\]]+\]$')
+
+
+# ============================================================
+# Route templates
+# ============================================================
+
+def route_segments(route: str) -> Tuple[str, ...]:
+    """URL segments of a route file; index files map to their directory."""
+    parts = Path(route).with_suffix('').parts[1:]
+    if parts and parts[-1] == 'index':
+        parts = parts[:-1]
+    return tuple(parts)
+
+
+def is_scope_file(route: str) -> bool:
+    """_middleware, _app, _404 and the like apply to their whole directory."""
+    return Path(route).name.startswith('_')
+
+
+def template(segments: Sequence[str]) -> str:
+    out = []
+    for seg in segments:
+        match = SEGMENT_RE.match(seg)
+        if not match:
+            out.append(seg)
+        elif match.group(1):
+            out.append('*')
+        else:
+            out.append(':' + seg[1:-1])
+    return '/' + '/'.join(out)
+
+
+def match_rank(segments: Sequence[str], path: str) -> Optional[Tuple[int, ...]]:
+    """Fresh priority of a route for a path (lower wins), or None if it does not match.
+
+    Each segment ranks 0 when static, 1 for [param] and 2 for [...rest].
+    """
+    parts = [p for p in path.split('/') if p]
+    rank = []
+    for i, seg in enumerate(segments):
+        match = SEGMENT_RE.match(seg)
+        if match and match.group(1):
+            return tuple(rank + [2])
+        if i >= len(parts):
+            return None
+        if match:
+            rank.append(1)
+        elif seg == parts[i]:
+            rank.append(0)
+        else:
+            return None
+    return tuple(rank) if len(parts) == len(segments) else None
+
+
+def best_route(routes: Dict[str, Tuple[str, ...]], path: str) -> Optional[str]:
+    ranked = []
+    for route, segments in routes.items():
+        rank = match_rank(segments, path)
+        if rank is not None:
+            ranked.append((rank, route))
+    return min(ranked)[1] if ranked else None
+
+
+# ============================================================
+# Import graph
+# ============================================================
+
+def source_files(root: Path) -> List[str]:
+    files = []
+    for top in APP_DIRS:
+        for path in (root / top).rglob('*'):
+            if path.suffix in CODE_SUFFIXES and path.is_file():
+                files.append(path.relative_to(root).as_posix())
+    return sorted(files)
+
+
+def load_import_map(root: Path) -> Dict[str, str]:
+    path = root / IMPORT_MAP
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f).get('imports', {})
+
+
+def resolve_import(spec: str, importer: str, import_map: Dict[str, str]) -> Optional[str]:
+    """Repo-relative path an import specifier points at, or None if external."""
+    if spec in import_map:
+        target = import_map[spec]
+    else:
+        prefixes = [k for k in import_map if k.endswith('/') and spec.startswith(k)]
+        if prefixes:
+            prefix = max(prefixes, key=len)
+            target = import_map[prefix] + spec[len(prefix):]
+        elif spec.startswith(('./', '../')):
+            target = os.path.join(os.path.dirname(importer), spec)
+        else:
+            return None
+    if '://' in target or re.match(r'^[a-z]+:', target):
+        return None  # npm:, jsr:, node:, https:
+    return os.path.normpath(target).replace(os.sep, '/')
+
+
+def build_dependents(root: Path, files: Sequence[str],
+                     import_map: Dict[str, str]) -> Dict[str, Set[str]]:
+    """Imported file -> files that import it, within `files`."""
+    known = set(files)
+    dependents: Dict[str, Set[str]] = {}
+    for name in files:
+        text = (root / name).read_text(encoding='utf-8', errors='replace')
+        for spec in IMPORT_RE.findall(text):
+            target = resolve_import(spec, name, import_map)
+            if target in known and target != name:
+                dependents.setdefault(target, set()).add(name)
+    return dependents
+
+
+def reached_routes(name: str, dependents: Dict[str, Set[str]]) -> Set[str]:
+    """Route files that are, or transitively import, `name`."""
+    seen = {name}
+    stack = [name]
+    while stack:
+        for importer in dependents.get(stack.pop(), ()):
+            if importer not in seen:
+                seen.add(importer)
+                stack.append(importer)
+    return {f for f in seen if f.startswith(ROUTES_DIR + '/')}
+
+
+# ============================================================
+# Mapping
+# ============================================================
+
+def load_collection(path: Path, environment: Optional[Path]) -> Tuple[dict, List[dict], List[str]]:
+    """(collection, requests, resolved request paths) in find_all_requests order."""
+    with open(path) as f:
+        collection = json.load(f)
+    env = None
+    if environment and environment.exists():
+        with open(environment) as f:
+            env = json.load(f)
+    variables = load_variables(collection, env)
+    requests = find_all_requests(collection.get('item', []))
+    paths = []
+    for req in requests:
+        request = req['item'].get('request', {})
+        url = request.get('url', '') if isinstance(request, dict) else request
+        paths.append(url_path(resolve(url.get('raw', '') if isinstance(url, dict) else url,
+                                      variables)))
+    return collection, requests, paths
+
+
+def build_map(root: Path, files: Sequence[str], paths: Sequence[str]) -> dict:
+    """Source file -> indexes of the requests it can affect, plus route templates."""
+    routes = {f: route_segments(f) for f in files if f.startswith(ROUTES_DIR + '/')}
+    endpoints = {f: s for f, s in routes.items() if not is_scope_file(f)}
+
+    served_by: Dict[str, List[int]] = {}
+    unmapped = []
+    for i, path in enumerate(paths):
+        route = best_route(endpoints, path)
+        if route is None:
+            unmapped.append(i)
+        else:
+            served_by.setdefault(route, []).append(i)
+
+    def covered(route: str) -> Set[int]:
+        if not is_scope_file(route):
+            return set(served_by.get(route, ()))
+        scope = routes[route][:-1]
+        return {i for r, idx in served_by.items() if routes[r][:len(scope)] == scope
+                for i in idx}
+
+    dependents = build_dependents(root, files, load_import_map(root))
+    affects = {}
+    for name in files:
+        hit = set()
+        for route in reached_routes(name, dependents):
+            hit |= covered(route)
+        if hit:
+            affects[name] = sorted(hit)
+    return {
+        'templates': {f: template(s) for f, s in sorted(endpoints.items())},
+        'affects': affects,
+        'unmapped': unmapped,
+        'requests': len(paths),
+    }
+
+
+def _fingerprint(root: Path, files: Sequence[str], extra: Sequence[Path]) -> str:
+    h = hashlib.sha256()
+    for name in list(files) + [str(p) for p in extra]:
+        path = root / name
+        if path.exists():
+            st = path.stat()
+            h.update(f"{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_map(root: Path, collection: Path, environment: Optional[Path], paths: Sequence[str],
+             cache_dir: Path, rebuild: bool) -> Tuple[dict, bool]:
+    """Return (mapping, from_cache); rebuild and persist when inputs changed."""
+    files = source_files(root)
+    fingerprint = _fingerprint(root, files, [IMPORT_MAP, collection]
+                               + ([environment] if environment else []))
+    cache = cache_dir / f"{collection.stem}.map.json"
+    if cache.exists() and not rebuild:
+        with open(cache) as f:
+            cached = json.load(f)
+        if cached.get('version') == MAP_VERSION and cached.get('inputs') == fingerprint:
+            return cached, True
+
+    mapping = build_map(root, files, paths)
+    mapping.update(version=MAP_VERSION, inputs=fingerprint)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache, 'w') as f:
+        json.dump(mapping, f)
+    return mapping, False
+
+
+# ============================================================
+# Selection
+# ============================================================
+
+def changed_files(args) -> List[str]:
+    if args.files:
+        return args.files
+    if args.base:
+        out = subprocess.run(['git', 'diff', '--name-only', f"{args.base}...HEAD"],
+                             capture_output=True, text=True, check=True).stdout
+        return out.split()
+    return sys.stdin.read().split()
+
+
+def deleted_hits(name: str, paths: Sequence[str]) -> Optional[List[int]]:
+    """Requests a deleted route served, or None for a deleted non-route source."""
+    if not name.startswith(ROUTES_DIR + '/'):
+        return None
+    segments = route_segments(name)
+    if is_scope_file(name):
+        segments = segments[:-1] + ('[...rest]',)
+    return [i for i, path in enumerate(paths) if match_rank(segments, path) is not None]
+
+
+def select(changed: Sequence[str], mapping: dict, shared_threshold: float,
+           paths: Sequence[str], root: Path = Path('.')) -> dict:
+    """Request indexes to run and why, per changed file."""
+    total = mapping['requests']
+    selected: Set[int] = set()
+    reasons: Dict[str, str] = {}
+    full = []
+    for name in changed:
+        name = name[2:] if name.startswith('./') else name
+        if any(fnmatch.fnmatch(name, p) for p in FULL_SUITE_PATTERNS):
+            full.append(name)
+            reasons[name] = 'full suite (always)'
+            continue
+        hit = mapping['affects'].get(name, [])
+        if not hit and name.split('/')[0] in APP_DIRS and name.endswith(CODE_SUFFIXES) \
+                and not (root / name).exists():
+            hit = deleted_hits(name, paths)
+            if hit is None:
+                full.append(name)
+                reasons[name] = 'full suite (deleted source, importers unknown)'
+                continue
+        if hit and len(hit) >= shared_threshold * total:
+            full.append(name)
+            reasons[name] = f"full suite (shared: {len(hit)}/{total} requests)"
+            continue
+        selected.update(hit)
+        reasons[name] = f"{len(hit)} requests" if hit else 'no requests'
+    if full:
+        selected = set(range(total))
+    elif selected:
+        selected.update(mapping['unmapped'])
+    return {'selected': selected, 'reasons': reasons, 'full': full}
+
+
+def add_setters(selected: Set[int], requests: Sequence[dict]) -> Set[int]:
+    """Also select requests whose scripts set variables the selection reads."""
+    index = {req['path']: i for i, req in enumerate(requests)}
+    setters = runtime_variables(requests)
+    readers = variable_readers(requests)
+    reads: Dict[int, Set[str]] = {}
+    for name, paths in readers.items():
+        if name in setters:
+            for path in paths:
+                reads.setdefault(index[path], set()).add(name)
+    selected = set(selected)
+    stack = list(selected)
+    while stack:
+        for name in reads.get(stack.pop(), ()):
+            for path in setters[name]:
+                if index[path] not in selected:
+                    selected.add(index[path])
+                    stack.append(index[path])
+    return selected
+
+
+def subset_collection(collection: dict, requests: Sequence[dict], selected: Set[int]) -> dict:
+    """The collection with only the selected requests, folders and scripts kept."""
+    keep = {id(requests[i]['item']) for i in selected}
+
+    def prune(items: list) -> list:
+        out = []
+        for item in items:
+            if 'request' in item:
+                if id(item) in keep:
+                    out.append(item)
+            elif 'item' in item:
+                children = prune(item['item'])
+                if children:
+                    out.append({**item, 'item': children})
+        return out
+
+    subset = {k: v for k, v in collection.items() if k != 'item'}
+    subset['info'] = copy.deepcopy(collection.get('info', {}))
+    subset['info']['name'] = f"{subset['info'].get('name', 'collection')} (impact subset)"
+    subset['item'] = prune(collection.get('item', []))
+    return subset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Select the Postman requests a change affects")
+    parser.add_argument('files', nargs='*',
+                        help='Changed files (default: --base diff, else one per line on stdin)')
+    parser.add_argument('--base', help='Diff against this ref (git diff --name-only BASE...HEAD)')
+    parser.add_argument('--collection', type=Path, default=DEFAULT_COLLECTION)
+    parser.add_argument('--environment', type=Path, default=DEFAULT_ENVIRONMENT)
+    parser.add_argument('--out', type=Path,
+                        help=f'Sub-collection to write (default: {CACHE_DIR}/<name>.impact.json)')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the cached mapping')
+    parser.add_argument('--shared-threshold', type=float, default=0.5,
+                        help='Run everything when one file reaches this share of requests '
+                             '(default: 0.5)')
+    parser.add_argument('--verbose', action='store_true', help='List the selected requests')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Postman Change-Impact Selection")
+    print("=" * 70)
+    print()
+
+    start = time.perf_counter()
+    root = Path('.')
+    collection, requests, paths = load_collection(args.collection, args.environment)
+    mapping, cached = load_map(root, args.collection, args.environment, paths,
+                               args.cache_dir, args.rebuild)
+    elapsed = time.perf_counter() - start
+    print(f"Mapping: {len(mapping['templates'])} routes, {len(mapping['affects'])} source files, "
+          f"{mapping['requests']} requests ({'cache' if cached else 'built'}, "
+          f"{elapsed * 1000:.0f}ms)")
+    if mapping['unmapped']:
+        print(f"  ⚠ {len(mapping['unmapped'])} requests match no route and always run")
+    print()
+
+    changed = changed_files(args)
+    result = select(changed, mapping, args.shared_threshold, paths, root)
+    selected = add_setters(result['selected'], requests)
+
+    print(f"CHANGED FILES ({len(changed)}):")
+    for name, reason in result['reasons'].items():
+        mark = '⚠' if reason.startswith('full') else '✓' if reason != 'no requests' else ' '
+        print(f"  {mark} {name}: {reason}")
+    print()
+
+    if args.verbose:
+        for i in sorted(selected):
+            print(f"  {requests[i]['path']}  ({paths[i]})")
+        print()
+
+    out = args.out or args.cache_dir / f"{args.collection.stem}.impact.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(subset_collection(collection, requests, selected), f, indent=2)
+        f.write('\n')
+
+    print("SUMMARY:")
+    scope = 'full suite' if result['full'] else 'subset'
+    print(f"  Selected {len(selected)}/{len(requests)} requests ({scope})")
+    if not selected:
+        print("  ✓ No request is affected; the sub-collection is empty")
+    extra = len(selected) - len(result['selected'])
+    if extra:
+        print(f"  Including {extra} requests that set run-time variables")
+    print(f"  Sub-collection: {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
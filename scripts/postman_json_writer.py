@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Minimal-diff writer for Postman collection JSON files.
+
+A collection is parsed with byte offsets recorded for every object and
+array. When it is saved, the modified tree is compared against a pristine
+copy of the original and only the smallest changed subtrees are
+re-serialized; every other byte of the file is copied through unchanged,
+so key order, indentation and escaping drift never show up in diffs.
+
+Output is streamed to a temporary file in the same directory and moved
+into place with os.replace(), so an interrupted run never leaves a
+half-written collection behind.
+
+Usage:
+    doc = TrackedDocument.load(path)
+    mutate(doc.data)
+    stats = doc.save()
+"""
+
+import json
+import json.decoder
+import json.scanner
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+Edit = Tuple[int, int, str]
+
+
+class TrackedDocument:
+    """A parsed JSON document that remembers where each container came from."""
+
+    def __init__(self, text: str, path: Optional[Path] = None):
+        self.path = path
+        self.text = text
+        self.spans: Dict[int, Tuple[int, int]] = {}
+        self._keep: List[object] = []
+        self.data = self._parse(text)
+        # Pristine copy for change detection, parsed by the C decoder
+        self.original = json.loads(text)
+        self.indent = _detect_indent(text)
+        self.ensure_ascii = text.isascii()
+
+    @classmethod
+    def load(cls, path) -> 'TrackedDocument':
+        path = Path(path)
+        with open(path, encoding='utf-8') as f:
+            return cls(f.read(), path)
+
+    def _parse(self, text: str):
+        decoder = json.JSONDecoder()
+        spans = self.spans
+        keep = self._keep
+
+        def parse_object(s_and_end, *args):
+            start = s_and_end[1] - 1
+            obj, end = json.decoder.JSONObject(s_and_end, *args)
+            spans[id(obj)] = (start, end)
+            keep.append(obj)
+            return obj, end
+
+        def parse_array(s_and_end, scan_once):
+            start = s_and_end[1] - 1
+            arr, end = json.decoder.JSONArray(s_and_end, scan_once)
+            spans[id(arr)] = (start, end)
+            keep.append(arr)
+            return arr, end
+
+        decoder.parse_object = parse_object
+        decoder.parse_array = parse_array
+        # The C scanner ignores parse_object/parse_array overrides
+        decoder.scan_once = json.scanner.py_make_scanner(decoder)
+        return decoder.decode(text)
+
+    def _span(self, value) -> Optional[Tuple[int, int]]:
+        if isinstance(value, (dict, list)):
+            return self.spans.get(id(value))
+        return None
+
+    def _diff(self, orig, cur) -> Optional[List[Edit]]:
+        """Edits turning `orig` into `cur`, or None if the parent must re-emit."""
+        if orig == cur:
+            return []
+        span = self._span(cur)
+        if span is None:
+            return None
+
+        if isinstance(cur, dict) and isinstance(orig, dict) and list(cur) == list(orig):
+            pairs = [(orig[k], cur[k]) for k in cur]
+        elif isinstance(cur, list) and isinstance(orig, list) and len(cur) == len(orig):
+            pairs = list(zip(orig, cur))
+        else:
+            return [self._reemit(span, cur)]
+
+        edits: List[Edit] = []
+        for o, c in pairs:
+            child = self._diff(o, c)
+            if child is None:
+                return [self._reemit(span, cur)]
+            edits.extend(child)
+        return edits
+
+    def _reemit(self, span: Tuple[int, int], value) -> Edit:
+        """Serialize `value` in place of `span`, matching the surrounding indentation."""
+        start, end = span
+        line_start = self.text.rfind('\n', 0, start) + 1
+        base = re.match(r'[ \t]*', self.text[line_start:start]).group(0)
+        body = json.dumps(value, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        return start, end, body.replace('\n', '\n' + base)
+
+    def edits(self) -> List[Edit]:
+        edits = self._diff(self.original, self.data)
+        if edits is None:
+            # Root replaced wholesale
+            edits = [(0, len(self.text.rstrip()), json.dumps(
+                self.data, indent=self.indent, ensure_ascii=self.ensure_ascii))]
+        return sorted(edits)
+
+    def save(self, path=None) -> dict:
+        """Write only changed subtrees; returns write statistics."""
+        path = Path(path or self.path)
+        edits = self.edits()
+        stats = {
+            'changed_subtrees': len(edits),
+            'bytes_rewritten': sum(len(e[2].encode('utf-8')) for e in edits),
+            'bytes_total': 0,
+        }
+        if not edits and path == self.path:
+            stats['bytes_total'] = len(self.text.encode('utf-8'))
+            return stats
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                pos = 0
+                for start, end, replacement in edits:
+                    f.write(self.text[pos:start])
+                    f.write(replacement)
+                    pos = end
+                f.write(self.text[pos:])
+                stats['bytes_total'] = f.tell()
+            if path.exists():
+                os.chmod(tmp, os.stat(path).st_mode & 0o777)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        # The new text becomes the baseline for any further edits
+        self.__init__(_read(path), path)
+        return stats
+
+
+def _read(path: Path) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _detect_indent(text: str) -> int:
+    match = re.search(r'\n( +)\S', text)
+    return len(match.group(1)) if match else 2
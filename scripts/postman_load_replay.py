@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Replay the GET requests of Postman collections as local load.
+
+Reads comprehensive.json and smoke-tests.json (or any collections given),
+resolves {{variables}} from the collection, a Postman environment file and
+TEST_VARS in extract-seed-data.py (so requests hit rows present in
+test-seed-data.sql), and replays them with asyncio either at a fixed
+request rate (open loop) or with a fixed number of workers (closed loop).
+Reports throughput, latency percentiles and error rates per endpoint.
+
+Every base URL variable ({{dev_base_url}}, {{prod_base_url}}, {{baseUrl}},
+...) is pointed at --base-url, and requests resolving to any other host are
+refused, so the tool never generates external traffic.
+
+Usage:
+    python3 scripts/postman_load_replay.py --rps 50 --duration 60
+    python3 scripts/postman_load_replay.py --concurrency 20 --duration 30
+    python3 scripts/postman_load_replay.py --base-url http://localhost:8000 \\
+        --json-out reports/load-replay.json
+
+Latency in --rps mode is measured from each request's scheduled start
+time, so queueing delay under overload is included rather than hidden.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import ssl
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from bench_common import LOCAL_HOSTS
+from newman_timing_analyzer import percentile, url_path
+from seed_constants import load_constant
+from validate_test_coverage import find_all_requests
+
+COLLECTIONS_DIR = Path('tests/postman/collections')
+DEFAULT_COLLECTIONS = [COLLECTIONS_DIR / 'comprehensive.json', COLLECTIONS_DIR / 'smoke-tests.json']
+DEFAULT_ENVIRONMENT = Path('tests/postman/environments/local.json')
+
+VAR_RE = re.compile(r'\{\{([^{}]+)\}\}')
+BASE_URL_KEY_RE = re.compile(r'base_?url$', re.IGNORECASE)
+
+
+# ============================================================
+# Collection loading
+# ============================================================
+
+def load_variables(collections: List[dict], environment: Optional[Path],
+                   base_url: str, overrides: Dict[str, str]) -> Dict[str, str]:
+    """Merge collection variables < environment < TEST_VARS < --var overrides."""
+    variables: Dict[str, str] = {}
+    for data in collections:
+        for var in data.get('variable', []):
+            variables[var['key']] = str(var.get('value', ''))
+    if environment and environment.exists():
+        with open(environment) as f:
+            for var in json.load(f).get('values', []):
+                if var.get('enabled', True):
+                    variables[var['key']] = str(var.get('value', ''))
+    variables.update({k: str(v) for k, v in load_constant('TEST_VARS').items()})
+    variables.update(overrides)
+    for key in list(variables):
+        if BASE_URL_KEY_RE.search(key):
+            variables[key] = base_url
+    return variables
+
+
+def resolve(text: str, variables: Dict[str, str]) -> str:
+    # Resolve repeatedly so variables defined in terms of others expand
+    for _ in range(5):
+        new = VAR_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), text)
+        if new == text:
+            break
+        text = new
+    return text
+
+
+def load_requests(paths: List[Path], environment: Optional[Path], base_url: str,
+                  overrides: Dict[str, str], include_prod: bool) -> List[dict]:
+    """Resolve every GET request in the collections into a replayable target."""
+    collections = []
+    for path in paths:
+        with open(path) as f:
+            collections.append(json.load(f))
+    variables = load_variables(collections, environment, base_url, overrides)
+
+    targets = []
+    for path, data in zip(paths, collections):
+        for req in find_all_requests(data['item']):
+            request = req['item'].get('request', {})
+            if isinstance(request, str):
+                request = {'method': 'GET', 'url': request}
+            if request.get('method', 'GET').upper() != 'GET':
+                continue
+            if not include_prod and ' - Prod' in req['name']:
+                continue
+            url = request.get('url', '')
+            raw = url.get('raw', '') if isinstance(url, dict) else url
+            resolved = resolve(raw, variables)
+            unresolved = VAR_RE.findall(resolved)
+            if unresolved:
+                print(f"  ⚠ Skipping {req['name']}: unresolved {', '.join(unresolved)}")
+                continue
+            headers = {
+                h['key']: resolve(str(h.get('value', '')), variables)
+                for h in request.get('header', []) if not h.get('disabled')
+            }
+            targets.append({
+                'name': req['name'],
+                'collection': path.name,
+                'url': resolved,
+                'endpoint': f"GET {url_path(url)}",
+                'headers': headers,
+            })
+    return targets
+
+
+# ============================================================
+# Minimal asyncio HTTP/1.1 client with keep-alive
+# ============================================================
+
+class HttpError(Exception):
+    pass
+
+
+class NoResponse(HttpError):
+    """The connection closed or reset before any response bytes arrived."""
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host, port).
+
+    A pooled connection the server closed while idle is retried once on a
+    fresh connection, so it is not counted against the endpoint.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.idle: Dict[Tuple[str, str, int], List[tuple]] = {}
+        self.ssl_context = ssl.create_default_context()
+
+    async def _connect(self, scheme: str, host: str, port: int):
+        return await asyncio.wait_for(asyncio.open_connection(
+            host, port, ssl=self.ssl_context if scheme == 'https' else None), self.timeout)
+
+    async def get(self, url: str, headers: Dict[str, str]) -> Tuple[int, int]:
+        """Issue a GET and return (status, body bytes)."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, host, port)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in ('host', 'connection')]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        pooled = self.idle.get(key)
+        if pooled:
+            try:
+                return await self._exchange(key, *pooled.pop(), request)
+            except (NoResponse, BrokenPipeError):
+                pass  # closed by the server while idle; retry once on a fresh connection
+        reader, writer = await self._connect(scheme, host, port)
+        return await self._exchange(key, reader, writer, request)
+
+    async def _exchange(self, key, reader, writer, request: bytes) -> Tuple[int, int]:
+        try:
+            writer.write(request)
+            status, size, keep_alive = await asyncio.wait_for(_read_response(reader), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self.idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+        return status, size
+
+    def close(self):
+        for conns in self.idle.values():
+            for _, writer in conns:
+                writer.close()
+        self.idle.clear()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, int, bool]:
+    try:
+        status_line = await reader.readline()
+    except ConnectionResetError as e:
+        raise NoResponse('connection reset') from e
+    if not status_line:
+        raise NoResponse('connection closed')
+    version, status = status_line.split(b' ', 2)[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        k, _, v = line.decode('latin-1').partition(':')
+        headers[k.strip().lower()] = v.strip()
+
+    code = int(status)
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == b'HTTP/1.1'
+    if code in (204, 304) or 100 <= code < 200:
+        return code, 0, keep_alive
+
+    size = 0
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            length = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if length == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            size += len(await reader.readexactly(length))
+            await reader.readline()
+    elif 'content-length' in headers:
+        size = len(await reader.readexactly(int(headers['content-length'])))
+    else:
+        size = len(await reader.read())
+        keep_alive = False
+    return code, size, keep_alive
+
+
+# ============================================================
+# Load generation
+# ============================================================
+
+class Recorder:
+    def __init__(self):
+        self.by_endpoint: Dict[str, dict] = {}
+
+    def record(self, endpoint: str, latency_ms: float, status: int, size: int, error: Optional[str]):
+        entry = self.by_endpoint.setdefault(
+            endpoint, {'latencies': [], 'codes': {}, 'errors': 0, 'bytes': 0})
+        entry['latencies'].append(latency_ms)
+        entry['bytes'] += size
+        if error:
+            entry['errors'] += 1
+            entry['codes'][error] = entry['codes'].get(error, 0) + 1
+        else:
+            entry['codes'][str(status)] = entry['codes'].get(str(status), 0) + 1
+            if status >= 500:
+                entry['errors'] += 1
+
+
+async def _fire(pool: ConnectionPool, target: dict, recorder: Recorder, scheduled: float):
+    status, size, error = 0, 0, None
+    try:
+        status, size = await pool.get(target['url'], target['headers'])
+    except asyncio.TimeoutError:
+        error = 'timeout'
+    except (OSError, HttpError, asyncio.IncompleteReadError, ValueError) as e:
+        error = type(e).__name__
+    recorder.record(target['endpoint'], (time.perf_counter() - scheduled) * 1000, status, size, error)
+
+
+async def run_open_loop(targets, pool, recorder, rps: float, duration: float, max_in_flight: int):
+    """Start requests on a fixed schedule regardless of response times."""
+    sem = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    start = time.perf_counter()
+    interval = 1.0 / rps
+
+    async def guarded(target, scheduled):
+        async with sem:
+            await _fire(pool, target, recorder, scheduled)
+
+    for n, target in enumerate(itertools.cycle(targets)):
+        scheduled = start + n * interval
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(guarded(target, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_closed_loop(targets, pool, recorder, concurrency: int, duration: float):
+    """Keep `concurrency` workers busy issuing back-to-back requests."""
+    cycle = itertools.cycle(targets)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await _fire(pool, next(cycle), recorder, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def build_report(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for key, entry in recorder.by_endpoint.items():
+        lat = sorted(entry['latencies'])
+        all_latencies.extend(lat)
+        total_errors += entry['errors']
+        endpoints[key] = {
+            'requests': len(lat),
+            'rps': round(len(lat) / elapsed, 2),
+            'error_rate': round(entry['errors'] / len(lat), 4),
+            'p50_ms': round(percentile(lat, 50), 1),
+            'p95_ms': round(percentile(lat, 95), 1),
+            'p99_ms': round(percentile(lat, 99), 1),
+            'max_ms': round(lat[-1], 1),
+            'bytes': entry['bytes'],
+            'status_codes': entry['codes'],
+        }
+    all_latencies.sort()
+    total = len(all_latencies)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'rps': round(total / elapsed, 2) if elapsed else 0,
+        'error_rate': round(total_errors / total, 4) if total else 0,
+        'p50_ms': round(percentile(all_latencies, 50), 1),
+        'p95_ms': round(percentile(all_latencies, 95), 1),
+        'p99_ms': round(percentile(all_latencies, 99), 1),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Postman GET requests as local load")
+    parser.add_argument('collections', nargs='*', type=Path,
+                        help='Collections to replay (default: comprehensive.json and smoke-tests.json)')
+    parser.add_argument('--base-url', default='http://localhost:8000',
+                        help='Server every base URL variable points at (default: http://localhost:8000)')
+    parser.add_argument('--environment', type=Path, default=DEFAULT_ENVIRONMENT,
+                        help=f'Postman environment file (default: {DEFAULT_ENVIRONMENT})')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a variable (repeatable)')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--rps', type=float, help='Target request rate (open loop)')
+    mode.add_argument('--concurrency', type=int, default=10,
+                      help='Concurrent workers (closed loop, default: 10)')
+    parser.add_argument('--max-in-flight', type=int, default=200,
+                        help='Cap on outstanding requests in --rps mode (default: 200)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default: 30)')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--include-prod', action='store_true',
+                        help="Also replay ' - Prod' twins (they hit the same local server)")
+    parser.add_argument('--allow-remote', action='store_true',
+                        help='Permit requests to non-local hosts')
+    parser.add_argument('--json-out', type=Path, help='Write the report as JSON')
+    args = parser.parse_args()
+
+    overrides = dict(v.split('=', 1) for v in args.var)
+    paths = args.collections or DEFAULT_COLLECTIONS
+
+    print("=== Postman Collection Load Replay ===\n")
+    targets = load_requests(paths, args.environment, args.base_url.rstrip('/'),
+                            overrides, args.include_prod)
+    if not targets:
+        print("Error: no replayable GET requests found")
+        return 1
+
+    remote = {urlsplit(t['url']).hostname for t in targets} - LOCAL_HOSTS
+    if remote and not args.allow_remote:
+        print(f"Error: requests resolve to non-local hosts {sorted(remote)}; "
+              "pass --allow-remote to permit this")
+        return 1
+
+    mode_desc = f"{args.rps} rps" if args.rps else f"{args.concurrency} workers"
+    print(f"Replaying {len(targets)} requests from {len(paths)} collections "
+          f"against {args.base_url} at {mode_desc} for {args.duration}s...\n")
+
+    async def run():
+        pool = ConnectionPool(args.timeout)
+        recorder = Recorder()
+        start = time.perf_counter()
+        try:
+            if args.rps:
+                await run_open_loop(targets, pool, recorder, args.rps, args.duration, args.max_in_flight)
+            else:
+                await run_closed_loop(targets, pool, recorder, args.concurrency, args.duration)
+        finally:
+            pool.close()
+        return build_report(recorder, time.perf_counter() - start)
+
+    report = asyncio.run(run())
+
+    print(f"Requests: {report['requests']}  Throughput: {report['rps']} rps  "
+          f"Error rate: {100 * report['error_rate']:.2f}%")
+    print(f"Latency:  p50={report['p50_ms']}ms  p95={report['p95_ms']}ms  p99={report['p99_ms']}ms\n")
+    print(f"  {'n':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}  endpoint")
+    for key, s in sorted(report['endpoints'].items(), key=lambda kv: -kv[1]['p95_ms']):
+        print(f"  {s['requests']:>6} {100 * s['error_rate']:>5.1f}% {s['p50_ms']:>6}ms "
+              f"{s['p95_ms']:>6}ms {s['p99_ms']:>6}ms  {key}")
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_out}")
+
+    return 1 if report['error_rate'] > 0.05 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
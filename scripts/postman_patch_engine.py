@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Declarative patch engine for Postman collection test scripts.
+
+Test scripts are parsed once into a list of segments: one segment per
+top-level `pm.test(...)` block (including the comment lines directly above
+it) plus plain code segments for everything in between. Patches are keyed
+by request name (exact or fnmatch pattern) and test name, and operate on
+whole blocks, so they never depend on line-level heuristics such as
+looking for a line that equals '});'.
+
+Operations:
+    insert   add the test if no test with that name exists (after `anchor`
+             when given and present, otherwise at the end of the script)
+    replace  overwrite the test body, inserting it like `insert` if absent
+    remove   drop the test if present
+
+All operations are idempotent: applying the same patch set twice leaves
+the collection unchanged on the second run.
+
+Usage:
+    python3 scripts/postman_patch_engine.py --patches patches.json [--dry-run]
+        [collection.json ...]
+
+patches.json is a list of {"request", "test", "op", "lines", "anchor"}
+objects. Without explicit collections every file in
+tests/postman/collections/ is patched in a single pass.
+"""
+
+import argparse
+import difflib
+import fnmatch
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from postman_json_writer import TrackedDocument
+from validate_test_coverage import find_all_requests
+
+COLLECTIONS_DIR = Path('tests/postman/collections')
+
+OPS = ('insert', 'replace', 'remove')
+
+TEST_NAME_RE = re.compile(r'''pm\.test\(\s*(["'`])((?:\\.|(?!\1).)*)\1''')
+
+# A '/' after one of these characters (or at the start of a line) begins a
+# regex literal rather than a division.
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+
+
+class Patch(NamedTuple):
+    """A single declarative change to one pm.test block."""
+    request: str
+    test: str
+    op: str
+    lines: Tuple[str, ...] = ()
+    anchor: Optional[str] = None
+
+
+class Segment(NamedTuple):
+    """A slice of a test script; `name` is None for non-test code."""
+    name: Optional[str]
+    lines: List[str]
+
+
+def _scan_depth(line: str, depth: int, state: dict) -> int:
+    """Update bracket depth for one JS line, skipping strings, comments and regexes.
+
+    `state` carries an open block comment or template literal across lines.
+    """
+    i = 0
+    n = len(line)
+    prev = ''
+    while i < n:
+        ch = line[i]
+        if state.get('block_comment'):
+            end = line.find('*/', i)
+            if end == -1:
+                return depth
+            state['block_comment'] = False
+            i = end + 2
+            continue
+        if state.get('template'):
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == '`':
+                state['template'] = False
+            i += 1
+            continue
+        if ch in ' \t':
+            i += 1
+            continue
+        if ch == '/' and line.startswith('//', i):
+            return depth
+        if ch == '/' and line.startswith('/*', i):
+            state['block_comment'] = True
+            i += 2
+            continue
+        if ch == '`':
+            state['template'] = True
+            i += 1
+            prev = ch
+            continue
+        if ch in '"\'':
+            i += 1
+            while i < n and line[i] != ch:
+                i += 2 if line[i] == '\\' else 1
+            i += 1
+            prev = ch
+            continue
+        if ch == '/' and (prev == '' or prev in REGEX_PRECEDERS):
+            i += 1
+            in_class = False
+            while i < n:
+                c = line[i]
+                if c == '\\':
+                    i += 2
+                    continue
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                i += 1
+            i += 1
+            prev = ')'
+            continue
+        if ch in '({[':
+            depth += 1
+        elif ch in ')}]':
+            depth -= 1
+        prev = ch
+        i += 1
+    return depth
+
+
+def parse_script(exec_lines: Sequence[str]) -> List[Segment]:
+    """Split a test script into pm.test blocks and code segments in one pass."""
+    segments: List[Segment] = []
+    code: List[str] = []
+    depth = 0
+    state: dict = {}
+    current: Optional[Segment] = None
+
+    for line in exec_lines:
+        stripped = line.strip()
+        if current is None and depth == 0 and stripped.startswith('pm.test('):
+            match = TEST_NAME_RE.match(stripped)
+            # Comment lines immediately above a test belong to that test
+            lead: List[str] = []
+            while code and code[-1].strip().startswith('//'):
+                lead.insert(0, code.pop())
+            if code:
+                segments.append(Segment(None, code))
+                code = []
+            current = Segment(match.group(2) if match else None, lead)
+
+        depth = _scan_depth(line, depth, state)
+
+        if current is not None:
+            current.lines.append(line)
+            if depth <= 0:
+                segments.append(current)
+                current = None
+                depth = 0
+        else:
+            code.append(line)
+
+    if current is not None:
+        # Unbalanced script: keep the trailing lines verbatim
+        segments.append(current)
+    if code:
+        segments.append(Segment(None, code))
+    return segments
+
+
+def render_script(segments: Sequence[Segment]) -> List[str]:
+    """Flatten segments back into an exec line list."""
+    lines: List[str] = []
+    for segment in segments:
+        lines.extend(segment.lines)
+    return lines
+
+
+def _find_test(segments: Sequence[Segment], name: Optional[str]) -> Optional[int]:
+    if name is None:
+        return None
+    for idx, segment in enumerate(segments):
+        if segment.name == name:
+            return idx
+    return None
+
+
+def _insert_block(segments: List[Segment], patch: Patch) -> None:
+    """Insert a new test block, separated from its neighbours by a blank line."""
+    block = Segment(patch.test, list(patch.lines))
+    anchor_idx = _find_test(segments, patch.anchor)
+    if anchor_idx is None:
+        if segments and segments[-1].lines and segments[-1].lines[-1].strip():
+            segments.append(Segment(None, ['']))
+        segments.append(block)
+        return
+    segments[anchor_idx + 1:anchor_idx + 1] = [Segment(None, ['']), block]
+
+
+def apply_patch(segments: List[Segment], patch: Patch) -> bool:
+    """Apply one patch to parsed segments in place. Returns True if changed."""
+    idx = _find_test(segments, patch.test)
+
+    if patch.op == 'remove':
+        if idx is None:
+            return False
+        del segments[idx]
+        # Collapse the blank separator left behind
+        if idx < len(segments) and segments[idx].name is None \
+                and all(not l.strip() for l in segments[idx].lines):
+            del segments[idx]
+        return True
+
+    if patch.op == 'insert':
+        if idx is not None:
+            return False
+        _insert_block(segments, patch)
+        return True
+
+    if patch.op == 'replace':
+        if idx is None:
+            _insert_block(segments, patch)
+            return True
+        if segments[idx].lines == list(patch.lines):
+            return False
+        segments[idx] = Segment(patch.test, list(patch.lines))
+        return True
+
+    raise ValueError(f"Unknown patch op: {patch.op}")
+
+
+class PatchIndex:
+    """Patches grouped by request name, with exact names resolved by dict lookup."""
+
+    def __init__(self, patches: Sequence[Patch]):
+        self.exact: Dict[str, List[Patch]] = {}
+        self.patterns: List[Patch] = []
+        for patch in patches:
+            if patch.op not in OPS:
+                raise ValueError(f"Unknown patch op '{patch.op}' for {patch.request}")
+            if any(ch in patch.request for ch in '*?['):
+                self.patterns.append(patch)
+            else:
+                self.exact.setdefault(patch.request, []).append(patch)
+
+    def for_request(self, name: str) -> List[Patch]:
+        matched = [p for p in self.patterns if fnmatch.fnmatchcase(name, p.request)]
+        return matched + self.exact.get(name, [])
+
+
+def _test_script(item: dict) -> Optional[dict]:
+    for event in item.get('event', []):
+        if event.get('listen') == 'test':
+            return event.setdefault('script', {'exec': [], 'type': 'text/javascript'})
+    return None
+
+
+def patch_collection(data: dict, index: PatchIndex, label: str = '') -> Tuple[List[str], List[str]]:
+    """Apply indexed patches to every request in a loaded collection.
+
+    Returns (changed request paths, unified diff lines).
+    """
+    changed: List[str] = []
+    diff: List[str] = []
+    for req in find_all_requests(data.get('item', [])):
+        patches = index.for_request(req['name'])
+        if not patches:
+            continue
+        script = _test_script(req['item'])
+        if script is None:
+            req['item'].setdefault('event', []).append({
+                'listen': 'test',
+                'script': {'exec': [], 'type': 'text/javascript'},
+            })
+            script = req['item']['event'][-1]['script']
+
+        before = list(script.get('exec', []))
+        segments = parse_script(before)
+        modified = False
+        for patch in patches:
+            modified |= apply_patch(segments, patch)
+        if not modified:
+            continue
+
+        after = render_script(segments)
+        script['exec'] = after
+        changed.append(req['path'])
+        name = f"{label}::{req['path']}" if label else req['path']
+        diff.extend(difflib.unified_diff(
+            before, after, fromfile=f"a/{name}", tofile=f"b/{name}", lineterm=''))
+    return changed, diff
+
+
+def load_patches(path: Path) -> List[Patch]:
+    """Load patch definitions from a JSON list."""
+    with open(path) as f:
+        raw = json.load(f)
+    return [Patch(p['request'], p['test'], p.get('op', 'insert'),
+                  tuple(p.get('lines', ())), p.get('anchor')) for p in raw]
+
+
+def apply_patches(paths: Sequence[Path], patches: Sequence[Patch], dry_run: bool = False) -> Dict[str, List[str]]:
+    """Apply a patch set across collections in one pass.
+
+    Each collection is loaded and walked once; only collections with changes
+    are written back, and only their changed subtrees are re-serialized.
+    Returns {collection path: [changed request paths]}.
+    """
+    index = PatchIndex(patches)
+    report: Dict[str, List[str]] = {}
+    for path in paths:
+        doc = TrackedDocument.load(path)
+        changed, diff = patch_collection(doc.data, index, label=path.name)
+        if not changed:
+            continue
+        report[str(path)] = changed
+        if dry_run:
+            print('\n'.join(diff))
+        else:
+            stats = doc.save()
+            print(f"  {path.name}: rewrote {stats['bytes_rewritten']:,} of "
+                  f"{stats['bytes_total']:,} bytes ({stats['changed_subtrees']} subtrees)")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('collections', nargs='*', type=Path,
+                        help='Collections to patch (default: all in tests/postman/collections)')
+    parser.add_argument('--patches', type=Path, required=True, help='JSON patch definitions')
+    parser.add_argument('--dry-run', action='store_true', help='Print a diff instead of writing')
+    args = parser.parse_args()
+
+    paths = args.collections or sorted(COLLECTIONS_DIR.glob('*.json'))
+    report = apply_patches(paths, load_patches(args.patches), dry_run=args.dry_run)
+
+    verb = 'Would update' if args.dry_run else 'Updated'
+    total = sum(len(v) for v in report.values())
+    for path, changed in report.items():
+        print(f"{verb} {len(changed)} requests in {path}")
+        for name in changed:
+            print(f"  - {name}")
+    print(f"✓ {verb} {total} requests across {len(report)} collections")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Local stand-in for the stamp list and preview endpoints, with simulated failures.
+
+Serves just enough of the API for validate-html-previews.py to run
+against it:
+
+    GET /api/v2/stamps?filetype=html&limit=N&page=P   paged stamp list
+    GET /api/v2/stamp/{n}/preview[?refresh=true]      PNG-sized body with
+                                                      x-cache/x-rendering-engine
+    GET /stamps/{tx_hash}.html                        stamp HTML; recursive,
+                                                      script-heavy, large or
+                                                      simple by n % 4
+
+A stamp's first preview request is a render (x-cache: rendered), later
+ones are hits until ?refresh=true. Previews carry an ETag and
+Last-Modified that change on every render, and a matching If-None-Match
+gets a 304. Each request fails with HTTP 500 at
+--fail-rate and returns a blank render at --blank-rate. Stamps listed in
+--flaky always fail. With --grow, a new stamp appears every N seconds.
+
+Usage:
+    python3 scripts/preview-stub-server.py --port 8765 --stamps 200 --fail-rate 0.05
+    python3 scripts/validate-html-previews.py --base-url http://127.0.0.1:8765 --daemon
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ENGINES = ("chromium", "resvg")
+HTML_KINDS = (
+    '<html><body><script src="/s/A{n:012d}"></script></body></html>',
+    '<html><body><canvas></canvas><script>requestAnimationFrame(() => {{}})</script></body></html>',
+    '<html><body><div>' + "x" * 70_000 + '</div></body></html>',
+    '<html><body><svg><text>{n}</text></svg></body></html>',
+)
+
+
+class State:
+    def __init__(self, args):
+        self.args = args
+        self.started = time.monotonic()
+        self.rendered = {}
+        self.lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+
+    def stamp_count(self):
+        grown = int((time.monotonic() - self.started) / self.args.grow) if self.args.grow else 0
+        return self.args.stamps + grown
+
+
+def make_handler(state):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        def send(self, code, body=b"", headers=()):
+            self.send_response(code)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip("/").split("/")
+            if url.path == "/api/v2/stamps":
+                self.stamps(int(query.get("page", ["1"])[0]), int(query.get("limit", ["100"])[0]))
+            elif len(parts) == 2 and parts[0] == "stamps" and parts[1].endswith(".html"):
+                self.html(int(parts[1][:-5], 16))
+            elif len(parts) == 5 and parts[:3] == ["api", "v2", "stamp"] and parts[4] == "preview":
+                self.preview(int(parts[3]), query.get("refresh") == ["true"])
+            else:
+                self.send(404)
+
+        def stamps(self, page, limit):
+            last = state.stamp_count()
+            data = [{"stamp": n, "tx_hash": f"{n:064x}", "stamp_url": f"/stamps/{n:064x}.html"}
+                    for n in range((page - 1) * limit + 1, min(last, page * limit) + 1)]
+            self.send(200, json.dumps({"data": data}).encode(),
+                      [("Content-Type", "application/json")])
+
+        def html(self, num):
+            body = HTML_KINDS[num % len(HTML_KINDS)].format(n=num).encode()
+            self.send(200, body, [("Content-Type", "text/html")])
+
+        def preview(self, num, refresh):
+            if num > state.stamp_count():
+                return self.send(404)
+            if args.latency:
+                time.sleep(state.rng.expovariate(1 / args.latency))
+            with state.lock:
+                roll = state.rng.random()
+                hit = num in state.rendered and not refresh
+                if not hit:
+                    state.rendered[num] = time.time()
+                rendered = state.rendered[num]
+            if num in args.flaky or roll < args.fail_rate:
+                return self.send(500, b"render failed")
+            headers = [
+                ("X-Cache", "redis-hit" if hit else "rendered"),
+                ("X-Rendering-Engine", ENGINES[num % len(ENGINES)]),
+                ("ETag", f'"{num}-{rendered:.6f}"'),
+                ("Last-Modified", formatdate(rendered, usegmt=True)),
+            ]
+            if hit and self.headers.get("If-None-Match") == headers[2][1]:
+                return self.send(304, headers=headers)
+            size = 1_000 if roll < args.fail_rate + args.blank_rate else 20_000
+            self.send(200, b"\x89PNG" + b"\0" * size, headers + [
+                ("Content-Type", "image/png"),
+                ("X-Conversion-Method", "screenshot"),
+            ])
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stamps", type=int, default=200, help="HTML stamps listed at start")
+    parser.add_argument("--grow", type=float, default=0,
+                        help="Add a stamp every N seconds (0 = never)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction answered HTTP 500")
+    parser.add_argument("--blank-rate", type=float, default=0.0, help="Fraction rendered blank")
+    parser.add_argument("--flaky", type=int, nargs="*", default=[], help="Stamps that always fail")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean render latency (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.flaky = set(args.flaky)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(State(args)))
+    print(f"Stub preview server on http://{args.host}:{args.port} ({args.stamps} stamps)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
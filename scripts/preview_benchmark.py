@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Corpus and reporting for validate-html-previews.py --benchmark.
+
+A corpus is a fixed list of HTML stamps in a versioned JSON file:
+
+    {"version": 3, "created": "...", "source": "https://stampchain.io",
+     "digest": "<sha256 of the stamp numbers>",
+     "stamps": [{"stamp": 1234, "tx_hash": "...", "category": "recursive",
+                 "bytes": 812, "scripts": 2}, ...]}
+
+Stamps are sorted into categories with the same content checks the
+preview route uses to choose a render mode (see routes/api/v2/stamp/
+[stamp]/preview.ts):
+
+    recursive     iframes, external or /s/ references, CPID loads
+    script_heavy  several <script> tags, canvas or animation
+    large         HTML of LARGE_HTML_BYTES or more
+    simple        everything else
+
+Rebuilding the corpus in place bumps its version; a selection missing
+any category is refused rather than written. Benchmark reports name
+the corpus version and digest, so only runs on the same corpus are
+compared.
+
+summarize() groups cold-render samples by engine and conversion method,
+and by corpus category. compare() diffs two reports.
+"""
+
+import hashlib
+import json
+import random
+import re
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bench_common import percentiles
+
+CATEGORIES = ("recursive", "script_heavy", "large", "simple")
+LARGE_HTML_BYTES = 64 * 1024
+SCRIPT_HEAVY_TAGS = 3
+
+EXTERNAL_HOSTS = ("ordinals.com/", "arweave.net/", "github.io/")
+RELATIVE_SRC_RE = re.compile(r"""src\s*=\s*["']/""")
+STAMP_REF_RE = re.compile(r"""["']/s/|["']A\d{10,}["']""")
+SCRIPT_RE = re.compile(r"<script\b", re.IGNORECASE)
+
+
+# ============================================================
+# Corpus
+# ============================================================
+
+def html_features(html: str) -> dict:
+    return {
+        "bytes": len(html.encode()),
+        "scripts": len(SCRIPT_RE.findall(html)),
+        "recursive": ("<iframe" in html or any(h in html for h in EXTERNAL_HOSTS)
+                      or bool(RELATIVE_SRC_RE.search(html)) or bool(STAMP_REF_RE.search(html))),
+        "dynamic": ("<canvas" in html or "getContext" in html
+                    or "requestAnimationFrame" in html or "setInterval" in html),
+    }
+
+
+def categorize(features: dict) -> str:
+    if features["recursive"]:
+        return "recursive"
+    if features["scripts"] >= SCRIPT_HEAVY_TAGS or features["dynamic"]:
+        return "script_heavy"
+    if features["bytes"] >= LARGE_HTML_BYTES:
+        return "large"
+    return "simple"
+
+
+def select_corpus(candidates: List[dict], per_category: int, seed: int) -> List[dict]:
+    """Up to per_category stamps from each category, chosen reproducibly."""
+    rng = random.Random(seed)
+    chosen = []
+    for category in CATEGORIES:
+        pool = sorted((c for c in candidates if c["category"] == category),
+                      key=lambda c: c["stamp"])
+        chosen += rng.sample(pool, min(per_category, len(pool)))
+    return sorted(chosen, key=lambda c: c["stamp"])
+
+
+def corpus_digest(stamps: List[dict]) -> str:
+    return hashlib.sha256(
+        ",".join(str(s["stamp"]) for s in sorted(stamps, key=lambda s: s["stamp"])).encode()
+    ).hexdigest()
+
+
+def load_corpus(path: Path) -> dict:
+    with open(path) as f:
+        corpus = json.load(f)
+    if corpus_digest(corpus["stamps"]) != corpus["digest"]:
+        raise ValueError(f"{path}: stamp list does not match its digest")
+    return corpus
+
+
+def write_corpus(path: Path, stamps: List[dict], source: str) -> dict:
+    """Write the corpus, bumping the version of any corpus already at path.
+
+    Raises ValueError, leaving any existing corpus untouched, unless every
+    category has at least one stamp.
+    """
+    empty = [c for c in CATEGORIES if not any(s["category"] == c for s in stamps)]
+    if empty:
+        raise ValueError(f"no stamps in {', '.join(empty)}; not writing {path}")
+    version = 1
+    if path.exists():
+        with open(path) as f:
+            version = json.load(f).get("version", 0) + 1
+    corpus = {
+        "version": version,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "digest": corpus_digest(stamps),
+        "stamps": stamps,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(corpus, f, indent=2)
+        f.write("\n")
+    return corpus
+
+
+# ============================================================
+# Reporting
+# ============================================================
+
+def _group(samples: List[dict]) -> dict:
+    rendered = [s for s in samples if s["status"] in ("OK", "BLANK")]
+    latencies = [s["latency_ms"] for s in rendered]
+    sizes = [s["size"] for s in rendered]
+    return {
+        "samples": len(samples),
+        "rendered": len(rendered),
+        "blank_rate": sum(s["status"] == "BLANK" for s in samples) / len(samples),
+        "error_rate": (len(samples) - len(rendered)) / len(samples),
+        "latency_ms": {**percentiles(latencies),
+                       "mean": statistics.fmean(latencies) if latencies else 0.0},
+        "size_bytes": {"median": statistics.median(sizes) if sizes else 0,
+                       "mean": statistics.fmean(sizes) if sizes else 0.0},
+    }
+
+
+def summarize(samples: List[dict]) -> dict:
+    """Stats per "engine/method" and per category from cold-render samples.
+
+    Each sample has stamp, category, status, latency_ms, size, engine and
+    method; failed renders carry no engine and group under "(none)".
+    """
+    by_engine: Dict[str, List[dict]] = {}
+    by_category: Dict[str, List[dict]] = {}
+    for s in samples:
+        key = f"{s['engine'] or '(none)'}/{s['method'] or '(none)'}"
+        by_engine.setdefault(key, []).append(s)
+        by_category.setdefault(s["category"], []).append(s)
+    return {
+        "overall": _group(samples) if samples else {},
+        "engines": {k: _group(v) for k, v in sorted(by_engine.items())},
+        "categories": {k: _group(v) for k, v in sorted(by_category.items())},
+    }
+
+
+def print_summary(summary: dict):
+    print(f"  {'group':<32} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'blank':>6} {'errors':>6} {'median B':>10}")
+    for section in ("engines", "categories"):
+        for name, g in summary[section].items():
+            lat = g["latency_ms"]
+            print(f"  {name[:32]:<32} {g['samples']:>5} {lat['p50']:>8.0f} {lat['p95']:>8.0f} "
+                  f"{lat['p99']:>8.0f} {g['blank_rate']:>6.1%} {g['error_rate']:>6.1%} "
+                  f"{g['size_bytes']['median']:>10,.0f}")
+        print()
+
+
+def compare(old: dict, new: dict, threshold: float) -> Optional[int]:
+    """Print p95/BLANK deltas per group; return regressions, None if incomparable."""
+    if old["corpus"]["digest"] != new["corpus"]["digest"]:
+        print(f"  ✗ Corpus differs (v{old['corpus']['version']} vs v{new['corpus']['version']}); "
+              f"not comparable")
+        return None
+    print(f"  Against {old.get('label') or old.get('created')}; "
+          f"regression threshold {threshold:.0%} on p95")
+    regressions = 0
+    for section in ("engines", "categories"):
+        for name, g in new["summary"][section].items():
+            before = old["summary"][section].get(name)
+            if before is None:
+                print(f"  {name[:32]:<32} (new)")
+                continue
+            b95, n95 = before["latency_ms"]["p95"], g["latency_ms"]["p95"]
+            change = (n95 - b95) / b95 if b95 else 0.0
+            bad = change > threshold or g["blank_rate"] > before["blank_rate"]
+            regressions += bad
+            print(f"  {name[:32]:<32} p95 {b95:>7.0f} -> {n95:<7.0f} ({change:+.0%})  "
+                  f"blank {before['blank_rate']:.1%} -> {g['blank_rate']:.1%}  "
+                  f"{'✗' if bad else '✓'}")
+    return regressions
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Columnar result storage for validate-html-previews.py.
+
+A dict of ten keys per stamp costs several hundred bytes, and every
+summary rescans the whole list. ResultTable stores one typed column per
+field in an array.array instead. That is a few bytes per stamp, and
+appending never copies:
+
+    stamp      int64     stamp number
+    status     uint8     index into STATUSES (HTTP_4xx/5xx are OTHER)
+    http_code  uint16
+    size       uint32    body bytes (for a 304, the size its validators stored)
+    latency    float32   milliseconds
+    cache_hit  uint8     x-cache ended in "hit"
+    engine     uint16    index into table.engines (interned x-rendering-engine)
+
+Details only the failure report needs (tx_hash, x-cache, location) are
+kept for rows that are not OK or REDIRECT.
+
+With NumPy installed, summaries, failure filters and histograms run as
+vectorized operations over zero-copy views of the columns. save() writes
+a compressed .npz and load() reads it back. Without NumPy the summaries
+fall back to plain loops, and save/load are unavailable.
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; summaries fall back to plain loops
+    np = None
+
+STATUSES = ("OK", "BLANK", "FALLBACK", "REDIRECT", "TIMEOUT", "OTHER")
+STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+HEALTHY_CODES = (STATUS_CODE["OK"], STATUS_CODE["REDIRECT"])
+FORMAT_VERSION = 1
+
+# column -> (array typecode, numpy dtype)
+COLUMNS = {
+    "stamp": ("q", "int64"),
+    "status": ("B", "uint8"),
+    "http_code": ("H", "uint16"),
+    "size": ("I", "uint32"),
+    "latency": ("f", "float32"),
+    "cache_hit": ("B", "uint8"),
+    "engine": ("H", "uint16"),
+}
+
+
+class ResultTable:
+    """Append-only, column-per-field preview results."""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        self.engines: List[str] = []
+        self._engine_ids: Dict[str, int] = {}
+        self.details: Dict[int, Tuple[str, str, str]] = {}
+
+    def __len__(self):
+        return len(self.columns["stamp"])
+
+    def engine_id(self, engine: str) -> int:
+        if engine not in self._engine_ids:
+            self._engine_ids[engine] = len(self.engines)
+            self.engines.append(engine)
+        return self._engine_ids[engine]
+
+    def append(self, stamp: int, status: str, result: dict, latency_ms: float = 0.0,
+               tx_hash: str = ""):
+        code = STATUS_CODE.get(status, STATUS_CODE["OTHER"])
+        if code not in HEALTHY_CODES:
+            self.details[len(self)] = (tx_hash, result["cache"], result["location"])
+        c = self.columns
+        c["stamp"].append(stamp)
+        c["status"].append(code)
+        c["http_code"].append(result["http_code"])
+        c["size"].append(min(result["size"], 0xFFFFFFFF))
+        c["latency"].append(latency_ms)
+        c["cache_hit"].append(result["cache"].endswith("hit"))
+        c["engine"].append(self.engine_id(result["engine"]))
+
+    def column(self, name: str):
+        """A NumPy view of one column (no copy), or the raw array without NumPy."""
+        if np is None:
+            return self.columns[name]
+        return np.frombuffer(self.columns[name], dtype=COLUMNS[name][1])
+
+    # ============================================================
+    # Summaries
+    # ============================================================
+
+    def counts(self) -> Dict[str, int]:
+        """Rows per status, every status present."""
+        if np is None:
+            n = [0] * len(STATUSES)
+            for code in self.columns["status"]:
+                n[code] += 1
+        else:
+            n = np.bincount(self.column("status"), minlength=len(STATUSES)).tolist()
+        return dict(zip(STATUSES, n))
+
+    def failure_rows(self) -> Sequence[int]:
+        """Row indexes whose status is neither OK nor REDIRECT."""
+        if np is None:
+            return [i for i, code in enumerate(self.columns["status"])
+                    if code not in HEALTHY_CODES]
+        return np.flatnonzero(~np.isin(self.column("status"), HEALTHY_CODES)).tolist()
+
+    def row(self, i: int) -> dict:
+        """One row as the dict shape the failure report prints."""
+        tx_hash, cache, location = self.details.get(i, ("", "", ""))
+        status = STATUSES[self.columns["status"][i]]
+        http_code = int(self.columns["http_code"][i])
+        return {
+            "stamp": int(self.columns["stamp"][i]),
+            "tx_hash": tx_hash,
+            # classify() names every other status after its HTTP code
+            "status": f"HTTP_{http_code}" if status == "OTHER" else status,
+            "http_code": http_code,
+            "size": int(self.columns["size"][i]),
+            "cache": cache,
+            "engine": self.engines[self.columns["engine"][i]],
+            "location": location,
+        }
+
+    def failures(self) -> List[dict]:
+        return [self.row(i) for i in self.failure_rows()]
+
+    def latency_percentiles(self, percentiles=(50, 90, 95, 99)) -> Dict[str, float]:
+        if not len(self):
+            return {}
+        if np is None:
+            values = sorted(self.columns["latency"])
+            return {f"p{p}": values[min(len(values) - 1, int(len(values) * p / 100))]
+                    for p in percentiles}
+        values = np.percentile(self.column("latency"), percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    def cache_hit_rate(self) -> float:
+        if not len(self):
+            return 0.0
+        return sum(self.columns["cache_hit"]) / len(self)
+
+    def by_engine(self) -> Dict[str, Dict[str, int]]:
+        """Status counts per rendering engine."""
+        out = {}
+        if np is None:
+            for engine, status in zip(self.columns["engine"], self.columns["status"]):
+                name = self.engines[engine] or "(none)"
+                out.setdefault(name, dict.fromkeys(STATUSES, 0))[STATUSES[status]] += 1
+            return out
+        pairs = (self.column("engine").astype(np.int64) * len(STATUSES)
+                 + self.column("status"))
+        grid = np.bincount(pairs, minlength=len(self.engines) * len(STATUSES))
+        for i, engine in enumerate(self.engines):
+            row = grid[i * len(STATUSES):(i + 1) * len(STATUSES)].tolist()
+            out[engine or "(none)"] = dict(zip(STATUSES, row))
+        return out
+
+    def histogram(self, name: str, bins) -> Optional[Tuple[list, list]]:
+        """(counts, edges) of a numeric column; None without NumPy."""
+        if np is None or not len(self):
+            return None
+        counts, edges = np.histogram(self.column(name), bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    # ============================================================
+    # Persistence
+    # ============================================================
+
+    def save(self, path):
+        """Write the table to a compressed .npz file."""
+        if np is None:
+            raise RuntimeError("saving results requires numpy (pip install numpy)")
+        rows = sorted(self.details)
+        np.savez_compressed(
+            path,
+            version=np.array(FORMAT_VERSION),
+            statuses=np.array(STATUSES),
+            engines=np.array(self.engines, dtype=str),
+            detail_rows=np.array(rows, dtype=np.int64),
+            details=np.array([self.details[i] for i in rows], dtype=str).reshape(-1, 3),
+            **{name: self.column(name) for name in COLUMNS},
+        )
+
+    @classmethod
+    def load(cls, path) -> "ResultTable":
+        if np is None:
+            raise RuntimeError("loading results requires numpy (pip install numpy)")
+        table = cls()
+        with np.load(path) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported results format {int(data['version'])}")
+            if tuple(data["statuses"].tolist()) != STATUSES:
+                raise ValueError(f"{path}: status enum differs from this version")
+            for name, (code, dtype) in COLUMNS.items():
+                table.columns[name] = array(code, data[name].astype(dtype).tobytes())
+            for engine in data["engines"].tolist():
+                table.engine_id(engine)
+            for i, detail in zip(data["detail_rows"].tolist(), data["details"].tolist()):
+                table.details[i] = tuple(detail)
+        return table
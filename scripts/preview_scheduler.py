@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Recheck scheduling for validate-html-previews.py --daemon.
+
+Schedule keeps one heap entry per stamp, keyed by the time it is next due.
+A stamp's interval depends on how its checks have gone:
+
+  * new stamps are due immediately;
+  * a failing stamp (any status but OK or REDIRECT) is rechecked every
+    fail_interval;
+  * each consecutive healthy check doubles the interval from
+    base_interval, up to max_interval.
+
+Intervals get +/-10% jitter so stamps added together drift apart instead
+of coming due in bursts. RateLimiter is a token bucket that bounds the
+global request rate across worker threads. Counters tracks checks and
+current stamps by classify() status and renders them in the Prometheus
+text format, which serve_metrics exposes over HTTP for scraping.
+"""
+
+import heapq
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from tool_metrics import METRIC_PREFIX
+
+HEALTHY = ("OK", "REDIRECT")
+JITTER = 0.1
+
+
+class Schedule:
+    """Heap of (due, seq, stamp) with per-stamp backoff state."""
+
+    def __init__(self, base_interval: float = 600, max_interval: float = 86400,
+                 fail_interval: float = 60, seed: Optional[int] = None):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.fail_interval = fail_interval
+        self.rng = random.Random(seed)
+        self.heap: List[Tuple[float, int, int]] = []
+        self.due: Dict[int, float] = {}
+        self.streak: Dict[int, int] = {}
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.due)
+
+    def _push(self, stamp: int, due: float):
+        self.seq += 1
+        self.due[stamp] = due
+        heapq.heappush(self.heap, (due, self.seq, stamp))
+
+    def add(self, stamp: int, now: float) -> bool:
+        """Schedule a new stamp for an immediate check; False if already known."""
+        if stamp in self.due:
+            return False
+        self.streak[stamp] = 0
+        self._push(stamp, now)
+        return True
+
+    def interval(self, stamp: int, status: str) -> float:
+        if status not in HEALTHY:
+            return self.fail_interval
+        # streak counts healthy checks including this one
+        return min(self.max_interval, self.base_interval * 2 ** (self.streak[stamp] - 1))
+
+    def record(self, stamp: int, status: str, now: float) -> float:
+        """Reschedule after a check; returns the chosen interval."""
+        self.streak[stamp] = self.streak[stamp] + 1 if status in HEALTHY else 0
+        interval = self.interval(stamp, status)
+        interval *= 1 + self.rng.uniform(-JITTER, JITTER)
+        self._push(stamp, now + interval)
+        return interval
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: float) -> Optional[int]:
+        """Remove and return the most overdue stamp, or None if nothing is due.
+
+        The stamp stays known (add() ignores it) until record() reschedules it.
+        """
+        self._drop_stale()
+        if not self.heap or self.heap[0][0] > now:
+            return None
+        due, _, stamp = heapq.heappop(self.heap)
+        self.due[stamp] = float("inf")
+        return stamp
+
+    def _drop_stale(self):
+        # Entries superseded by a later _push for the same stamp
+        while self.heap and self.due.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads: `rate` requests per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Counters:
+    """Thread-safe check counters, rendered for Prometheus scraping."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checks: Dict[str, int] = {}
+        self.current: Dict[int, str] = {}
+        self.latency_s = 0.0
+        self.last_check = 0.0
+        self.scheduled = 0
+
+    def record(self, stamp: int, status: str, latency_s: float):
+        with self.lock:
+            self.checks[status] = self.checks.get(status, 0) + 1
+            self.current[stamp] = status
+            self.latency_s += latency_s
+            self.last_check = time.time()
+
+    def by_status(self) -> Dict[str, int]:
+        with self.lock:
+            out: Dict[str, int] = {}
+            for status in self.current.values():
+                out[status] = out.get(status, 0) + 1
+            return out
+
+    def prometheus(self) -> str:
+        current = self.by_status()
+        with self.lock:
+            checks = dict(self.checks)
+            total = sum(checks.values())
+            lines = [
+                f"# HELP {METRIC_PREFIX}_preview_checks_total Preview checks by classify() status.",
+                f"# TYPE {METRIC_PREFIX}_preview_checks_total counter",
+            ]
+            lines += [f'{METRIC_PREFIX}_preview_checks_total{{status="{s}"}} {n}'
+                      for s, n in sorted(checks.items())]
+            lines += [
+                f"# HELP {METRIC_PREFIX}_preview_stamps Stamps by status of their latest check.",
+                f"# TYPE {METRIC_PREFIX}_preview_stamps gauge",
+            ]
+            lines += [f'{METRIC_PREFIX}_preview_stamps{{status="{s}"}} {n}'
+                      for s, n in sorted(current.items())]
+            lines += [
+                f"# HELP {METRIC_PREFIX}_preview_check_seconds_total Time spent in checks.",
+                f"# TYPE {METRIC_PREFIX}_preview_check_seconds_total counter",
+                f"{METRIC_PREFIX}_preview_check_seconds_total {self.latency_s:.6f}",
+                f"# HELP {METRIC_PREFIX}_preview_check_count_total Checks completed.",
+                f"# TYPE {METRIC_PREFIX}_preview_check_count_total counter",
+                f"{METRIC_PREFIX}_preview_check_count_total {total}",
+                f"# HELP {METRIC_PREFIX}_preview_scheduled_stamps Stamps in the recheck schedule.",
+                f"# TYPE {METRIC_PREFIX}_preview_scheduled_stamps gauge",
+                f"{METRIC_PREFIX}_preview_scheduled_stamps {self.scheduled}",
+                f"# HELP {METRIC_PREFIX}_preview_last_check_timestamp_seconds Time of the "
+                f"latest check.",
+                f"# TYPE {METRIC_PREFIX}_preview_last_check_timestamp_seconds gauge",
+                f"{METRIC_PREFIX}_preview_last_check_timestamp_seconds {int(self.last_check)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(counters: Counters, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve counters at /metrics from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = counters.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
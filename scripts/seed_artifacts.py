@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Per-table compressed seed artifacts and a streaming parallel loader.
+
+extract-seed-data.py --artifacts DIR writes one self-contained SQL file per
+table (DIR/<table>.sql.gz, or .sql.zst when the optional zstandard package
+is installed and --codec zstd is given) plus DIR/manifest.json with each
+table's row count, compressed size and SHA-256 of the uncompressed SQL.
+
+The loader decompresses each artifact as a stream and pipes it into its
+own mysql client process, so the SQL is never materialized on disk or in
+memory and tables load independently, several at a time. Blob references
+(see seed_blobs.py) are expanded on the way through, and every stream's
+checksum is verified against the manifest.
+
+Usage:
+    python3 scripts/seed_artifacts.py load seed-artifacts/ -u root -ptest btcstamps_test
+    python3 scripts/seed_artifacts.py load seed-artifacts/ --jobs 4 --tables StampTableV4 blocks
+    python3 scripts/seed_artifacts.py verify seed-artifacts/
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from seed_blobs import STORE_DIR, BlobStore, rehydrate
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+CODEC_SUFFIX = {'gzip': '.sql.gz', 'zstd': '.sql.zst'}
+
+
+def available_codecs() -> List[str]:
+    return ['gzip', 'zstd'] if zstandard else ['gzip']
+
+
+# newline='' throughout: CR and CRLF inside SQL string literals are data
+
+def _open_write(path: Path, codec: str):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd codec requires the zstandard package (pip install zstandard)")
+        raw = open(path, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=10).stream_writer(raw),
+                                encoding='utf-8', newline='')
+    return io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=9, mtime=0),
+                            encoding='utf-8', newline='')
+
+
+def _open_read(path: Path, codec: str):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install the zstandard package")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')),
+                                encoding='utf-8', newline='')
+    return io.TextIOWrapper(gzip.GzipFile(path, 'rb'), encoding='utf-8', newline='')
+
+
+# ============================================================
+# Writing
+# ============================================================
+
+def write_artifacts(out_dir: Path, tables: Iterable[Tuple[str, int, str]],
+                    codec: str = 'gzip') -> dict:
+    """Write (table, rows, sql) triples as compressed files plus a manifest."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    suffix = CODEC_SUFFIX[codec]
+    entries = []
+    for table, rows, sql in tables:
+        path = out_dir / f"{table}{suffix}"
+        with _open_write(path, codec) as f:
+            f.write(sql)
+        entries.append({
+            'table': table,
+            'file': path.name,
+            'rows': rows,
+            'sql_bytes': len(sql.encode('utf-8')),
+            'compressed_bytes': path.stat().st_size,
+            'sha256': hashlib.sha256(sql.encode('utf-8')).hexdigest(),
+        })
+
+    # Drop artifacts of tables that are no longer extracted
+    keep = {e['file'] for e in entries} | {MANIFEST}
+    for stale in out_dir.iterdir():
+        if stale.name not in keep and stale.name.endswith(tuple(CODEC_SUFFIX.values())):
+            stale.unlink()
+
+    manifest = {'version': MANIFEST_VERSION, 'codec': codec, 'tables': entries}
+    with open(out_dir / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return manifest
+
+
+def load_manifest(art_dir: Path) -> dict:
+    with open(art_dir / MANIFEST) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version {manifest.get('version')}")
+    return manifest
+
+
+# ============================================================
+# Loading
+# ============================================================
+
+class _Utf8Sink:
+    """Text-to-bytes adapter for a binary pipe; None discards the output."""
+
+    def __init__(self, pipe):
+        self.pipe = pipe
+
+    def write(self, text: str):
+        if self.pipe is not None:
+            self.pipe.write(text.encode('utf-8'))
+
+
+def _hashed_lines(src, sha):
+    for line in src:
+        sha.update(line.encode('utf-8'))
+        yield line
+
+
+def stream_table(art_dir: Path, entry: dict, codec: str, command: Optional[List[str]],
+                 store: BlobStore) -> dict:
+    """Stream one artifact into `command`'s stdin (or just hash it when None)."""
+    start = time.perf_counter()
+    proc = None
+    if command:
+        # stderr goes to a file: a pipe read only after stdin is done can fill and deadlock
+        errfile = tempfile.TemporaryFile()
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=errfile)
+    # The checksum covers the stored SQL, before blob references are expanded
+    sha = hashlib.sha256()
+    expanded = 0
+    error = None
+    with _open_read(art_dir / entry['file'], codec) as src:
+        try:
+            expanded = rehydrate(_hashed_lines(src, sha), store,
+                                 _Utf8Sink(proc.stdin if proc else None))
+        except BrokenPipeError:
+            error = "client closed its input"
+    if proc:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if proc.wait() != 0:
+            errfile.seek(0)
+            stderr = errfile.read().decode('utf-8', 'replace').strip()
+            error = stderr or f"client exited with {proc.returncode}"
+        errfile.close()
+    if error is None and sha.hexdigest() != entry['sha256']:
+        error = "checksum mismatch"
+    return {
+        'table': entry['table'],
+        'rows': entry['rows'],
+        'blobs': expanded,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def mysql_command(args) -> List[str]:
+    cmd = [args.client, '-h', args.host, '-P', str(args.port), '-u', args.user]
+    if args.password:
+        cmd.append(f"-p{args.password}")
+    cmd.append(args.database)
+    return cmd
+
+
+def load_artifacts(art_dir: Path, command: Optional[List[str]], jobs: int,
+                   tables: Optional[List[str]] = None, store_dir: Path = STORE_DIR) -> List[dict]:
+    manifest = load_manifest(art_dir)
+    entries = manifest['tables']
+    if tables:
+        unknown = set(tables) - {e['table'] for e in entries}
+        if unknown:
+            raise ValueError(f"Not in manifest: {', '.join(sorted(unknown))}")
+        entries = [e for e in entries if e['table'] in tables]
+    store = BlobStore(store_dir)
+    # Largest first keeps the pool busy until the end
+    entries = sorted(entries, key=lambda e: e['sql_bytes'], reverse=True)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(
+            lambda e: stream_table(art_dir, e, manifest['codec'], command, store), entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load or verify per-table seed artifacts')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('load', help='Stream artifacts into MySQL')
+    p.add_argument('dir', type=Path)
+    p.add_argument('database')
+    p.add_argument('-H', '--host', default='127.0.0.1')
+    p.add_argument('-P', '--port', type=int, default=3306)
+    p.add_argument('-u', '--user', default='root')
+    p.add_argument('-p', '--password', default=os.environ.get('MYSQL_PWD', ''))
+    p.add_argument('--client', default='mysql', help='MySQL client binary')
+    p.add_argument('--jobs', type=int, default=4, help='Tables loaded in parallel')
+    p.add_argument('--tables', nargs='+', help='Load only these tables')
+    p.add_argument('--blob-store', type=Path, default=STORE_DIR)
+
+    p = sub.add_parser('verify', help='Check artifact checksums against the manifest')
+    p.add_argument('dir', type=Path)
+    p.add_argument('--jobs', type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'load':
+        results = load_artifacts(args.dir, mysql_command(args), args.jobs, args.tables,
+                                 args.blob_store)
+    else:
+        results = load_artifacts(args.dir, None, args.jobs)
+
+    failed = 0
+    for r in sorted(results, key=lambda r: r['table']):
+        if r['error']:
+            failed += 1
+            print(f"✗ {r['table']}: {r['error']}")
+        else:
+            blobs = f", {r['blobs']} blobs" if r['blobs'] else ""
+            print(f"✓ {r['table']}: {r['rows']} rows{blobs} ({r['seconds']:.2f}s)")
+    print(f"\n{len(results) - failed}/{len(results)} tables OK "
+          f"in {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
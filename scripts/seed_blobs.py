@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for large seed cells (stamp_base64, src_data).
+
+With --externalize-blobs, extract-seed-data.py asks the server for
+SHA2(column, 256) instead of the value for every large cell. The seed SQL
+then carries a 'blob:sha256:<hex>' reference in that cell. Bodies are
+fetched only for hashes missing from the local store. The store is
+scripts/seed-blobs/<aa>/<hash>.gz: gzip-compressed and written once per
+distinct content, so stamps sharing an image share one file.
+
+Before loading, the seed SQL is rehydrated by expanding every reference
+back into an escaped SQL string:
+
+    python3 scripts/seed_blobs.py rehydrate scripts/test-seed-data.sql \\
+        | mysql -h 127.0.0.1 -u root -ptest btcstamps_test
+    python3 scripts/seed_blobs.py stats
+
+Files with no references pass through unchanged.
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+STORE_DIR = Path(__file__).resolve().parent / 'seed-blobs'
+REF_PREFIX = 'blob:sha256:'
+REF_RE = re.compile(r"'blob:sha256:([0-9a-f]{64})'")
+
+# Cells at most this long stay inline; a reference costs ~80 bytes
+MIN_BLOB_BYTES = 256
+
+# Columns worth externalizing, per table
+BLOB_COLUMNS = {
+    "StampTableV4": ("stamp_base64", "src_data"),
+}
+
+FETCH_BATCH = 100
+
+
+def sha256_text(value) -> str:
+    data = value if isinstance(value, bytes) else str(value).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """Gzip-compressed blobs on disk, addressed by SHA-256 of their content."""
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.written = 0
+        self.reused = 0
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def has(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, value) -> str:
+        """Store a value and return its hash; existing content is not rewritten."""
+        digest = sha256_text(value)
+        target = self.path(digest)
+        if target.exists():
+            self.reused += 1
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = value if isinstance(value, bytes) else str(value).encode('utf-8')
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # mtime=0 keeps the file bytes a pure function of the content
+                with gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+                    gz.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.written += 1
+        return digest
+
+    def get(self, digest: str) -> str:
+        with gzip.open(self.path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
+
+
+# ============================================================
+# Extraction side
+# ============================================================
+
+def select_clause(table: str, columns: Sequence[str]) -> Optional[str]:
+    """SELECT list returning references instead of large blob cells.
+
+    Returns None when the table has no blob columns among `columns`.
+    """
+    blob_cols = set(BLOB_COLUMNS.get(table, ())) & set(columns)
+    if not blob_cols:
+        return None
+    parts = []
+    for c in columns:
+        if c in blob_cols:
+            parts.append(
+                f"IF(LENGTH(`{c}`) > {MIN_BLOB_BYTES}, "
+                f"CONCAT('{REF_PREFIX}', SHA2(`{c}`, 256)), `{c}`) AS `{c}`")
+        else:
+            parts.append(f"`{c}`")
+    return ", ".join(parts)
+
+
+def missing_refs(store: BlobStore, table: str, columns: List[str], rows,
+                 key_col: str) -> Dict[str, List[Tuple[object, str]]]:
+    """Map column -> [(row key, hash)] for references absent from the store."""
+    key_idx = columns.index(key_col)
+    missing: Dict[str, List[Tuple[object, str]]] = {}
+    seen = set()
+    for c in BLOB_COLUMNS.get(table, ()):
+        if c not in columns:
+            continue
+        idx = columns.index(c)
+        for row in rows:
+            value = row[idx]
+            if isinstance(value, str) and value.startswith(REF_PREFIX):
+                digest = value[len(REF_PREFIX):]
+                if digest not in seen and not store.has(digest):
+                    seen.add(digest)
+                    missing.setdefault(c, []).append((row[key_idx], digest))
+    return missing
+
+
+def fetch_missing(cursor, store: BlobStore, table: str, columns: List[str], rows,
+                  key_col: str) -> int:
+    """Pull bodies for references not yet in the store; return bytes fetched."""
+    fetched = 0
+    for column, refs in missing_refs(store, table, columns, rows, key_col).items():
+        wanted = {digest for _, digest in refs}
+        for start in range(0, len(refs), FETCH_BATCH):
+            batch = refs[start:start + FETCH_BATCH]
+            ph = ",".join(["%s"] * len(batch))
+            cursor.execute(
+                f"SELECT `{column}` FROM `{table}` WHERE `{key_col}` IN ({ph})",
+                tuple(key for key, _ in batch))
+            for (value,) in cursor.fetchall():
+                if value is None:
+                    continue
+                digest = store.put(value)
+                if digest in wanted:
+                    wanted.discard(digest)
+                    fetched += len(value)
+        if wanted:
+            raise ValueError(f"{table}.{column}: {len(wanted)} blob(s) changed during "
+                             f"extraction (hash mismatch), e.g. {next(iter(wanted))}")
+    return fetched
+
+
+# ============================================================
+# Load side
+# ============================================================
+
+def sql_literal(value: str) -> str:
+    """Quote a string the way extract-seed-data.escape_sql does."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def rehydrate(lines: Iterable[str], store: BlobStore, out) -> int:
+    """Copy seed SQL to `out`, expanding blob references; return the count."""
+    expanded = 0
+
+    def expand(m):
+        nonlocal expanded
+        expanded += 1
+        return sql_literal(store.get(m.group(1)))
+
+    for line in lines:
+        if REF_PREFIX in line:
+            line = REF_RE.sub(expand, line)
+        out.write(line)
+    return expanded
+
+
+def store_stats(store: BlobStore) -> dict:
+    files = list(store.root.glob('*/*.gz')) if store.root.exists() else []
+    compressed = sum(f.stat().st_size for f in files)
+    raw = 0
+    for f in files:
+        with gzip.open(f, 'rb') as gz:
+            raw += len(gz.read())
+    return {'blobs': len(files), 'raw_bytes': raw, 'stored_bytes': compressed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed blob store tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('rehydrate', help='Expand blob references in seed SQL to stdout')
+    p.add_argument('seed', type=Path)
+    p.add_argument('--store', type=Path, default=STORE_DIR)
+    p.add_argument('-o', '--output', type=Path, help='Write to a file instead of stdout')
+    p = sub.add_parser('stats', help='Summarize the blob store')
+    p.add_argument('--store', type=Path, default=STORE_DIR)
+    args = parser.parse_args()
+
+    store = BlobStore(args.store)
+    if args.command == 'stats':
+        s = store_stats(store)
+        ratio = s['stored_bytes'] / s['raw_bytes'] if s['raw_bytes'] else 0
+        print(f"{s['blobs']} blobs, {s['raw_bytes']:,} bytes raw, "
+              f"{s['stored_bytes']:,} bytes stored ({ratio:.0%})")
+        return
+
+    # newline='' on both sides: CR/CRLF inside seed string literals is data
+    with open(args.seed, encoding='utf-8', newline='') as src:
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as out:
+                n = rehydrate(src, store, out)
+        else:
+            out = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+            n = rehydrate(src, store, out)
+            out.flush()
+            out.detach()
+    print(f"Rehydrated {n} blob reference(s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Read module-level constants from extract-seed-data.py without importing it.
+
+extract-seed-data.py imports pymysql and embeds the production connection
+config, so tools that only need TEST_VARS or TEST_SCHEMA_COLUMNS read the
+literals straight out of its source with ast.literal_eval.
+"""
+
+import ast
+from pathlib import Path
+
+EXTRACT_SCRIPT = Path(__file__).resolve().parent / 'extract-seed-data.py'
+
+
+def load_constant(name: str, path: Path = EXTRACT_SCRIPT):
+    """Return the literal value assigned to `name` at module level in `path`."""
+    tree = ast.parse(path.read_text(), filename=str(path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"{name} not defined in {path}")
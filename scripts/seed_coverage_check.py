@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Check that test-seed-data.sql has rows for every request the collections make.
+
+Indexes the seed SQL by table and key column (every primary key and indexed
+column in test-schema.sql, plus the columns route bindings look up) in one
+streaming pass, resolves each request URL with the same variables Newman CI
+uses (collection variables overridden by TEST_VARS from
+extract-seed-data.py), and reports which requests would hit empty data.
+
+The index is persisted to .cache/seed-index.json and reused while the seed
+and schema files are unchanged, so repeated checks skip the parse entirely.
+
+Usage:
+    python3 scripts/seed_coverage_check.py
+    python3 scripts/seed_coverage_check.py tests/postman/collections/smoke-tests.json
+    python3 scripts/seed_coverage_check.py --var test_stamp_id=1 --rebuild
+
+Values are compared case-insensitively, matching the utf8mb4_0900_as_ci
+collation of the test schema; BINARY columns are compared as hex.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Set, Tuple
+
+from postman_load_replay import load_variables, resolve
+from newman_timing_analyzer import url_path
+from seed_sql import iter_statements
+from sql_schema import SCHEMA_PATH, parse_schema
+from validate_test_coverage import find_all_requests
+
+SEED_PATH = Path(__file__).resolve().parent / 'test-seed-data.sql'
+COLLECTIONS_DIR = Path('tests/postman/collections')
+CACHE_PATH = Path('.cache/seed-index.json')
+INDEX_VERSION = 1
+
+STAMP_ID = [('StampTableV4', 'stamp'), ('StampTableV4', 'cpid'), ('StampTableV4', 'tx_hash')]
+
+# (path regex, {group: [(table, column), ...]}); first match wins. A group
+# is satisfied when any of its columns contains the value. Bindings with no
+# groups only require the listed tables to be non-empty; None marks routes
+# served from external APIs rather than the database.
+ROUTE_BINDINGS: List[Tuple[str, object]] = [
+    (r'/api/v2/stamps/balance/[^/]+', None),
+    (r'/api/v2/stamps/block/(?P<block>[^/]+)', {'block': [('StampTableV4', 'block_index')]}),
+    (r'/api/v2/stamps/ident/(?P<ident>[^/]+)', {'ident': [('StampTableV4', 'ident')]}),
+    (r'/api/v2/stamps/search', ['StampTableV4']),
+    (r'/api/v2/stamps/(?P<id>[^/]+)(?:/(?:dispensers|dispenses|holders|sends))?', {'id': STAMP_ID}),
+    (r'/api/v2/stamps', ['StampTableV4']),
+    (r'/api/v2/stamp/(?P<id>[^/]+)/preview', {'id': STAMP_ID}),
+    (r'/stamp/(?P<id>[^/]+)', {'id': STAMP_ID}),
+    (r'/api/v2/cursed/block/(?P<block>[^/]+)', {'block': [('StampTableV4', 'block_index')]}),
+    (r'/api/v2/cursed/(?P<id>[^/]+)', {'id': [('StampTableV4', 'stamp')]}),
+    (r'/api/v2/cursed', ['StampTableV4']),
+    (r'/api/v2/block/block_count/[^/]+', ['blocks']),
+    (r'/api/v2/block/(?P<block>[^/]+)', {'block': [('blocks', 'block_index')]}),
+    (r'/api/v2/balance/(?P<address>[^/]+)',
+     {'address': [('balances', 'address'), ('stamp_holder_cache', 'address')]}),
+    (r'/api/v2/collections/creator/(?P<address>[^/]+)',
+     {'address': [('collection_creators', 'creator_address')]}),
+    (r'/api/v2/collections/(?P<id>[^/]+)', {'id': [('collections', 'collection_id')]}),
+    (r'/api/v2/collections', ['collections']),
+    (r'/api/v2/src101/balance/(?P<address>[^/]+)', {'address': [('owners', 'owner')]}),
+    (r'/api/v2/src101/index/(?P<deploy>[^/]+)/(?P<index>[^/]+)',
+     {'deploy': [('owners', 'deploy_hash')], 'index': [('owners', 'index')]}),
+    (r'/api/v2/src101/tx/(?P<tx>[^/]+)', {'tx': [('SRC101Valid', 'tx_hash')]}),
+    (r'/api/v2/src101/tx', ['SRC101Valid']),
+    (r'/api/v2/src101/(?P<deploy>[^/]+)/address/(?P<address>[^/]+)',
+     {'deploy': [('owners', 'deploy_hash')], 'address': [('owners', 'owner')]}),
+    (r'/api/v2/src101/(?P<deploy>[^/]+)/(?:deploy|total)',
+     {'deploy': [('SRC101Valid', 'deploy_hash')]}),
+    (r'/api/v2/src101/(?P<deploy>[^/]+)/(?P<tokenid>[^/]+)',
+     {'deploy': [('owners', 'deploy_hash')], 'tokenid': [('owners', 'tokenid')]}),
+    (r'/api/v2/src101/(?P<deploy>[^/]+)', {'deploy': [('SRC101Valid', 'deploy_hash')]}),
+    (r'/api/v2/src101', ['SRC101Valid']),
+    (r'/api/v2/src20/balance/snapshot/(?P<tick>[^/]+)', {'tick': [('balances', 'tick')]}),
+    (r'/api/v2/src20/balance/(?P<address>[^/]+)/(?P<tick>[^/]+)',
+     {'address': [('balances', 'address')], 'tick': [('balances', 'tick')]}),
+    (r'/api/v2/src20/balance/(?P<address>[^/]+)', {'address': [('balances', 'address')]}),
+    (r'/api/v2/src20/block/(?P<block>[^/]+)/(?P<tick>[^/]+)',
+     {'block': [('SRC20Valid', 'block_index')], 'tick': [('SRC20Valid', 'tick')]}),
+    (r'/api/v2/src20/block/(?P<block>[^/]+)', {'block': [('SRC20Valid', 'block_index')]}),
+    (r'/api/v2/src20/tick/(?P<tick>[^/]+)(?:/deploy)?', {'tick': [('SRC20Valid', 'tick')]}),
+    (r'/api/v2/src20/tick', ['SRC20Valid']),
+    (r'/api/v2/src20/tx/(?P<tx>[^/]+)', {'tx': [('SRC20Valid', 'tx_hash')]}),
+    (r'/api/v2/src20', ['SRC20Valid']),
+    (r'/api/internal/stamp-recent-sales', ['stamp_sales_history', 'StampTableV4']),
+]
+COMPILED_BINDINGS = [(re.compile(f'^{p}/?$'), spec) for p, spec in ROUTE_BINDINGS]
+
+# Requests that are expected to miss (negative tests)
+NEGATIVE_RE = re.compile(r'invalid|error|not found|nonexistent|injection|xss|security|malformed'
+                         r'|special char|data type|encoded|edge case',
+                         re.IGNORECASE)
+
+
+# ============================================================
+# Seed index
+# ============================================================
+
+def normalize(value) -> str:
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).lower()
+
+
+def indexed_columns(schema) -> Dict[str, Set[str]]:
+    """Key columns per table: schema keys and indexes plus binding lookups."""
+    columns: Dict[str, Set[str]] = {}
+    for table in schema.values():
+        cols = columns.setdefault(table.name, set(table.primary_key))
+        for index in table.indexes:
+            cols.update(index.columns)
+    for _, spec in ROUTE_BINDINGS:
+        if isinstance(spec, dict):
+            for targets in spec.values():
+                for table, column in targets:
+                    columns.setdefault(table, set()).add(column)
+    return columns
+
+
+def build_index(seed: Path, schema_path: Path) -> dict:
+    """Index seed rows by table and key column in a single streaming pass."""
+    wanted = indexed_columns(parse_schema(schema_path))
+    tables: Dict[str, dict] = {}
+    positions: Dict[Tuple[str, tuple], List[Tuple[str, int]]] = {}
+    for table, columns, row in iter_statements(seed):
+        entry = tables.setdefault(table, {'rows': 0, 'columns': {}})
+        entry['rows'] += 1
+        key = (table, tuple(columns))
+        if key not in positions:
+            positions[key] = [(c, i) for i, c in enumerate(columns) if c in wanted.get(table, ())]
+        for column, i in positions[key]:
+            if row[i] is not None:
+                entry['columns'].setdefault(column, set()).add(normalize(row[i]))
+    return {'tables': tables}
+
+
+def _fingerprint(*paths: Path) -> list:
+    return [[str(p), p.stat().st_size, p.stat().st_mtime_ns] for p in paths]
+
+
+def load_index(seed: Path, schema_path: Path, cache: Path, rebuild: bool) -> Tuple[dict, bool]:
+    """Return (index, from_cache); rebuild and persist when inputs changed."""
+    fingerprint = _fingerprint(seed, schema_path)
+    if cache.exists() and not rebuild:
+        with open(cache) as f:
+            cached = json.load(f)
+        if cached.get('version') == INDEX_VERSION and cached.get('inputs') == fingerprint:
+            for entry in cached['tables'].values():
+                entry['columns'] = {c: set(v) for c, v in entry['columns'].items()}
+            return cached, True
+
+    index = build_index(seed, schema_path)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    serializable = {
+        'version': INDEX_VERSION,
+        'inputs': fingerprint,
+        'tables': {
+            t: {'rows': e['rows'], 'columns': {c: sorted(v) for c, v in e['columns'].items()}}
+            for t, e in index['tables'].items()
+        },
+    }
+    with open(cache, 'w') as f:
+        json.dump(serializable, f)
+    return index, False
+
+
+def has_value(index: dict, table: str, column: str, value: str) -> bool:
+    entry = index['tables'].get(table)
+    return bool(entry) and normalize(value) in entry['columns'].get(column, ())
+
+
+def tables_containing(index: dict, value: str) -> List[str]:
+    """Every table.column whose indexed values include `value`."""
+    needle = normalize(value)
+    return [f"{t}.{c}" for t, e in index['tables'].items()
+            for c, values in e['columns'].items() if needle in values]
+
+
+# ============================================================
+# Collection checks
+# ============================================================
+
+def check_request(index: dict, path: str) -> Tuple[str, List[str]]:
+    """Return (status, details) for one resolved request path."""
+    for pattern, spec in COMPILED_BINDINGS:
+        match = pattern.match(path)
+        if not match:
+            continue
+        if spec is None:
+            return 'EXTERNAL', []
+        if isinstance(spec, list):
+            empty = [t for t in spec if not index['tables'].get(t, {}).get('rows')]
+            return ('EMPTY', [f"{t} has no rows" for t in empty]) if empty else ('OK', [])
+        missing = []
+        for group, targets in spec.items():
+            value = match.group(group)
+            if not any(has_value(index, t, c, value) for t, c in targets):
+                cols = ' | '.join(f"{t}.{c}" for t, c in targets)
+                missing.append(f"{value} not in {cols}")
+        return ('EMPTY', missing) if missing else ('OK', [])
+    return 'UNMAPPED', []
+
+
+def check_collections(paths: Sequence[Path], index: dict, overrides: Dict[str, str]) -> dict:
+    collections = []
+    for path in paths:
+        with open(path) as f:
+            collections.append(json.load(f))
+    variables = load_variables(collections, None, 'http://localhost:8000', overrides)
+
+    results = []
+    used_vars: Dict[str, str] = {}
+    for path, data in zip(paths, collections):
+        for req in find_all_requests(data['item']):
+            request = req['item'].get('request', {})
+            url = request.get('url', '') if isinstance(request, dict) else request
+            raw = url.get('raw', '') if isinstance(url, dict) else url
+            for var in re.findall(r'\{\{([^{}]+)\}\}', raw):
+                if var in variables and not var.lower().endswith(('base_url', 'baseurl')):
+                    used_vars[var] = variables[var]
+            resolved = url_path(resolve(raw, variables))
+            status, details = check_request(index, resolved)
+            if status == 'EMPTY' and NEGATIVE_RE.search(req['path']):
+                status = 'EXPECTED_MISS'
+            results.append({'collection': path.name, 'request': req['path'],
+                            'path': resolved, 'status': status, 'details': details})
+    return {'results': results, 'variables': used_vars}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check seed data covers the Newman collections")
+    parser.add_argument('collections', nargs='*', type=Path,
+                        help='Collections to check (default: all in tests/postman/collections)')
+    parser.add_argument('--seed', type=Path, default=SEED_PATH)
+    parser.add_argument('--schema', type=Path, default=SCHEMA_PATH)
+    parser.add_argument('--cache', type=Path, default=CACHE_PATH,
+                        help=f'Persisted seed index (default: {CACHE_PATH})')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the cached index')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a variable (repeatable)')
+    parser.add_argument('--verbose', action='store_true', help='List OK requests too')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Seed Data Sufficiency Check")
+    print("=" * 70)
+    print()
+
+    start = time.perf_counter()
+    index, cached = load_index(args.seed, args.schema, args.cache, args.rebuild)
+    elapsed = time.perf_counter() - start
+    total_rows = sum(e['rows'] for e in index['tables'].values())
+    source = 'cache' if cached else 'seed parse'
+    print(f"Seed index: {len(index['tables'])} tables, {total_rows} rows "
+          f"({source}, {elapsed * 1000:.0f}ms)")
+    print()
+
+    paths = args.collections or sorted(COLLECTIONS_DIR.glob('*.json'))
+    overrides = dict(v.split('=', 1) for v in args.var)
+    report = check_collections(paths, index, overrides)
+
+    print("VARIABLES:")
+    for var, value in sorted(report['variables'].items()):
+        found = tables_containing(index, value)
+        mark = '✓' if found else '✗'
+        print(f"  {mark} {var} = {value}")
+        if found:
+            print(f"      in {', '.join(found[:6])}{' ...' if len(found) > 6 else ''}")
+    print()
+
+    by_status: Dict[str, List[dict]] = {}
+    for r in report['results']:
+        by_status.setdefault(r['status'], []).append(r)
+
+    empty = by_status.get('EMPTY', [])
+    if empty:
+        print(f"REQUESTS THAT WOULD HIT EMPTY DATA ({len(empty)}):")
+        for r in empty:
+            print(f"  ✗ [{r['collection']}] {r['request']}")
+            for detail in r['details']:
+                print(f"      - {detail}")
+        print()
+    if args.verbose:
+        for r in by_status.get('OK', []):
+            print(f"  ✓ [{r['collection']}] {r['request']}")
+        print()
+
+    print("SUMMARY:")
+    for status in ('OK', 'EMPTY', 'EXPECTED_MISS', 'EXTERNAL', 'UNMAPPED'):
+        print(f"  {status:<14} {len(by_status.get(status, []))}")
+    print(f"\nTotal time: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    return 1 if empty else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
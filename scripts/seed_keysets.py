@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Session key sets for extract-seed-data.py.
+
+extract_all gathers keys from one table (cpids, creators, tx hashes, deploy
+hashes) and filters dependent tables by them. Sending those sets back as
+`IN (%s, %s, ...)` lists repeats every value in every query, and long
+IN-lists are planned poorly. KeySets loads each set once into an indexed
+session TEMPORARY TABLE with a bulk insert and hands out fragments that
+join against it instead. With a stats dict, each load records its row
+count, bytes sent and time so --query-stats can compare the two modes.
+
+The temporary table copies the source column's type and collation via
+CREATE ... SELECT ... LIMIT 0, so the join compares like with like. MySQL
+cannot open one TEMPORARY table twice in a single statement, so each
+key set may appear in at most one fragment per query_union call.
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+import pymysql
+
+# Sets this small are cheaper to inline than to load
+INLINE_MAX = 32
+
+
+class KeyFilter(NamedTuple):
+    """Plan fragment restricting `column` to a key set gathered earlier."""
+    keyset: str
+    column: str
+    rest: str = ""
+
+
+class KeySets:
+    """Load key sets into TEMPORARY TABLEs and build fragments that use them."""
+
+    def __init__(self, cursor, mode: str = "temp", inline_max: int = INLINE_MAX,
+                 stats: Optional[dict] = None):
+        self.cursor = cursor
+        self.mode = mode
+        self.inline_max = inline_max
+        self.stats = stats
+        self.values = {}
+        self.tables = {}
+
+    def load(self, name: str, values, source_table: str, source_column: str):
+        """Register a key set, loading it server-side when it is worth it."""
+        values = sorted(v for v in set(values) if v is not None)
+        self.values[name] = values
+        if self.mode != "temp" or len(values) <= self.inline_max:
+            return
+        tmp = f"_keys_{name}"
+        if self.stats is not None:
+            sent = self._bytes_received()
+            start = time.perf_counter()
+        try:
+            self.cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS `{tmp}`")
+            self.cursor.execute(
+                f"CREATE TEMPORARY TABLE `{tmp}` (KEY (`k`)) "
+                f"SELECT `{source_column}` AS `k` FROM `{source_table}` LIMIT 0")
+            # Values are already distinct; executemany batches multi-row INSERTs
+            self.cursor.executemany(f"INSERT INTO `{tmp}` (`k`) VALUES (%s)", values)
+        except pymysql.err.MySQLError as e:
+            print(f"  ⚠ Could not create temporary key table for {name} ({e}); using IN-list")
+            return
+        self.tables[name] = tmp
+        if self.stats is not None:
+            self.stats[f"keys:{name}"] = {
+                "rows": len(values),
+                "Bytes_received": self._bytes_received() - sent,
+                "ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+
+    def _bytes_received(self) -> int:
+        self.cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_received'")
+        return int(self.cursor.fetchone()[1])
+
+    def filter(self, name: str, table: str, column: str, rest: str = ""):
+        """Return (clause, params) restricting `table`.`column` to the key set.
+
+        The clause goes straight after `FROM `table`` in query_union, so it is
+        either an INNER JOIN against the key table or a WHERE ... IN list.
+        """
+        tmp = self.tables.get(name)
+        if tmp:
+            clause = f"INNER JOIN `{tmp}` ON `{tmp}`.`k` = `{table}`.`{column}`"
+            return f"{clause} {rest}".strip(), ()
+        values = self.values[name]
+        ph = ",".join(["%s"] * len(values))
+        return f"WHERE `{column}` IN ({ph}) {rest}".strip(), tuple(values)
+
+    def has(self, name: str) -> bool:
+        return bool(self.values.get(name))
+
+    def close(self):
+        for tmp in self.tables.values():
+            self.cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS `{tmp}`")
+        self.tables.clear()
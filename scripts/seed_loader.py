@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Parallel test-database loader with deferred secondary index builds.
+
+Replaying test-schema.sql and test-seed-data.sql through one mysql client
+inserts every row into tables that already carry all their secondary
+indexes, one statement at a time. This loader instead:
+
+  1. drops and recreates every table from test-schema.sql with only its
+     primary and UNIQUE keys (sql_schema.Table.create_statement(
+     with_indexes=False, keep_unique=True));
+  2. loads tables concurrently over --jobs connections, largest first,
+     with foreign_key_checks off, as multi-row REPLACEs of at most
+     --batch-bytes each;
+  3. builds each table's non-unique indexes in one ALTER TABLE, again in
+     parallel, then creates the schema's views.
+
+UNIQUE keys exist during the load and unique_checks stays on, so a
+REPLACE that collides on any unique key deletes the older row exactly as
+it does when the seed is piped through the mysql client.
+
+Seed rows are copied as raw SQL tuples (seed_sql.iter_statements with
+decode=False); seed_blobs references are expanded on the way through.
+
+Usage:
+    python3 scripts/seed_loader.py --database btcstamps_test --password test
+    python3 scripts/seed_loader.py --jobs 8 --seed scripts/test-seed-data.sql
+"""
+
+import argparse
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pymysql
+
+from seed_blobs import REF_PREFIX, REF_RE, STORE_DIR, BlobStore, sql_literal
+from seed_sql import iter_statements
+from sql_schema import SCHEMA_PATH, Table, parse_schema, parse_views
+
+SEED_PATH = Path(__file__).resolve().parent / 'test-seed-data.sql'
+BATCH_BYTES = 4 << 20
+
+# unique_checks stays on: REPLACE must see every UNIQUE key conflict
+SESSION_SETUP = (
+    "SET SESSION foreign_key_checks = 0",
+)
+
+
+def read_seed(seed: Path, store: BlobStore) -> Dict[str, List[Tuple[List[str], List[str]]]]:
+    """Group raw row tuples by table, as [(columns, rows)] per column list."""
+    tables: Dict[str, List[Tuple[List[str], List[str]]]] = {}
+
+    def expand(m):
+        return sql_literal(store.get(m.group(1)))
+
+    for table, columns, row in iter_statements(seed, decode=False):
+        if REF_PREFIX in row:
+            row = REF_RE.sub(expand, row)
+        groups = tables.setdefault(table, [])
+        if not groups or groups[-1][0] != columns:
+            groups.append((columns, []))
+        groups[-1][1].append(row)
+    return tables
+
+
+class ConnectionPool:
+    """Fixed set of connections configured for bulk loading."""
+
+    def __init__(self, size: int, **connect_args):
+        self.connections: queue.Queue = queue.Queue()
+        for _ in range(size):
+            conn = pymysql.connect(autocommit=False, **connect_args)
+            with conn.cursor() as cur:
+                for stmt in SESSION_SETUP:
+                    cur.execute(stmt)
+            self.connections.put(conn)
+
+    def run(self, fn, *args):
+        conn = self.connections.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self.connections.put(conn)
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+
+def load_table(conn, table: str, groups, batch_bytes: int) -> dict:
+    start = time.perf_counter()
+    rows = 0
+    with conn.cursor() as cur:
+        for columns, values in groups:
+            head = f"REPLACE INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) VALUES "
+            batch, size = [], 0
+            for value in values:
+                if batch and size + len(value) > batch_bytes:
+                    cur.execute(head + ",".join(batch))
+                    batch, size = [], 0
+                batch.append(value)
+                size += len(value) + 1
+            if batch:
+                cur.execute(head + ",".join(batch))
+            rows += len(values)
+    conn.commit()
+    return {'table': table, 'rows': rows, 'load_s': time.perf_counter() - start}
+
+
+def build_indexes(conn, statements: List[str]) -> float:
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for stmt in statements:
+            cur.execute(stmt)
+    return time.perf_counter() - start
+
+
+def connect_args(args) -> dict:
+    return dict(host=args.host, port=args.port, user=args.user,
+                password=args.password, database=args.database, charset='utf8mb4')
+
+
+def create_tables(conn, schema: Dict[str, Table]):
+    """Drop and recreate every table with only its primary and UNIQUE keys."""
+    phase = time.perf_counter()
+    with conn.cursor() as cur:
+        for stmt in SESSION_SETUP:
+            cur.execute(stmt)
+        for name, table in schema.items():
+            cur.execute(f"DROP TABLE IF EXISTS `{name}`")
+            cur.execute(table.create_statement(with_indexes=False, keep_unique=True))
+    print(f"Created {len(schema)} tables without non-unique indexes "
+          f"in {time.perf_counter() - phase:.2f}s")
+
+
+def load_parallel(pool: ConnectionPool, jobs: int, order: List[str], fn, *args,
+                  verb: str = 'Loaded') -> Dict[str, dict]:
+    """Run fn(conn, table, *args) for each table over the pool; keyed results."""
+    phase = time.perf_counter()
+    results: Dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        for r in ex.map(lambda t: pool.run(fn, t, *args), order):
+            results[r['table']] = r
+    print(f"{verb} {sum(r['rows'] for r in results.values())} rows "
+          f"in {time.perf_counter() - phase:.2f}s over {jobs} connections")
+    return results
+
+
+def build_all_indexes(pool: ConnectionPool, jobs: int, schema: Dict[str, Table],
+                      results: Dict[str, dict]):
+    """Add every table's non-unique indexes, biggest tables first."""
+    phase = time.perf_counter()
+    indexed = [name for name, t in schema.items() if t.index_statements(unique=False)]
+    indexed.sort(key=lambda t: results.get(t, {}).get('rows', 0), reverse=True)
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        times = ex.map(lambda t: pool.run(build_indexes, schema[t].index_statements(unique=False)),
+                       indexed)
+        for name, seconds in zip(indexed, times):
+            results.setdefault(name, {'table': name, 'rows': 0, 'load_s': 0.0})
+            results[name]['index_s'] = seconds
+            results[name]['indexes'] = sum(not i.unique for i in schema[name].indexes)
+    print(f"Built non-unique indexes in {time.perf_counter() - phase:.2f}s")
+
+
+def create_views(conn, schema_path: Path):
+    with conn.cursor() as cur:
+        for stmt in parse_views(schema_path):
+            cur.execute(stmt)
+
+
+def run(args) -> List[dict]:
+    schema = parse_schema(args.schema)
+    store = BlobStore(args.blob_store)
+
+    phase = time.perf_counter()
+    seed = read_seed(args.seed, store)
+    unknown = set(seed) - set(schema)
+    if unknown:
+        raise ValueError(f"Seed rows for tables missing from the schema: {sorted(unknown)}")
+    print(f"Parsed seed in {time.perf_counter() - phase:.2f}s")
+
+    conn = pymysql.connect(autocommit=True, **connect_args(args))
+    create_tables(conn, schema)
+    pool = ConnectionPool(args.jobs, **connect_args(args))
+    try:
+        # Largest first so the long tail doesn't start last
+        order = sorted(seed, key=lambda t: sum(len(r) for _, rows in seed[t] for r in rows),
+                       reverse=True)
+        results = load_parallel(pool, args.jobs, order,
+                                lambda conn, t: load_table(conn, t, seed[t], args.batch_bytes))
+        build_all_indexes(pool, args.jobs, schema, results)
+    finally:
+        pool.close()
+    create_views(conn, args.schema)
+    conn.close()
+    return sorted(results.values(), key=lambda r: r['table'])
+
+
+def add_connection_args(parser: argparse.ArgumentParser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''))
+    parser.add_argument('--database', default='btcstamps_test')
+    parser.add_argument('--jobs', type=int, default=4, help='Parallel connections')
+
+
+def print_report(results: List[dict]):
+    print()
+    print("=" * 60)
+    print(f"{'table':<26} {'rows':>7} {'load s':>8} {'indexes':>8} {'index s':>8}")
+    print("=" * 60)
+    for r in results:
+        print(f"{r['table']:<26} {r['rows']:>7} {r['load_s']:>8.3f} "
+              f"{r.get('indexes', 0):>8} {r.get('index_s', 0.0):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load the Newman test database in parallel')
+    add_connection_args(parser)
+    parser.add_argument('--schema', type=Path, default=SCHEMA_PATH)
+    parser.add_argument('--seed', type=Path, default=SEED_PATH)
+    parser.add_argument('--blob-store', type=Path, default=STORE_DIR)
+    parser.add_argument('--batch-bytes', type=int, default=BATCH_BYTES,
+                        help='Maximum size of one multi-row REPLACE')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        results = run(args)
+    except (pymysql.err.MySQLError, ValueError) as e:
+        print(f"✗ Load failed: {e}")
+        sys.exit(1)
+
+    print_report(results)
+    print(f"\n✓ Test database ready in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
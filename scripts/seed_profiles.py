@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Seed profiles: several seed variants from one extraction.
+
+A profile in extract-seed-data.py's SEED_PROFILES layers limits and extra
+fragments on EXTRACT_PLAN:
+
+    {"output": path, "scale": 0.2, "extra": {table: [fragment, ...]}}
+
+"scale" multiplies every trailing LIMIT in the plan (plain fragments,
+KeyFilter rests and key queries) and top_k's k, never going below 1.
+"extra" fragments are added, as written, to that profile only.
+
+merge_step turns one plan step into the fragments that actually run, each
+at the largest limit any profile asks for, and records every profile's own
+limit per fragment. Once the rows are in memory, select_rows cuts each
+profile back out: the first `limit` rows of every fragment it uses, then
+deduplicated in fragment order like query_union. With ORDER BY that prefix
+is exactly what the profile's own query returns; without it, a LIMIT picks
+arbitrary rows anyway.
+
+KeyFilter fragments run once against the union of all profiles' key sets.
+Each profile keeps only the rows that match its own keys. A limited
+KeyFilter can therefore give a smaller profile fewer rows than a
+standalone run would, but never rows outside its key set.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from seed_keysets import KeyFilter
+
+LIMIT_RE = re.compile(r"\bLIMIT\s+(\d+)\s*$", re.IGNORECASE)
+
+
+def scale_limit(limit: int, scale: float) -> int:
+    return max(1, int(round(limit * scale)))
+
+
+def clause_limit(clause: str) -> Optional[int]:
+    m = LIMIT_RE.search(clause)
+    return int(m.group(1)) if m else None
+
+
+def with_limit(clause: str, limit: int) -> str:
+    return LIMIT_RE.sub(f"LIMIT {int(limit)}", clause)
+
+
+def _clause(fragment) -> str:
+    return fragment.rest if isinstance(fragment, KeyFilter) else fragment[0]
+
+
+def _with_fragment_limit(fragment, limit: int):
+    if isinstance(fragment, KeyFilter):
+        return fragment._replace(rest=with_limit(fragment.rest, limit))
+    return (with_limit(fragment[0], limit), fragment[1])
+
+
+def profile_fragments(step: dict, profile: dict) -> List[Tuple[object, Optional[int]]]:
+    """(fragment, limit) pairs one profile runs for a step; None is unlimited."""
+    scale = profile.get("scale", 1)
+    out = []
+    for fragment in step.get("fragments", ()):
+        limit = clause_limit(_clause(fragment))
+        out.append((fragment, None if limit is None else scale_limit(limit, scale)))
+    for fragment in profile.get("extra", {}).get(step["table"], ()):
+        out.append((fragment, clause_limit(_clause(fragment))))
+    return out
+
+
+def merge_step(step: dict, profiles: Dict[str, dict]) -> List[Tuple[object, Dict[str, Optional[int]]]]:
+    """Fragments to run for all profiles, with each profile's limit on them.
+
+    Profiles that don't use a fragment are absent from its limits dict.
+    """
+    limits: Dict[object, Dict[str, Optional[int]]] = {}
+    for name, profile in profiles.items():
+        for fragment, limit in profile_fragments(step, profile):
+            limits.setdefault(fragment, {})[name] = limit
+    merged = []
+    for fragment, per_profile in limits.items():
+        if None not in per_profile.values():
+            fragment = _with_fragment_limit(fragment, max(per_profile.values()))
+        merged.append((fragment, per_profile))
+    return merged
+
+
+def merge_key_query(sql: str, profiles: Dict[str, dict]) -> Tuple[str, Dict[str, Optional[int]]]:
+    """Key query at the largest scaled LIMIT, plus each profile's prefix length."""
+    limit = clause_limit(sql)
+    if limit is None:
+        return sql, {name: None for name in profiles}
+    per_profile = {name: scale_limit(limit, p.get("scale", 1)) for name, p in profiles.items()}
+    return with_limit(sql, max(per_profile.values())), per_profile
+
+
+def merge_k(k: int, profiles: Dict[str, dict]) -> Dict[str, int]:
+    return {name: scale_limit(k, p.get("scale", 1)) for name, p in profiles.items()}
+
+
+def select_rows(results, name: str, rows: dict, accept=None) -> list:
+    """Cut one profile's rows out of merged fragment results.
+
+    results is [(fragment, limits, keys)] in plan order, where keys are the
+    row keys the fragment returned, in order, and rows maps key -> row.
+    accept(fragment, row) may reject rows; rejected rows don't count toward
+    the limit, as if the profile's own query had never seen them.
+    """
+    seen = set()
+    out = []
+    for fragment, limits, keys in results:
+        if name not in limits:
+            continue
+        limit = limits[name]
+        taken = 0
+        for key in keys:
+            if limit is not None and taken >= limit:
+                break
+            row = rows[key]
+            if accept is not None and not accept(fragment, row):
+                continue
+            # LIMIT applies per fragment, before the union drops duplicates
+            taken += 1
+            if key not in seen:
+                seen.add(key)
+                out.append(row)
+    return out
+
+
+def top_k_rows(columns: List[str], rows, group_col: str, order_col: str, k: int) -> list:
+    """First k rows by order_col per group_col, from a larger top-K sample."""
+    g, o = columns.index(group_col), columns.index(order_col)
+    counts: Dict[object, int] = {}
+    out = []
+    for row in sorted(rows, key=lambda r: (r[g], r[o])):
+        n = counts.get(row[g], 0)
+        if n < k:
+            counts[row[g]] = n + 1
+            out.append(row)
+    return out
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Per-group top-K sampling for extract-seed-data.py.
+
+Sampling "the first K rows of every group" with ROW_NUMBER() OVER
+(PARTITION BY ...) makes the server read, materialize and sort the whole
+table before the rn <= K filter applies. When (group_col, order_col) is a
+prefix of an index, each group's top K is a bounded index range read
+instead, so the sampler issues exactly those reads:
+
+  * group keys come from a loose index scan (SELECT DISTINCT group_col),
+    or are passed in by the caller;
+  * on MySQL >= 8.0.14 all groups are read in one LATERAL join;
+  * elsewhere (MariaDB, older MySQL) groups are read in batches of
+    UNION ALL'd `(SELECT ... WHERE group_col = %s ORDER BY ... LIMIT K)`.
+
+Cost is proportional to groups x K rather than to table size.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+BATCH_SIZE = 200
+
+# MySQL added LATERAL derived tables in 8.0.14; MariaDB has no LATERAL
+LATERAL_MIN_VERSION = (8, 0, 14)
+
+
+def server_supports_lateral(cursor) -> bool:
+    """Return True if the connected server accepts LATERAL derived tables."""
+    cursor.execute("SELECT VERSION()")
+    version = cursor.fetchone()[0]
+    if 'mariadb' in version.lower():
+        return False
+    m = re.match(r'(\d+)\.(\d+)\.(\d+)', version)
+    return bool(m) and tuple(int(p) for p in m.groups()) >= LATERAL_MIN_VERSION
+
+
+def distinct_groups(cursor, table: str, group_col: str) -> List[object]:
+    """Group keys via a loose index scan on the leading index column."""
+    cursor.execute(f"SELECT DISTINCT `{group_col}` FROM `{table}` ORDER BY `{group_col}`")
+    return [r[0] for r in cursor.fetchall()]
+
+
+def _lateral_sql(table: str, columns: Sequence[str], group_col: str,
+                 order_col: str, k: int) -> str:
+    select = ", ".join(f"sampled.`{c}`" for c in columns)
+    inner = ", ".join(f"`{c}`" for c in columns)
+    return (
+        f"SELECT {select} FROM "
+        f"(SELECT DISTINCT `{group_col}` AS g FROM `{table}`) grp, "
+        f"LATERAL (SELECT {inner} FROM `{table}` "
+        f"WHERE `{group_col}` = grp.g ORDER BY `{order_col}` LIMIT {int(k)}) sampled"
+    )
+
+
+def _batch_sql(table: str, columns: Sequence[str], group_col: str,
+               order_col: str, k: int, n: int) -> str:
+    select = ", ".join(f"`{c}`" for c in columns)
+    part = (f"(SELECT {select} FROM `{table}` WHERE `{group_col}` = %s "
+            f"ORDER BY `{order_col}` LIMIT {int(k)})")
+    return " UNION ALL ".join([part] * n)
+
+
+def sample_top_k(cursor, table: str, columns: Sequence[str], group_col: str,
+                 order_col: str, k: int, groups: Optional[Sequence] = None,
+                 use_lateral: Optional[bool] = None) -> Tuple[List[str], list]:
+    """Return (columns, rows) holding the first k rows by order_col per group.
+
+    Requires an index with (group_col, order_col) as its leading columns.
+    When groups is None every group in the table is sampled; use_lateral
+    defaults to what the server supports.
+    """
+    columns = list(columns)
+    if use_lateral is None:
+        use_lateral = groups is None and server_supports_lateral(cursor)
+
+    if use_lateral:
+        cursor.execute(_lateral_sql(table, columns, group_col, order_col, k))
+        return columns, list(cursor.fetchall())
+
+    if groups is None:
+        groups = distinct_groups(cursor, table, group_col)
+    rows: list = []
+    for start in range(0, len(groups), BATCH_SIZE):
+        batch = list(groups[start:start + BATCH_SIZE])
+        cursor.execute(_batch_sql(table, columns, group_col, order_col, k, len(batch)),
+                       tuple(batch))
+        rows.extend(cursor.fetchall())
+    return columns, rows
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Prebuilt test-database snapshots keyed by the seed inputs.
+
+The key is a SHA-256 over test-schema.sql, test-seed-data.sql and the
+TEST_SCHEMA_COLUMNS map in extract-seed-data.py. A snapshot is the
+mysqldump --tab layout written by the server itself: one <table>.txt per
+table from SELECT ... INTO OUTFILE, plus a manifest with the key and row
+counts. It lives in <snapshot dir>/<key>/.
+
+`restore` recomputes the key. If a snapshot exists for it, tables are
+recreated without non-unique indexes, filled with LOAD DATA INFILE over
+parallel connections, checked against the manifest row counts, and then
+indexed. Otherwise the database is loaded from the seed with seed_loader
+and a snapshot is taken, so only changed inputs pay for a full rebuild.
+
+The server must be able to read and write the snapshot directory, so this
+is meant for a local MariaDB/MySQL. When secure_file_priv names a
+directory, snapshots default to it.
+
+Usage:
+    python3 scripts/seed_snapshot.py status
+    python3 scripts/seed_snapshot.py restore --password test
+    python3 scripts/seed_snapshot.py build --password test --snapshot-dir /var/lib/mysql-files
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pymysql
+
+from seed_blobs import STORE_DIR
+from seed_constants import EXTRACT_SCRIPT, load_constant
+from seed_loader import (BATCH_BYTES, SEED_PATH, ConnectionPool, add_connection_args,
+                         build_all_indexes, connect_args, create_tables, create_views,
+                         load_parallel, print_report)
+from seed_loader import run as load_from_seed
+from sql_schema import SCHEMA_PATH, parse_schema
+
+SNAPSHOT_VERSION = 1
+MANIFEST = 'manifest.json'
+DEFAULT_DIR = Path('/tmp/btcstamps-db-snapshots')
+
+
+def input_key(schema: Path, seed: Path, extract_script: Path = EXTRACT_SCRIPT) -> str:
+    """Content hash of everything that determines the loaded database."""
+    sha = hashlib.sha256(f"snapshot-v{SNAPSHOT_VERSION}\0".encode())
+    for path in (schema, seed):
+        sha.update(f"{path.name}\0".encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+    columns = load_constant('TEST_SCHEMA_COLUMNS', extract_script)
+    sha.update(json.dumps(columns, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def snapshot_base(conn, requested: Optional[Path]) -> Path:
+    """Directory the server may write snapshots to."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT @@secure_file_priv")
+        priv = cur.fetchone()[0]
+    if priv is None:
+        raise ValueError("secure_file_priv is NULL: the server cannot read or write files")
+    if requested:
+        return requested.resolve()
+    return Path(priv).resolve() if priv else DEFAULT_DIR
+
+
+def read_manifest(snap: Path) -> Optional[dict]:
+    try:
+        with open(snap / MANIFEST) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def dump_table(conn, table: str, snap: Path) -> dict:
+    start = time.perf_counter()
+    path = snap / f"{table}.txt"
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT * INTO OUTFILE %s CHARACTER SET utf8mb4 FROM `{table}`",
+                    (str(path),))
+        cur.execute(f"SELECT COUNT(*) FROM `{table}`")
+        rows = cur.fetchone()[0]
+    return {'table': table, 'rows': rows, 'load_s': time.perf_counter() - start}
+
+
+def build(args, key: str, base: Path) -> dict:
+    """Load the database from the seed, then snapshot it under `key`."""
+    results = load_from_seed(args)
+    print_report(results)
+
+    partial = base / f"{key}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    # The server writes the data files, often as a different OS user
+    partial.chmod(0o777)
+
+    schema = parse_schema(args.schema)
+    pool = ConnectionPool(args.jobs, **connect_args(args))
+    try:
+        dumped = load_parallel(pool, args.jobs, list(schema),
+                               lambda conn, t: dump_table(conn, t, partial), verb='Dumped')
+    finally:
+        pool.close()
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'key': key,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'tables': {t: r['rows'] for t, r in sorted(dumped.items())},
+    }
+    with open(partial / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    final = base / key
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(partial, final)
+    print(f"✓ Snapshot {key[:12]} written to {final}")
+    return manifest
+
+
+# ============================================================
+# Restore
+# ============================================================
+
+def load_data(conn, table: str, snap: Path) -> dict:
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f"LOAD DATA INFILE %s INTO TABLE `{table}` CHARACTER SET utf8mb4",
+                    (str(snap / f"{table}.txt"),))
+        cur.execute(f"SELECT COUNT(*) FROM `{table}`")
+        rows = cur.fetchone()[0]
+    conn.commit()
+    return {'table': table, 'rows': rows, 'load_s': time.perf_counter() - start}
+
+
+def restore(args, snap: Path, manifest: dict) -> list:
+    schema = parse_schema(args.schema)
+    missing = set(schema) - set(manifest['tables'])
+    if missing:
+        raise ValueError(f"Snapshot lacks tables: {sorted(missing)}")
+
+    conn = pymysql.connect(autocommit=True, **connect_args(args))
+    create_tables(conn, schema)
+    pool = ConnectionPool(args.jobs, **connect_args(args))
+    try:
+        order = sorted(schema, key=lambda t: manifest['tables'][t], reverse=True)
+        results = load_parallel(pool, args.jobs, order,
+                                lambda c, t: load_data(c, t, snap))
+        wrong = {t: (r['rows'], manifest['tables'][t]) for t, r in results.items()
+                 if r['rows'] != manifest['tables'][t]}
+        if wrong:
+            raise ValueError(f"Row counts differ from the snapshot manifest: {wrong}")
+        build_all_indexes(pool, args.jobs, schema, results)
+    finally:
+        pool.close()
+    create_views(conn, args.schema)
+    conn.close()
+    return sorted(results.values(), key=lambda r: r['table'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or restore test-database snapshots')
+    parser.add_argument('command', choices=['status', 'build', 'restore'])
+    add_connection_args(parser)
+    parser.add_argument('--schema', type=Path, default=SCHEMA_PATH)
+    parser.add_argument('--seed', type=Path, default=SEED_PATH)
+    parser.add_argument('--blob-store', type=Path, default=STORE_DIR)
+    parser.add_argument('--batch-bytes', type=int, default=BATCH_BYTES)
+    parser.add_argument('--snapshot-dir', type=Path,
+                        help=f"Where snapshots live (default: secure_file_priv or {DEFAULT_DIR})")
+    parser.add_argument('--no-build', action='store_true',
+                        help='With restore: fail instead of rebuilding on a cache miss')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    key = input_key(args.schema, args.seed)
+    if args.command == 'status':
+        note = ''
+        if args.snapshot_dir:
+            base = args.snapshot_dir.resolve()
+        else:
+            # Same directory build and restore would use; offline, say we guessed
+            try:
+                conn = pymysql.connect(**connect_args(args))
+                base = snapshot_base(conn, None)
+                conn.close()
+            except (pymysql.err.MySQLError, ValueError) as e:
+                base = DEFAULT_DIR
+                note = f"\n⚠ Server unavailable ({e}); showing the fallback directory"
+        snap = base / key
+        state = 'present' if read_manifest(snap) else 'missing'
+        print(f"Input key: {key}")
+        print(f"Snapshot:  {snap} ({state}){note}")
+        return
+
+    try:
+        conn = pymysql.connect(**connect_args(args))
+        base = snapshot_base(conn, args.snapshot_dir)
+        conn.close()
+        snap = base / key
+        manifest = read_manifest(snap)
+
+        if args.command == 'restore' and manifest is not None:
+            if manifest.get('key') != key or manifest.get('version') != SNAPSHOT_VERSION:
+                raise ValueError(f"Manifest in {snap} does not match input key {key[:12]}")
+            print(f"Restoring snapshot {key[:12]} from {snap}")
+            print_report(restore(args, snap, manifest))
+        elif args.command == 'restore' and args.no_build:
+            print(f"✗ No snapshot for input key {key[:12]} in {base}")
+            sys.exit(1)
+        else:
+            if args.command == 'restore':
+                print(f"No snapshot for input key {key[:12]}; loading from seed")
+            build(args, key, base)
+    except (pymysql.err.MySQLError, ValueError, OSError) as e:
+        print(f"✗ Snapshot {args.command} failed: {e}")
+        sys.exit(1)
+
+    print(f"\n✓ Test database ready in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for the seed SQL written by extract-seed-data.py.
+
+test-seed-data.sql is a sequence of `REPLACE INTO `table` (cols) VALUES
+(...), (...);` statements (plus a few hand-written INSERTs) separated by
+comments and SET statements. The reader tokenizes it with anchored regexes
+over a rolling buffer, so memory stays bounded by the largest single row
+and throughput is set by the C regex engine rather than a per-character
+Python loop.
+
+Values are decoded back to Python: NULL -> None, TRUE/FALSE -> 1/0,
+numbers -> int/float, X'..' -> bytes, and quoted strings are unescaped
+(extract-seed-data.escape_sql only escapes backslashes and single quotes).
+"""
+
+import re
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+_STRING = r"'[^'\\]*(?:\\.[^'\\]*)*'"
+TOKEN_RE = re.compile(
+    r"(?P<skip>[\s,;]+)"
+    r"|(?P<comment>--[^\n]*(?:\n|$))"
+    r"|(?P<header>(?:REPLACE|INSERT)\s+INTO\s+`?(?P<table>\w+)`?\s*\((?P<cols>[^)]*)\)\s*VALUES)"
+    r"|(?P<row>\((?:" + _STRING + r"|[^'()])*\))"
+    r"|(?P<stmt>[A-Za-z][^;']*;)",
+    re.IGNORECASE)
+VALUE_RE = re.compile(
+    r"\s*(?:(?P<str>" + _STRING + r")|X'(?P<hex>[0-9a-fA-F]*)'|(?P<null>NULL)|(?P<bool>TRUE|FALSE)|(?P<num>[-+0-9.eE]+))\s*(?:,|$)")
+UNESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+
+
+def parse_values(row_text: str) -> List[object]:
+    """Decode the inside of one `(v1, v2, ...)` tuple."""
+    values: List[object] = []
+    pos = 0
+    inner = row_text[1:-1]
+    while pos < len(inner):
+        m = VALUE_RE.match(inner, pos)
+        if not m:
+            raise ValueError(f"Unparseable value at {pos}: {inner[pos:pos + 40]!r}")
+        if m.group('str') is not None:
+            values.append(UNESCAPE_RE.sub(r'\1', m.group('str')[1:-1]))
+        elif m.group('hex') is not None:
+            values.append(bytes.fromhex(m.group('hex')))
+        elif m.group('null'):
+            values.append(None)
+        elif m.group('bool'):
+            values.append(1 if m.group('bool').upper() == 'TRUE' else 0)
+        else:
+            num = m.group('num')
+            values.append(float(num) if any(c in num for c in '.eE') else int(num))
+        pos = m.end()
+    return values
+
+
+def iter_statements(path: Path, decode: bool = True) -> Iterator[Tuple[str, List[str], object]]:
+    """Yield (table, columns, row) for every row in a seed SQL file.
+
+    With decode=False the row is the raw SQL tuple text, which is cheaper when
+    rows are only being copied or counted.
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        buf = ''
+        pos = 0
+        eof = False
+        table, columns = None, []
+        while True:
+            m = TOKEN_RE.match(buf, pos)
+            # A match touching the buffer end may be truncated; read more first
+            if (m is None or m.end() == len(buf)) and not eof:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    eof = True
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            if m is None:
+                if pos < len(buf):
+                    raise ValueError(f"Unexpected seed SQL near: {buf[pos:pos + 80]!r}")
+                return
+            pos = m.end()
+            kind = m.lastgroup
+            if kind == 'header':
+                table = m.group('table')
+                columns = [c.strip().strip('`') for c in m.group('cols').split(',')]
+            elif kind == 'row':
+                if table is None:
+                    raise ValueError("Row tuple before any REPLACE INTO header")
+                text = m.group('row')
+                yield table, columns, parse_values(text) if decode else text
+            elif kind == 'stmt':
+                table = None
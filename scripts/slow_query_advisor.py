@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Slow-query log analyzer and index advisor for the btc_stamps schema.
+
+Reads either a MySQL/MariaDB slow query log or a performance_schema digest
+export. The log is streamed line by line, and .gz files are read
+directly. A digest export is `mysql -B` output of
+events_statements_summary_by_digest, as produced by:
+
+    mysql -B -e "SELECT DIGEST_TEXT, COUNT_STAR, SUM_TIMER_WAIT,
+                 SUM_ROWS_EXAMINED, SUM_ROWS_SENT, QUERY_SAMPLE_TEXT
+                 FROM performance_schema.events_statements_summary_by_digest" > digests.tsv
+
+QUERY_SAMPLE_TEXT exists on MySQL 8 only and is optional.
+
+Statements are fingerprinted (literals become ?, IN-lists collapse) and
+aggregated by total time, rows examined and rows sent. For each hot
+fingerprint the advisor extracts per-table equality, range and ORDER BY
+columns and checks them against the indexes parsed from test-schema.sql:
+
+  * missing - no index's leading columns serve the predicate, so a
+    composite index is proposed (equality columns, then one range or the
+    ORDER BY columns);
+  * unused - no statement in the workload can use the index's leading
+    column (UNIQUE keys are kept because they enforce constraints);
+  * redundant - the index is a leading prefix of another index.
+
+The column extraction is regex-based and treats every predicate as ANDed,
+so proposals are hypotheses. --verify checks them on a local MariaDB or
+MySQL loaded with the test schema (see seed_loader.py). Every sampled
+statement is EXPLAINed, each proposed index is created, the statement is
+EXPLAINed again, and the index is dropped. The report shows whether the
+optimizer picked the index and how the estimated rows changed.
+
+Usage:
+    python3 scripts/slow_query_advisor.py /var/log/mysql/slow.log
+    python3 scripts/slow_query_advisor.py digests.tsv --top 20 --sort examined
+    python3 scripts/slow_query_advisor.py slow.log.gz --verify --password test
+    python3 scripts/slow_query_advisor.py slow.log --json advice.json
+"""
+
+import argparse
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from bench_common import LOCAL_HOSTS
+from sql_schema import SCHEMA_PATH, Index, Table, parse_schema
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, stage
+
+try:
+    import pymysql
+except ImportError:  # only --verify needs a server
+    pymysql = None
+
+# performance_schema timers are in picoseconds
+PICOSECONDS = 1e12
+SORT_KEYS = {
+    'total': 'total_s',
+    'examined': 'rows_examined',
+    'sent': 'rows_sent',
+    'count': 'count',
+}
+ADVISOR_INDEX_PREFIX = '_advisor_'
+
+
+class Statement(NamedTuple):
+    sql: str
+    query_time: float
+    rows_sent: int
+    rows_examined: int
+    count: int = 1
+    # Digest text has no literals; a sample with values is needed for EXPLAIN
+    sample: Optional[str] = None
+
+
+class Access(NamedTuple):
+    """How one statement reads one table."""
+    table: str
+    equality: Tuple[str, ...]
+    ranges: Tuple[str, ...]
+    order: Tuple[str, ...]
+    # Columns joined to another table; either side may drive the join
+    joins: Tuple[str, ...] = ()
+
+
+# ============================================================
+# Input
+# ============================================================
+
+META_RE = re.compile(r'(\w+):\s+(\S+)')
+SKIP_PREFIX_RE = re.compile(r'^(?:SET\s+timestamp\s*=|use\s+`?\w+`?\s*;)', re.IGNORECASE)
+
+
+def open_text(path: str):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def iter_slow_log(lines: Iterable[str]) -> Iterator[Statement]:
+    """Statements from a slow query log with their Query_time and row counts."""
+    meta: Optional[dict] = None
+    buf: List[str] = []
+
+    def flush():
+        sql = ' '.join(buf).strip().rstrip(';').strip()
+        if sql and meta is not None:
+            return Statement(sql, float(meta.get('Query_time', 0)),
+                             int(float(meta.get('Rows_sent', 0))),
+                             int(float(meta.get('Rows_examined', 0))), sample=sql)
+        return None
+
+    for line in lines:
+        if line.startswith('#'):
+            if buf:
+                stmt = flush()
+                if stmt:
+                    yield stmt
+                buf, meta = [], None
+            if 'Query_time:' in line:
+                meta = {}
+            if meta is not None:
+                meta.update(META_RE.findall(line))
+            continue
+        if meta is None:
+            # Server banner lines at the top of the file or after a restart
+            continue
+        stripped = line.strip()
+        if not buf and (not stripped or SKIP_PREFIX_RE.match(stripped)):
+            continue
+        buf.append(stripped)
+    if buf:
+        stmt = flush()
+        if stmt:
+            yield stmt
+
+
+def _int_field(fields: List[str], col: Dict[str, int], name: str) -> int:
+    value = fields[col[name]] if name in col else ''
+    return int(value) if value.isdigit() else 0
+
+
+def iter_digests(lines: Iterable[str]) -> Iterator[Statement]:
+    """Statements from a tab-separated events_statements_summary_by_digest export."""
+    it = iter(lines)
+    header = [h.strip().upper() for h in next(it).rstrip('\n').split('\t')]
+    col = {name: i for i, name in enumerate(header)}
+    for line in it:
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) < len(header):
+            continue
+        text = fields[col['DIGEST_TEXT']]
+        if text in ('', 'NULL'):
+            continue
+        count = int(fields[col['COUNT_STAR']] or 0)
+        sample = fields[col['QUERY_SAMPLE_TEXT']] if 'QUERY_SAMPLE_TEXT' in col else None
+        yield Statement(text,
+                        int(fields[col['SUM_TIMER_WAIT']] or 0) / PICOSECONDS,
+                        _int_field(fields, col, 'SUM_ROWS_SENT'),
+                        _int_field(fields, col, 'SUM_ROWS_EXAMINED'),
+                        count=count,
+                        sample=sample if sample not in (None, '', 'NULL') else None)
+
+
+def iter_statements(path: str) -> Iterator[Statement]:
+    """Detect the input format from its first line and stream statements."""
+    f = open_text(path)
+    first = f.readline()
+    lines = itertools.chain([first], f)
+    if 'DIGEST_TEXT' in first.upper():
+        yield from iter_digests(lines)
+    else:
+        yield from iter_slow_log(lines)
+
+
+# ============================================================
+# Fingerprints
+# ============================================================
+
+# One pass, so a '#' or '--' inside a quoted literal is not read as a comment
+LITERAL_RE = re.compile(r"(?P<str>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")"
+                        r"|/\*.*?\*/|--[^\n]*|#[^\n]*", re.DOTALL)
+NUMBER_RE = re.compile(r'\b0x[0-9a-f]+\b|(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+LIST_RE = re.compile(r'\(\s*(?:\?|\.\.\.)(?:\s*,\s*\?)*\s*\)')
+VALUES_RE = re.compile(r'(\(\?\+\))(?:\s*,\s*\(\?\+\))+')
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so executions differing only in literals match.
+
+    Also accepts performance_schema DIGEST_TEXT, which is already
+    normalized with ? placeholders and `...` for long lists.
+    """
+    s = LITERAL_RE.sub(lambda m: '?' if m.group('str') else ' ', sql)
+    s = NUMBER_RE.sub('?', s)
+    s = s.replace('`', '').lower()
+    s = re.sub(r'\s+', ' ', s).strip().rstrip(';').strip()
+    s = LIST_RE.sub('(?+)', s)
+    return VALUES_RE.sub(r'\1', s)
+
+
+def aggregate(statements: Iterable[Statement]) -> Dict[str, dict]:
+    """Totals per fingerprint, keeping the slowest sample with literals."""
+    stats: Dict[str, dict] = {}
+    for st in statements:
+        fp = fingerprint(st.sql)
+        agg = stats.get(fp)
+        if agg is None:
+            agg = stats[fp] = {
+                'fingerprint': fp, 'count': 0, 'total_s': 0.0, 'max_s': 0.0,
+                'rows_examined': 0, 'rows_sent': 0, 'sample': None,
+            }
+        agg['count'] += st.count
+        agg['total_s'] += st.query_time
+        agg['rows_examined'] += st.rows_examined
+        agg['rows_sent'] += st.rows_sent
+        # A digest row's time is a sum, so its per-execution max is unknown
+        per_exec = st.query_time / st.count if st.count else 0.0
+        if st.sample and (agg['sample'] is None or per_exec > agg['max_s']):
+            agg['sample'] = st.sample
+        agg['max_s'] = max(agg['max_s'], per_exec)
+    return stats
+
+
+# ============================================================
+# Access paths
+# ============================================================
+
+TABLE_REF_RE = re.compile(
+    r'\b(?:from|join|update|into)\s+(?:\w+\.)?(\w+)(?:\s+(?:as\s+)?(?!(?:%s)\b)(\w+))?')
+ALIAS_STOPWORDS = ('where|on|using|join|inner|left|right|cross|straight_join|natural|group|order'
+                   '|limit|having|set|union|force|use|ignore|values|select|for|lock|window')
+TABLE_REF_RE = re.compile(TABLE_REF_RE.pattern % ALIAS_STOPWORDS)
+CLAUSE_END_RE = re.compile(r'\b(?:group by|order by|limit|having|union|for update|window)\b')
+COL = r'((?:\w+\.)?\w+)'
+EQ_RE = re.compile(COL + r'\s*(?:=|<=>)\s*\?')
+IN_RE = re.compile(COL + r'\s+in\s*\(\?\+\)')
+NULL_RE = re.compile(COL + r'\s+is\s+null\b')
+RANGE_RE = re.compile(COL + r'\s*(?:<=|>=|<(?!>)|>)\s*\?|'
+                      + COL + r'\s+(?:between\s+\?\s+and|like)\s+\?')
+JOIN_ON_RE = re.compile(r'\bjoin\s+(?:\w+\.)?(\w+)(?:\s+(?:as\s+)?(\w+))?\s+on\s+(.*?)'
+                        r'(?=\b(?:join|inner|left|right|cross|where|group|order|limit)\b|$)')
+ON_EQ_RE = re.compile(COL + r'\s*=\s*' + COL)
+ORDER_RE = re.compile(r'\border by (.*?)(?:\blimit\b|$)')
+
+
+def _clause_after(text: str, keyword: str) -> str:
+    i = text.find(f' {keyword} ')
+    if i < 0:
+        return ''
+    rest = text[i + len(keyword) + 2:]
+    m = CLAUSE_END_RE.search(rest)
+    return rest[:m.start()] if m else rest
+
+
+def table_aliases(fp: str, schema: Dict[str, Table]) -> Dict[str, str]:
+    """Map every name a fingerprint uses for a schema table (lowercase) to the table."""
+    by_lower = {name.lower(): name for name in schema}
+    aliases: Dict[str, str] = {}
+    for name, alias in TABLE_REF_RE.findall(fp):
+        if name in by_lower:
+            aliases[name] = by_lower[name]
+            if alias:
+                aliases[alias] = by_lower[name]
+    return aliases
+
+
+def extract_accesses(fp: str, schema: Dict[str, Table]) -> List[Access]:
+    """Per-table equality, range and ORDER BY columns of one fingerprint."""
+    by_lower = {name.lower(): name for name in schema}
+    aliases = table_aliases(fp, schema)
+    if not aliases:
+        return []
+    tables = list(dict.fromkeys(aliases.values()))
+    columns = {t: {c.lower(): c for c in schema[t].column_names} for t in tables}
+
+    def resolve(ref: str) -> Optional[Tuple[str, str]]:
+        if '.' in ref:
+            alias, col = ref.split('.', 1)
+            table = aliases.get(alias)
+            if table and col in columns[table]:
+                return table, columns[table][col]
+            return None
+        for table in tables:
+            if ref in columns[table]:
+                return table, columns[table][ref]
+        return None
+
+    found = {t: {'eq': [], 'range': [], 'order': [], 'join': []} for t in tables}
+
+    def add(kind: str, ref: str):
+        hit = resolve(ref)
+        if hit and hit[1] not in found[hit[0]][kind]:
+            found[hit[0]][kind].append(hit[1])
+
+    where = _clause_after(fp, 'where')
+    for regex in (EQ_RE, IN_RE, NULL_RE):
+        for ref in regex.findall(where):
+            add('eq', ref)
+    for m in RANGE_RE.finditer(where):
+        add('range', m.group(1) or m.group(2))
+
+    # The joined table is probed by its side of every ON equality
+    for name, alias, cond in JOIN_ON_RE.findall(fp):
+        joined = by_lower.get(name)
+        for left, right in ON_EQ_RE.findall(cond):
+            for ref in (left, right):
+                hit = resolve(ref)
+                if hit and hit[0] == joined and hit[1] not in found[joined]['eq']:
+                    found[joined]['eq'].append(hit[1])
+                elif hit:
+                    add('join', ref)
+
+    m = ORDER_RE.search(fp)
+    if m:
+        for term in m.group(1).split(','):
+            add('order', term.strip().split(' ')[0])
+
+    accesses = []
+    for table in tables:
+        f = found[table]
+        ranges = tuple(c for c in f['range'] if c not in f['eq'])
+        if f['eq'] or ranges or f['order'] or f['join']:
+            accesses.append(Access(table, tuple(f['eq']), ranges, tuple(f['order']),
+                                   tuple(f['join'])))
+    return accesses
+
+
+# ============================================================
+# Index checks
+# ============================================================
+
+def table_indexes(table: Table) -> List[Index]:
+    """Secondary indexes plus the primary key, as Index tuples."""
+    indexes = list(table.indexes)
+    if table.primary_key:
+        indexes.insert(0, Index('PRIMARY', table.primary_key, True, ''))
+    return indexes
+
+
+def usable_prefix(columns: Tuple[str, ...], access: Access) -> int:
+    """How many leading index columns the access can use."""
+    n = 0
+    for col in columns:
+        if col in access.equality:
+            n += 1
+            continue
+        if col in access.ranges or (access.order and col == access.order[0]):
+            n += 1
+        break
+    return n
+
+
+def wanted_prefix(access: Access) -> int:
+    return len(access.equality) + (1 if access.ranges or access.order else 0)
+
+
+def proposed_columns(access: Access) -> Tuple[str, ...]:
+    if access.ranges:
+        return access.equality + access.ranges[:1]
+    return access.equality + tuple(c for c in access.order if c not in access.equality)
+
+
+def check_access(access: Access, schema: Dict[str, Table]) -> dict:
+    """Best existing index for an access, and a proposal when it falls short."""
+    best, best_score = None, (0, False)
+    for index in table_indexes(schema[access.table]):
+        # On ties, an index led by an equality column narrows the most
+        score = (usable_prefix(index.columns, access), index.columns[0] in access.equality)
+        if score > best_score:
+            best, best_score = index, score
+    best_n = best_score[0]
+    result = {
+        'table': access.table,
+        'equality': list(access.equality),
+        'ranges': list(access.ranges),
+        'order': list(access.order),
+        'best_index': best.name if best else None,
+        'used_columns': best_n,
+        'proposal': None,
+    }
+    if best_n < wanted_prefix(access):
+        cols = proposed_columns(access)
+        # An existing index that already starts with the proposal covers it
+        if cols and not any(i.columns[:len(cols)] == cols
+                            for i in table_indexes(schema[access.table])):
+            result['proposal'] = list(cols)
+    return result
+
+
+def unused_and_redundant(schema: Dict[str, Table], accesses: List[Access]):
+    """Indexes no access can use, and indexes that prefix another index."""
+    leading: Dict[str, Set[str]] = {}
+    for a in accesses:
+        cols = leading.setdefault(a.table, set())
+        cols.update(a.equality, a.ranges, a.order[:1], a.joins)
+    unused, redundant = [], []
+    for name, table in schema.items():
+        for index in table.indexes:
+            for other in table_indexes(table):
+                if (other.name != index.name and len(other.columns) >= len(index.columns)
+                        and other.columns[:len(index.columns)] == index.columns
+                        and not index.unique):
+                    redundant.append({'table': name, 'index': index.name,
+                                      'columns': list(index.columns), 'covered_by': other.name})
+                    break
+            if name in leading and not index.unique and index.columns[0] not in leading[name]:
+                unused.append({'table': name, 'index': index.name,
+                               'columns': list(index.columns)})
+    untouched = sorted(set(schema) - set(leading))
+    return unused, redundant, untouched
+
+
+def analyze(stats: Dict[str, dict], schema: Dict[str, Table], top: int, sort: str) -> dict:
+    ranked = sorted(stats.values(), key=lambda a: a[SORT_KEYS[sort]], reverse=True)
+    all_accesses = []
+    hot = []
+    for rank, agg in enumerate(ranked):
+        accesses = extract_accesses(agg['fingerprint'], schema)
+        all_accesses.extend(accesses)
+        if rank < top:
+            hot.append({**agg, 'accesses': [check_access(a, schema) for a in accesses]})
+    unused, redundant, untouched = unused_and_redundant(schema, all_accesses)
+    return {
+        'statements': sum(a['count'] for a in stats.values()),
+        'fingerprints': len(stats),
+        'sort': sort,
+        'hot': hot,
+        'unused': unused,
+        'redundant': redundant,
+        'untouched_tables': untouched,
+    }
+
+
+# ============================================================
+# EXPLAIN verification
+# ============================================================
+
+def explain_rows(cur, sql: str) -> List[dict]:
+    cur.execute("EXPLAIN " + sql)
+    names = [d[0].lower() for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+def explain_summary(plan: List[dict], names: Set[str]) -> dict:
+    """Key chosen and rows estimated for a table, by any of its names, in EXPLAIN."""
+    for row in plan:
+        if (row.get('table') or '').lower() in names:
+            return {'key': row.get('key'), 'rows': int(row.get('rows') or 0),
+                    'possible_keys': row.get('possible_keys') or ''}
+    return {'key': None, 'rows': 0, 'possible_keys': ''}
+
+
+def verify(conn, report: dict, schema: Dict[str, Table]):
+    """EXPLAIN hot samples before and after creating each proposed index."""
+    cur = conn.cursor()
+    considered: Dict[str, Set[str]] = {}
+    for n, hot in enumerate(report['hot']):
+        sample = hot['sample']
+        if not sample or not sample.lstrip().lower().startswith(('select', 'with')):
+            hot['verify'] = 'no SELECT sample with literals'
+            continue
+        try:
+            plan = explain_rows(cur, sample)
+        except pymysql.err.MySQLError as e:
+            hot['verify'] = f"EXPLAIN failed: {e}"
+            continue
+        aliases = table_aliases(hot['fingerprint'], schema)
+        for row in plan:
+            table = aliases.get((row.get('table') or '').lower())
+            for key in (row.get('possible_keys') or '').split(','):
+                considered.setdefault(table, set()).add(key.strip())
+        for access in hot['accesses']:
+            names = {a for a, t in aliases.items() if t == access['table']}
+            access['before'] = explain_summary(plan, names)
+            if not access['proposal']:
+                continue
+            name = f"{ADVISOR_INDEX_PREFIX}{n}"
+            cols = ', '.join(f"`{c}`" for c in access['proposal'])
+            try:
+                cur.execute(f"CREATE INDEX `{name}` ON `{access['table']}` ({cols})")
+                try:
+                    access['after'] = explain_summary(explain_rows(cur, sample), names)
+                finally:
+                    cur.execute(f"DROP INDEX `{name}` ON `{access['table']}`")
+            except pymysql.err.MySQLError as e:
+                access['after'] = {'error': str(e)}
+                continue
+            access['confirmed'] = access['after'].get('key') == name
+    for entry in report['unused']:
+        # Only tables some EXPLAIN actually planned say anything either way
+        if entry['table'] in considered:
+            entry['considered'] = entry['index'] in considered[entry['table']]
+
+
+# ============================================================
+# Report
+# ============================================================
+
+def print_report(report: dict, verified: bool):
+    print()
+    print("=" * 100)
+    print(f"{'#':>3} {'count':>8} {'total s':>9} {'avg ms':>8} {'examined':>12} {'sent':>10} "
+          f"{'ex/sent':>8}  fingerprint")
+    print("=" * 100)
+    for i, hot in enumerate(report['hot'], 1):
+        avg_ms = hot['total_s'] / hot['count'] * 1000 if hot['count'] else 0
+        ratio = hot['rows_examined'] / hot['rows_sent'] if hot['rows_sent'] else 0
+        print(f"{i:>3} {hot['count']:>8,} {hot['total_s']:>9.2f} {avg_ms:>8.1f} "
+              f"{hot['rows_examined']:>12,} {hot['rows_sent']:>10,} {ratio:>8.0f}  "
+              f"{hot['fingerprint'][:60]}")
+    print(f"\n{report['statements']:,} statements, {report['fingerprints']:,} fingerprints "
+          f"(sorted by {report['sort']})")
+
+    print("\nIndex coverage of hot statements:")
+    for i, hot in enumerate(report['hot'], 1):
+        if not hot['accesses']:
+            continue
+        for a in hot['accesses']:
+            where = ", ".join(
+                [f"{c}=" for c in a['equality']] + [f"{c}<>" for c in a['ranges']] +
+                ([f"ORDER BY {','.join(a['order'])}"] if a['order'] else []))
+            if not where:
+                continue
+            if a['proposal']:
+                print(f"  ✗ #{i} {a['table']} ({where}): best {a['best_index'] or 'none'} "
+                      f"uses {a['used_columns']} col(s); propose ({', '.join(a['proposal'])})")
+            else:
+                print(f"  ✓ #{i} {a['table']} ({where}): {a['best_index']}")
+            if verified and 'before' in a:
+                before = a['before']
+                line = f"      EXPLAIN: key={before['key']} rows={before['rows']:,}"
+                after = a.get('after')
+                if after and 'error' in after:
+                    line += f"; proposal failed: {after['error']}"
+                elif after:
+                    mark = "✓ chosen" if a.get('confirmed') else "✗ not chosen"
+                    line += f" -> key={after['key']} rows={after['rows']:,} ({mark})"
+                print(line)
+        if verified and 'verify' in hot:
+            print(f"      ⚠ #{i}: {hot['verify']}")
+
+    if report['unused']:
+        print("\nIndexes no statement in the workload can use:")
+        for u in report['unused']:
+            note = ""
+            if verified and 'considered' in u:
+                note = (" (but EXPLAIN considered it)" if u['considered']
+                        else " (confirmed by EXPLAIN)")
+            print(f"  ⚠ {u['table']}.{u['index']} ({', '.join(u['columns'])}){note}")
+    if report['redundant']:
+        print("\nIndexes that are a leading prefix of another index:")
+        for r in report['redundant']:
+            print(f"  ⚠ {r['table']}.{r['index']} ({', '.join(r['columns'])}) "
+                  f"is covered by {r['covered_by']}")
+    if report['untouched_tables']:
+        print(f"\nTables absent from the workload: {', '.join(report['untouched_tables'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Analyze slow queries against the indexes in test-schema.sql')
+    parser.add_argument('input', help="Slow query log, digest export (.tsv), .gz, or - for stdin")
+    parser.add_argument('--schema', type=Path, default=SCHEMA_PATH)
+    parser.add_argument('--top', type=int, default=15, help='Hot fingerprints to check')
+    parser.add_argument('--sort', choices=list(SORT_KEYS), default='total')
+    parser.add_argument('--json', type=Path, metavar='PATH', help='Also write the report as JSON')
+    parser.add_argument('--verify', action='store_true',
+                        help='EXPLAIN samples and proposals on a local test database')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD', ''))
+    parser.add_argument('--database', default='btcstamps_test')
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument('slow_query_advisor', args) as metrics:
+        stage('parse')
+        schema = parse_schema(args.schema)
+        stats = aggregate(iter_statements(args.input))
+        metrics.count('fingerprints', len(stats))
+        stage('analyze')
+        report = analyze(stats, schema, args.top, args.sort)
+
+        if args.verify:
+            stage('verify')
+            if args.host not in LOCAL_HOSTS:
+                print(f"✗ Refusing to create indexes on non-local host {args.host}")
+                sys.exit(1)
+            if pymysql is None:
+                print("✗ --verify needs pymysql (pip install pymysql)")
+                sys.exit(1)
+            conn = pymysql.connect(host=args.host, port=args.port, user=args.user,
+                                   password=args.password, database=args.database,
+                                   autocommit=True)
+            try:
+                verify(conn, report, schema)
+            finally:
+                conn.close()
+
+        stage('report')
+        print_report(report, args.verify)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+                f.write('\n')
+            print(f"\nReport written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
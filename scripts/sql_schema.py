@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Parse CREATE TABLE statements from scripts/test-schema.sql.
+
+Gives the Python tools in scripts/ one view of the test schema: columns,
+primary keys, unique keys and secondary indexes per table, with the raw
+definition text kept so statements can be re-emitted (for example with
+non-unique secondary indexes deferred).
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SCHEMA_PATH = Path(__file__).resolve().parent / 'test-schema.sql'
+
+CREATE_RE = re.compile(
+    r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\(', re.IGNORECASE)
+INDEX_RE = re.compile(
+    r'^(?:(?P<unique>UNIQUE)\s*(?:KEY|INDEX)?|(?P<fulltext>FULLTEXT)\s*(?:KEY|INDEX)?|KEY|INDEX)'
+    r'\s*(?:`(?P<name>\w+)`|(?P<bare>\w+))?\s*\((?P<cols>.*)\)\s*$',
+    re.IGNORECASE | re.DOTALL)
+VIEW_RE = re.compile(r'CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\b[^;]*;', re.IGNORECASE)
+INDEX_COL_RE = re.compile(r'`?(\w+)`?\s*(?:\((\d+)\))?\s*(ASC|DESC)?', re.IGNORECASE)
+
+
+class Index(NamedTuple):
+    name: str
+    columns: Tuple[str, ...]
+    unique: bool
+    definition: str
+
+
+class Table(NamedTuple):
+    name: str
+    columns: List[Tuple[str, str]]
+    primary_key: Tuple[str, ...]
+    indexes: List[Index]
+    column_defs: List[str]
+    options: str
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c for c, _ in self.columns]
+
+    def key_columns(self) -> Tuple[str, ...]:
+        """Columns that identify a row: the primary key, else the first unique key."""
+        if self.primary_key:
+            return self.primary_key
+        for index in self.indexes:
+            if index.unique:
+                return index.columns
+        return ()
+
+    def create_statement(self, with_indexes: bool = True, keep_unique: bool = False) -> str:
+        """Re-emit CREATE TABLE, optionally without secondary indexes.
+
+        keep_unique keeps UNIQUE keys when with_indexes is False, so REPLACE
+        still resolves conflicts on them while the other indexes are deferred.
+        """
+        parts = list(self.column_defs)
+        if self.primary_key and not any('PRIMARY KEY' in d.upper() for d in self.column_defs):
+            parts.append(f"PRIMARY KEY ({', '.join(f'`{c}`' for c in self.primary_key)})")
+        if with_indexes:
+            parts.extend(i.definition for i in self.indexes)
+        elif keep_unique:
+            parts.extend(i.definition for i in self.indexes if i.unique)
+        body = ',\n  '.join(parts)
+        return f"CREATE TABLE IF NOT EXISTS `{self.name}` (\n  {body}\n) {self.options};"
+
+    def index_statements(self, unique: Optional[bool] = None) -> List[str]:
+        """ALTER TABLE statements that add secondary indexes in one pass.
+
+        unique=False limits them to non-unique indexes, unique=True to UNIQUE
+        keys; None adds all of them.
+        """
+        indexes = [i for i in self.indexes if unique is None or i.unique == unique]
+        if not indexes:
+            return []
+        adds = ',\n  '.join(f"ADD {i.definition}" for i in indexes)
+        return [f"ALTER TABLE `{self.name}`\n  {adds};"]
+
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a CREATE TABLE body on commas outside parentheses and quotes."""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(body):
+        if quote:
+            if ch == quote and body[i - 1] != '\\':
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _strip_comments(sql: str) -> str:
+    return re.sub(r'--[^\n]*', '', sql)
+
+
+def _index_columns(cols: str) -> Tuple[str, ...]:
+    return tuple(m.group(1) for m in INDEX_COL_RE.finditer(cols) if m.group(1))
+
+
+def parse_schema(path: Path = SCHEMA_PATH) -> Dict[str, Table]:
+    """Parse every CREATE TABLE statement into a Table, keyed by table name."""
+    sql = _strip_comments(path.read_text())
+    tables: Dict[str, Table] = {}
+    for match in CREATE_RE.finditer(sql):
+        name = match.group(1)
+        # Find the parenthesis closing the column list
+        depth, i = 1, match.end()
+        while depth and i < len(sql):
+            if sql[i] == '(':
+                depth += 1
+            elif sql[i] == ')':
+                depth -= 1
+            i += 1
+        body = sql[match.end():i - 1]
+        options = sql[i:sql.index(';', i)].strip()
+
+        columns, column_defs, indexes = [], [], []
+        primary_key: Tuple[str, ...] = ()
+        for part in _split_top_level(body):
+            upper = part.upper()
+            if upper.startswith('PRIMARY KEY'):
+                primary_key = _index_columns(part[part.index('(') + 1:part.rindex(')')])
+                continue
+            if upper.startswith(('CONSTRAINT', 'FOREIGN KEY', 'CHECK')):
+                column_defs.append(part)
+                continue
+            idx = INDEX_RE.match(part)
+            if idx and not upper.startswith('`'):
+                cols = _index_columns(idx.group('cols'))
+                idx_name = idx.group('name') or idx.group('bare') or cols[0]
+                indexes.append(Index(idx_name, cols, bool(idx.group('unique')), part))
+                continue
+            col = re.match(r'`?(\w+)`?\s+(.*)', part, re.DOTALL)
+            col_name, col_type = col.group(1), col.group(2)
+            columns.append((col_name, col_type))
+            column_defs.append(part)
+            if re.search(r'\bPRIMARY\s+KEY\b', col_type, re.IGNORECASE):
+                primary_key = (col_name,)
+
+        tables[name] = Table(name, columns, primary_key, indexes, column_defs, options)
+    return tables
+
+
+def find_index(tables: Dict[str, Table], name: str) -> Optional[Tuple[str, Index]]:
+    """Locate an index by name across all tables."""
+    for table in tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return table.name, index
+    return None
+
+
+def parse_views(path: Path = SCHEMA_PATH) -> List[str]:
+    """CREATE VIEW statements in schema order (views go after their tables)."""
+    return VIEW_RE.findall(_strip_comments(path.read_text()))
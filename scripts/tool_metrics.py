@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Phase timers, profiling and metrics files for the scripts/ Python tools.
+
+A tool wraps its main body in `instrument()` and marks its stages with
+`phase()`:
+
+    parser = argparse.ArgumentParser()
+    tool_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    with tool_metrics.instrument("extract-seed-data", args) as metrics:
+        with tool_metrics.phase("extract"):
+            ...
+        metrics.count("rows", total_rows)
+
+Phases nest; a phase inside "extract" is recorded as "extract/<name>".
+Tools that print numbered steps can call `stage("fetch")` at each
+`[n/N]` banner instead: a stage runs until the next one starts or the run
+ends. Outside instrument(), phase() and stage() do nothing, so library
+code can mark phases unconditionally.
+
+--profile runs the tool under cProfile with tracemalloc, then prints the
+phase timings, the top functions by cumulative time and the peak traced
+allocation. --metrics-out PATH writes the run's phases, counters, wall
+time, peak RSS and exit code. A path ending in .prom is written in the
+Prometheus textfile-collector format, atomically; any other path gets
+JSON. Both are written even when the tool exits early with sys.exit.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+METRIC_PREFIX = "btcstamps_tool"
+PROFILE_TOP = 25
+
+_active: Optional["Metrics"] = None
+
+
+class Metrics:
+    """Phase durations and counters for one tool run."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        self.stack: List[str] = []
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.wall_s = 0.0
+        self.exit_code = 0
+        self.peak_traced_bytes: Optional[int] = None
+        self._stage: Optional[Tuple[str, float]] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        self.stack.append(name)
+        key = "/".join(self.stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Re-entered phases accumulate
+            self.phases[key] = self.phases.get(key, 0.0) + time.perf_counter() - start
+            self.stack.pop()
+
+    def stage(self, name: str):
+        """End the current stage, if any, and start `name`."""
+        self.end_stage()
+        self._stage = (name, time.perf_counter())
+
+    def end_stage(self):
+        if self._stage is not None:
+            name, start = self._stage
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            self._stage = None
+
+    def count(self, name: str, value: float):
+        self.counters[name] = value
+
+    def add(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        return {
+            "tool": self.tool,
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(self.wall_s, 6),
+            "exit_code": self.exit_code,
+            "max_rss_bytes": max_rss_bytes(),
+            "peak_traced_bytes": self.peak_traced_bytes,
+            "phases": {k: round(v, 6) for k, v in self.phases.items()},
+            "counters": self.counters,
+        }
+
+    def prometheus(self) -> str:
+        d = self.as_dict()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_label(v)}"' for k, v in
+                                      [("tool", self.tool)] + labels)
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+
+        metric("wall_seconds", "gauge", "Wall time of the last run.", [([], d["wall_s"])])
+        metric("exit_code", "gauge", "Exit code of the last run.", [([], d["exit_code"])])
+        metric("last_run_timestamp_seconds", "gauge", "Start time of the last run.",
+               [([], int(self.started))])
+        metric("max_rss_bytes", "gauge", "Peak resident set size.", [([], d["max_rss_bytes"])])
+        if d["peak_traced_bytes"] is not None:
+            metric("peak_traced_bytes", "gauge", "Peak Python allocation under tracemalloc.",
+                   [([], d["peak_traced_bytes"])])
+        if d["phases"]:
+            metric("phase_seconds", "gauge", "Wall time per phase of the last run.",
+                   [([("phase", k)], v) for k, v in d["phases"].items()])
+        if d["counters"]:
+            metric("count", "gauge", "Tool-specific counters from the last run.",
+                   [([("name", k)], v) for k, v in d["counters"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        path = Path(path)
+        text = (self.prometheus() if path.suffix == ".prom"
+                else json.dumps(self.as_dict(), indent=2) + "\n")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The textfile collector may read at any moment: never expose a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def print_phases(self):
+        if not self.phases:
+            return
+        print()
+        print("=" * 60)
+        print(f"{'phase':<44} {'seconds':>9} {'share':>5}")
+        print("=" * 60)
+        for name, seconds in self.phases.items():
+            share = seconds / self.wall_s if self.wall_s else 0
+            print(f"{name:<44} {seconds:>9.3f} {share:>5.0%}")
+        print("-" * 60)
+        print(f"{'TOTAL (wall)':<44} {self.wall_s:>9.3f}")
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under cProfile and tracemalloc; print phase timings, "
+                             "hot functions and peak memory")
+    parser.add_argument("--metrics-out", type=Path, metavar="PATH",
+                        help="Write run metrics as JSON, or Prometheus textfile format "
+                             "when PATH ends in .prom")
+
+
+@contextmanager
+def phase(name: str):
+    """Time a stage of the active run; a no-op outside instrument()."""
+    if _active is None:
+        yield
+        return
+    with _active.phase(name):
+        yield
+
+
+def stage(name: str):
+    """Start a sequential stage of the active run; a no-op outside instrument()."""
+    if _active is not None:
+        _active.stage(name)
+
+
+@contextmanager
+def instrument(tool: str, args=None):
+    """Collect metrics for the enclosed run, honouring --profile and --metrics-out."""
+    global _active
+    profile = bool(getattr(args, "profile", False))
+    metrics_out = getattr(args, "metrics_out", None)
+    metrics = Metrics(tool)
+    _active = metrics
+    profiler = None
+    if profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    except SystemExit as e:
+        metrics.exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    except BaseException:
+        metrics.exit_code = 1
+        raise
+    finally:
+        metrics.end_stage()
+        metrics.wall_s = time.perf_counter() - metrics.start
+        _active = None
+        if profiler is not None:
+            profiler.disable()
+            metrics.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print_profile(metrics, profiler)
+        if metrics_out:
+            metrics.write(metrics_out)
+            print(f"Metrics written to {metrics_out}")
+
+
+def print_profile(metrics: Metrics, profiler: cProfile.Profile, top: int = PROFILE_TOP):
+    metrics.print_phases()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    print(f"\nTop {top} functions by cumulative time:")
+    print(out.getvalue().rstrip())
+    print(f"\nPeak traced memory: {metrics.peak_traced_bytes:,} bytes "
+          f"(max RSS {max_rss_bytes():,} bytes)")
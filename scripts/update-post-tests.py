@@ -7,169 +7,116 @@ This script:
 2. Updates POST endpoint tests to add success-path validation
 3. Ensures all POST tests validate PSBT hex data in 200 responses
 4. Keeps existing error-path tests intact
-"""
-
-import json
-import sys
-from pathlib import Path
-
-def update_src20_create_test(test_item):
-    """Update Create SRC20 Token test to properly validate success responses."""
-    # The test already allows 200 or 400, but we need to ensure proper PSBT validation
-    # Find the test script
-    for event in test_item.get('event', []):
-        if event.get('listen') == 'test':
-            script = event.get('script', {})
-            exec_lines = script.get('exec', [])
-
-            # Check if PSBT validation exists
-            has_psbt_validation = any('hex' in line and 'string' in line for line in exec_lines)
-
-            if not has_psbt_validation:
-                # Add PSBT validation after the status code check
-                new_exec = []
-                for i, line in enumerate(exec_lines):
-                    new_exec.append(line)
-                    # After response structure validation, add PSBT validation
-                    if 'Response has valid structure for status code' in line and i < len(exec_lines) - 1:
-                        # Find the closing of this test
-                        j = i + 1
-                        while j < len(exec_lines) and not exec_lines[j].strip().startswith('pm.test('):
-                            j += 1
-                        # Insert PSBT validation before next test
-                        if j < len(exec_lines):
-                            psbt_validation = [
-                                "",
-                                "// Validate PSBT hex data for 200 responses",
-                                "pm.test(\"Success response contains valid PSBT hex\", function() {",
-                                "    if (pm.response.code === 200) {",
-                                "        const json = pm.response.json();",
-                                "        pm.expect(json.hex).to.be.a('string');",
-                                "        pm.expect(json.hex.length).to.be.above(0);",
-                                "        // PSBT hex should be valid hex string",
-                                "        pm.expect(json.hex).to.match(/^[0-9a-fA-F]+$/);",
-                                "        // Validate other PSBT response fields",
-                                "        pm.expect(json).to.have.property('est_tx_size');",
-                                "        pm.expect(json).to.have.property('inputsToSign').that.is.an('array');",
-                                "    }",
-                                "});",
-                            ]
-                            # Skip to end of current test block
-                            while i < len(exec_lines) - 1:
-                                i += 1
-                                new_exec.append(exec_lines[i])
-                                if exec_lines[i].strip() == '});':
-                                    # Add PSBT validation after this test
-                                    new_exec.extend(psbt_validation)
-                                    break
-
-                if new_exec:
-                    script['exec'] = new_exec
-
-    return test_item
 
-def update_attach_test(test_item):
-    """Update Attach Stamp test to add success-path validation."""
-    # Find the test script
-    for event in test_item.get('event', []):
-        if event.get('listen') == 'test':
-            script = event.get('script', {})
-            exec_lines = script.get('exec', [])
+Script changes are declared in POST_PATCHES and applied by
+postman_patch_engine, so repeated runs are idempotent.
 
-            # Check if this test has proper success validation
-            has_success_test = any('200' in line and 'success' in line.lower() for line in exec_lines)
-
-            if not has_success_test:
-                # Replace or enhance the existing test
-                new_exec = [
-                    "// POST Test for Attach Stamp - Success and Error Paths",
-                    "pm.test(\"Status code is 200 (success) or 400 (error)\", function() {",
-                    "    pm.expect(pm.response.code).to.be.oneOf([200, 400, 500]);",
-                    "});",
-                    "",
-                    "pm.test(\"Response has valid structure for status code\", function() {",
-                    "    const json = pm.response.json();",
-                    "    if (pm.response.code === 200) {",
-                    "        // Success response must contain PSBT hex data",
-                    "        pm.expect(json).to.have.property('hex');",
-                    "        pm.expect(json.hex).to.be.a('string');",
-                    "        pm.expect(json.hex.length).to.be.above(0);",
-                    "        pm.expect(json.hex).to.match(/^[0-9a-fA-F]+$/, 'hex should be valid hex string');",
-                    "        // Validate PSBT metadata fields",
-                    "        pm.expect(json).to.have.property('est_tx_size');",
-                    "        pm.expect(json).to.have.property('input_value');",
-                    "        pm.expect(json).to.have.property('est_miner_fee');",
-                    "    } else {",
-                    "        // Error response must contain error field",
-                    "        pm.expect(json).to.have.property('error');",
-                    "        pm.expect(json.error).to.be.a('string').and.not.be.empty;",
-                    "    }",
-                    "});",
-                    "",
-                    "pm.test(\"PSBT hex is non-empty for success responses\", function() {",
-                    "    if (pm.response.code === 200) {",
-                    "        const json = pm.response.json();",
-                    "        pm.expect(json.hex.length).to.be.above(100, 'PSBT hex should be substantial');",
-                    "    }",
-                    "});",
-                ]
-                script['exec'] = new_exec
-
-    return test_item
-
-def update_mint_test(test_item):
-    """Update Mint Stamp test to add success-path validation."""
-    # Similar to attach, but for mint endpoint
-    for event in test_item.get('event', []):
-        if event.get('listen') == 'test':
-            script = event.get('script', {})
-            exec_lines = script.get('exec', [])
-
-            # Check if this test has proper success validation
-            has_success_test = any('200' in line and 'success' in line.lower() for line in exec_lines)
+Usage:
+    python3 scripts/update-post-tests.py                    # Update comprehensive.json
+    python3 scripts/update-post-tests.py --dry-run          # Show diff only
+    python3 scripts/update-post-tests.py --all-collections  # Patch every collection
+"""
 
-            if not has_success_test:
-                new_exec = [
-                    "// POST Test for Mint Stamp - Success and Error Paths",
-                    "pm.test(\"Status code is 200 (success) or 400 (error)\", function() {",
-                    "    pm.expect(pm.response.code).to.be.oneOf([200, 400, 500]);",
-                    "});",
-                    "",
-                    "pm.test(\"Response has valid structure for status code\", function() {",
-                    "    const json = pm.response.json();",
-                    "    if (pm.response.code === 200) {",
-                    "        // Success response must contain PSBT hex data",
-                    "        pm.expect(json).to.have.property('hex');",
-                    "        pm.expect(json.hex).to.be.a('string');",
-                    "        pm.expect(json.hex.length).to.be.above(0);",
-                    "        pm.expect(json.hex).to.match(/^[0-9a-fA-F]+$/, 'hex should be valid hex string');",
-                    "        // Validate PSBT metadata fields",
-                    "        pm.expect(json).to.have.property('est_tx_size');",
-                    "        pm.expect(json).to.have.property('input_value');",
-                    "        pm.expect(json).to.have.property('total_dust_value');",
-                    "        pm.expect(json).to.have.property('est_miner_fee');",
-                    "        pm.expect(json).to.have.property('cpid');",
-                    "    } else {",
-                    "        // Error response must contain error field",
-                    "        pm.expect(json).to.have.property('error');",
-                    "        pm.expect(json.error).to.be.a('string').and.not.be.empty;",
-                    "    }",
-                    "});",
-                    "",
-                    "pm.test(\"PSBT contains transaction details for success\", function() {",
-                    "    if (pm.response.code === 200) {",
-                    "        const json = pm.response.json();",
-                    "        pm.expect(json.hex.length).to.be.above(100, 'PSBT hex should be substantial');",
-                    "        pm.expect(json.est_tx_size).to.be.above(0, 'Estimated tx size should be positive');",
-                    "    }",
-                    "});",
-                ]
-                script['exec'] = new_exec
+import argparse
+import sys
 
-    return test_item
+from postman_patch_engine import (
+    COLLECTIONS_DIR,
+    Patch,
+    PatchIndex,
+    apply_patches,
+    patch_collection,
+)
+from postman_json_writer import TrackedDocument
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, stage
+
+
+def psbt_success_patches(request, metadata_fields, final_test, final_checks):
+    """Patches ensuring a PSBT endpoint validates both success and error responses."""
+    structure = (
+        [
+            "pm.test(\"Response has valid structure for status code\", function() {",
+            "    const json = pm.response.json();",
+            "    if (pm.response.code === 200) {",
+            "        // Success response must contain PSBT hex data",
+            "        pm.expect(json).to.have.property('hex');",
+            "        pm.expect(json.hex).to.be.a('string');",
+            "        pm.expect(json.hex.length).to.be.above(0);",
+            "        pm.expect(json.hex).to.match(/^[0-9a-fA-F]+$/, 'hex should be valid hex string');",
+            "        // Validate PSBT metadata fields",
+        ]
+        + [f"        pm.expect(json).to.have.property('{field}');" for field in metadata_fields]
+        + [
+            "    } else {",
+            "        // Error response must contain error field",
+            "        pm.expect(json).to.have.property('error');",
+            "        pm.expect(json.error).to.be.a('string').and.not.be.empty;",
+            "    }",
+            "});",
+        ]
+    )
+    final = (
+        [
+            f"pm.test(\"{final_test}\", function() {{",
+            "    if (pm.response.code === 200) {",
+            "        const json = pm.response.json();",
+        ]
+        + [f"        {check}" for check in final_checks]
+        + ["    }", "});"]
+    )
+    return [
+        Patch(request, "Response has valid structure for status code", "insert",
+              tuple(structure)),
+        Patch(request, final_test, "insert", tuple(final),
+              anchor="Response has valid structure for status code"),
+    ]
+
+
+# Declarative patches keyed by request name (fnmatch) and pm.test name.
+# `insert` only adds a test when no test with that name exists, so running
+# this script repeatedly never duplicates or clobbers hand-edited tests.
+POST_PATCHES = [
+    # Create SRC20 Token: add PSBT hex validation after the structure test
+    Patch(
+        request="Create SRC20 Token - *",
+        test="Success response contains valid PSBT hex",
+        op="insert",
+        anchor="Response has valid structure for status code",
+        lines=(
+            "// Validate PSBT hex data for 200 responses",
+            "pm.test(\"Success response contains valid PSBT hex\", function() {",
+            "    if (pm.response.code === 200) {",
+            "        const json = pm.response.json();",
+            "        pm.expect(json.hex).to.be.a('string');",
+            "        pm.expect(json.hex.length).to.be.above(0);",
+            "        // PSBT hex should be valid hex string",
+            "        pm.expect(json.hex).to.match(/^[0-9a-fA-F]+$/);",
+            "        // Validate other PSBT response fields",
+            "        pm.expect(json).to.have.property('est_tx_size');",
+            "        pm.expect(json).to.have.property('inputsToSign').that.is.an('array');",
+            "    }",
+            "});",
+        ),
+    ),
+    *psbt_success_patches(
+        "Attach Stamp - *",
+        ["est_tx_size", "input_value", "est_miner_fee"],
+        "PSBT hex is non-empty for success responses",
+        ["pm.expect(json.hex.length).to.be.above(100, 'PSBT hex should be substantial');"],
+    ),
+    *psbt_success_patches(
+        "Mint Stamp - *",
+        ["est_tx_size", "input_value", "total_dust_value", "est_miner_fee", "cpid"],
+        "PSBT contains transaction details for success",
+        [
+            "pm.expect(json.hex.length).to.be.above(100, 'PSBT hex should be substantial');",
+            "pm.expect(json.est_tx_size).to.be.above(0, 'Estimated tx size should be positive');",
+        ],
+    ),
+]
 
-def add_detach_success_test(post_section):
-    """Add a success-path test for Detach Stamp endpoint."""
+def add_detach_success_test(post_section, dry_run=False):
+    """Add a success-path test for Detach Stamp endpoint; True if it was (or would be) added."""
     # Create a new test for successful detach
     success_test = {
         "name": "Detach Stamp - Success (Dev)",
@@ -250,34 +197,51 @@ def add_detach_success_test(post_section):
             insert_idx = idx + 1
             break
 
-    if insert_idx is not None:
-        # Check if success test already exists
-        has_success_test = any('Detach Stamp - Success' in item['name'] for item in post_section['item'])
-        if not has_success_test:
-            post_section['item'].insert(insert_idx, success_test)
-            print("✓ Added Detach Stamp - Success (Dev) test")
-
-    return post_section
+    if insert_idx is None:
+        return False
+    # Check if success test already exists
+    has_success_test = any('Detach Stamp - Success' in item['name'] for item in post_section['item'])
+    if has_success_test:
+        return False
+    if dry_run:
+        after = post_section['item'][insert_idx - 1]['name']
+        print(f"  Would add {success_test['name']} after {after}")
+    else:
+        post_section['item'].insert(insert_idx, success_test)
+        print(f"✓ Added {success_test['name']} test")
+    return True
 
 def main():
     """Main function to update comprehensive.json with success-path tests."""
-    comprehensive_path = Path('tests/postman/collections/comprehensive.json')
+    parser = argparse.ArgumentParser(description="Add success-path tests to POST endpoints")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print a diff of the script changes instead of writing")
+    parser.add_argument("--all-collections", action="store_true",
+                        help="Apply the POST patches to every collection in one pass")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument("update-post-tests", args) as metrics:
+        run(args, metrics)
+
+
+def run(args, metrics):
+    stage("load")
+    comprehensive_path = COLLECTIONS_DIR / 'comprehensive.json'
 
     if not comprehensive_path.exists():
         print(f"Error: {comprehensive_path} not found")
         sys.exit(1)
 
     print(f"Reading {comprehensive_path}...")
-    with open(comprehensive_path, 'r') as f:
-        data = json.load(f)
+    doc = TrackedDocument.load(comprehensive_path)
+    data = doc.data
 
     # Find POST Endpoints section
     post_section = None
-    post_index = None
-    for idx, item in enumerate(data['item']):
+    for item in data['item']:
         if item['name'] == 'POST Endpoints':
             post_section = item
-            post_index = idx
             break
 
     if not post_section:
@@ -286,53 +250,45 @@ def main():
 
     print(f"Found POST Endpoints section with {len(post_section['item'])} tests")
 
-    # Update each test
-    updates_made = []
-
-    for test in post_section['item']:
-        test_name = test['name']
-
-        if 'Create SRC20 Token' in test_name:
-            print(f"Updating {test_name}...")
-            update_src20_create_test(test)
-            updates_made.append(test_name)
-
-        elif 'Attach Stamp' in test_name and 'Dev' in test_name:
-            print(f"Updating {test_name}...")
-            update_attach_test(test)
-            updates_made.append(test_name)
-
-        elif 'Attach Stamp' in test_name and 'Prod' in test_name:
-            print(f"Updating {test_name}...")
-            update_attach_test(test)
-            updates_made.append(test_name)
-
-        elif 'Mint Stamp' in test_name and 'Dev' in test_name:
-            print(f"Updating {test_name}...")
-            update_mint_test(test)
-            updates_made.append(test_name)
-
-        elif 'Mint Stamp' in test_name and 'Prod' in test_name:
-            print(f"Updating {test_name}...")
-            update_mint_test(test)
-            updates_made.append(test_name)
+    # Apply all script patches in a single walk of the collection
+    stage("patch")
+    index = PatchIndex(POST_PATCHES)
+    updates_made, diff = patch_collection(data, index, label=comprehensive_path.name)
 
     # Add success-path test for Detach
     print("Adding Detach Stamp success-path test...")
-    add_detach_success_test(post_section)
-
-    # Update the data
-    data['item'][post_index] = post_section
-
-    # Write back to file
-    print(f"\nWriting updated collection to {comprehensive_path}...")
-    with open(comprehensive_path, 'w') as f:
-        json.dump(data, f, indent=2)
-
-    print(f"\n✓ Successfully updated comprehensive.json")
-    print(f"✓ Updated {len(updates_made)} tests:")
+    added = add_detach_success_test(post_section, dry_run=args.dry_run)
+    changed = bool(updates_made) or added
+
+    stage("write")
+    if args.dry_run:
+        if diff:
+            print('\n'.join(diff))
+    elif changed:
+        print(f"\nWriting updated collection to {comprehensive_path}...")
+        stats = doc.save()
+        metrics.count("bytes_rewritten", stats['bytes_rewritten'])
+        print(f"  Rewrote {stats['bytes_rewritten']:,} of {stats['bytes_total']:,} bytes "
+              f"({stats['changed_subtrees']} changed subtrees)")
+    else:
+        print(f"\n{comprehensive_path} already up to date")
+
+    if args.all_collections:
+        stage("all_collections")
+        others = [p for p in sorted(COLLECTIONS_DIR.glob('*.json')) if p != comprehensive_path]
+        report = apply_patches(others, POST_PATCHES, dry_run=args.dry_run)
+        for path, requests in report.items():
+            print(f"✓ {len(requests)} requests patched in {path}")
+            updates_made.extend(requests)
+
+    metrics.count("tests_updated", len(updates_made))
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"\n✓ {verb} {len(updates_made)} tests:")
     for test_name in updates_made:
         print(f"  - {test_name}")
+    if added:
+        print(f"✓ {'Would add' if args.dry_run else 'Added'} 1 test:")
+        print("  - POST Endpoints/Detach Stamp - Success (Dev)")
 
     print("\nNext steps:")
     print("1. Run Newman tests locally to verify")
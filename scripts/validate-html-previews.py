@@ -6,20 +6,79 @@ Usage:
     python3 scripts/validate-html-previews.py --sample 50       # Random sample of 50
     python3 scripts/validate-html-previews.py --refresh         # Force re-render
     python3 scripts/validate-html-previews.py --refresh-failed  # Re-render only failed
+    python3 scripts/validate-html-previews.py --warm            # Warm the preview cache
+
+--warm requests previews in priority order: the --recent-mints newest
+stamps, then stamps with recent sales (newest sale first, from
+stamp_sales_history with --source db, otherwise from the internal
+recent-sales endpoint with INTERNAL_API_KEY as X-API-Key), then the rest
+by stamp number. A plain GET renders and caches a cold preview, so each pass
+requests every stamp not yet seen as an x-cache hit, --concurrency at a
+time. It stops once --target-hit-rate of the stamps are hits, or after
+--max-passes, and reports the time to warm for each priority tier.
+
+--daemon keeps checking previews indefinitely (see preview_scheduler.py):
+new and failing stamps are rechecked often, healthy ones at exponentially
+growing intervals, at no more than --rate requests per second overall.
+The stamp list is refreshed every --discover-interval seconds and counts
+by classify() status are served at http://127.0.0.1:--metrics-port/metrics.
+Try it against preview-stub-server.py, which simulates failures.
+
+--build-corpus PATH downloads the HTML of a seeded --corpus-scan sample of
+stamps, sorts them into recursive, script-heavy, large and simple ones,
+and writes up to --per-category of each to a versioned corpus file.
+--benchmark PATH forces cold renders (?refresh=true) of every corpus
+stamp --rounds times, --concurrency at a time. It reports render latency,
+output size and BLANK rate per x-rendering-engine/x-conversion-method
+and per category. Point --base-url at a local renderer to benchmark it.
+--benchmark-out saves the report, and --compare diffs it against a
+report from another renderer version on the same corpus.
+
+--source db lists HTML stamps straight from StampTableV4 (stamp_mimetype
+= 'text/html') through a server-side cursor, using extract-seed-data.py's
+DB_CONFIG, instead of paging the public API. --incremental checks only
+stamps numbered above the highest one a previous run saw. That number is
+kept in --cursor-file and advanced once the run completes.
 """
 import argparse
 import json
+import os
 import random
+import signal
 import sys
+import threading
 import time
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin
+
+import preview_benchmark
+from seed_constants import load_constant
+
+from preview_results import STATUSES, ResultTable
+from preview_scheduler import HEALTHY, Counters, RateLimiter, Schedule, serve_metrics
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, stage
+
+try:
+    import pymysql
+    import pymysql.cursors
+except ImportError:  # only --source db needs it
+    pymysql = None
 
 BASE_URL = "https://stampchain.io"
 MIN_VALID_SIZE = 5_000  # Below this = likely blank render
+HTML_MIMETYPE = "text/html"  # What the API's filetype=html matches
+DB_FETCH_BATCH = 1000
+CURSOR_FILE = Path(".cache/validate-html-previews/cursor.json")
+VALIDATORS_FILE = Path(".cache/validate-html-previews/validators.json")
+SIZE_BINS = [0, 1_000, MIN_VALID_SIZE, 20_000, 50_000, 100_000, 250_000, 1_000_000, 10_000_000]
+LATENCY_BINS = [0, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000]
 
 
-def fetch_html_stamps():
+def fetch_html_stamps(verbose=True):
     """Fetch all HTML stamp numbers from the API."""
     stamps = []
     page = 1
@@ -39,7 +98,8 @@ def fetch_html_stamps():
                 "stamp_url": s.get("stamp_url", ""),
             })
 
-        print(f"  Page {page}: {len(batch)} stamps")
+        if verbose:
+            print(f"  Page {page}: {len(batch)} stamps")
         page += 1
         if len(batch) < 100:
             break
@@ -47,13 +107,106 @@ def fetch_html_stamps():
     return stamps
 
 
-def test_preview(stamp_num, refresh=False):
-    """Test a single stamp's preview endpoint. Returns result dict."""
+def fetch_db_stamps(last_seen=None, verbose=True):
+    """Stream HTML stamps from StampTableV4 in stamp order, optionally after last_seen."""
+    if pymysql is None:
+        raise RuntimeError("--source db requires pymysql (pip install pymysql)")
+    sql = ("SELECT stamp, tx_hash, stamp_url FROM StampTableV4 "
+           "WHERE stamp_mimetype = %s")
+    params = [HTML_MIMETYPE]
+    if last_seen is not None:
+        sql += " AND stamp > %s"
+        params.append(last_seen)
+    sql += " ORDER BY stamp"
+
+    conn = pymysql.connect(**load_constant("DB_CONFIG"))
+    try:
+        # Unbuffered: rows arrive as they are read instead of after the whole scan
+        with conn.cursor(pymysql.cursors.SSCursor) as cur:
+            cur.execute(sql, params)
+            n = 0
+            while True:
+                batch = cur.fetchmany(DB_FETCH_BATCH)
+                if not batch:
+                    break
+                n += len(batch)
+                if verbose:
+                    print(f"  Rows: {n}")
+                for stamp, tx_hash, stamp_url in batch:
+                    yield {"stamp": stamp, "tx_hash": tx_hash, "stamp_url": stamp_url or ""}
+    finally:
+        conn.close()
+
+
+def list_stamps(args, last_seen=None, verbose=True):
+    """HTML stamps from --source, above last_seen when given."""
+    if args.source == "db":
+        return list(fetch_db_stamps(last_seen, verbose))
+    stamps = fetch_html_stamps(verbose)
+    if last_seen is not None:
+        stamps = [s for s in stamps if s["stamp"] > last_seen]
+    return stamps
+
+
+def read_cursor(path):
+    try:
+        with open(path) as f:
+            return json.load(f)["last_seen"]
+    except FileNotFoundError:
+        return None
+
+
+def write_cursor(path, last_seen):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"last_seen": last_seen, "updated": datetime.now().isoformat(timespec="seconds")},
+                  f)
+        f.write("\n")
+
+
+def load_validators(path):
+    """Stamp number -> {"etag", "last_modified", "size"} from earlier runs."""
+    try:
+        with open(path) as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def save_validators(path, validators):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump({str(k): v for k, v in sorted(validators.items())}, f)
+    tmp.replace(path)
+
+
+def update_validators(validators, num, status, r):
+    """Remember an OK response's validators; forget the stamp's on failure."""
+    if status != "OK":
+        validators.pop(num, None)
+    elif r["http_code"] == 200 and (r.get("etag") or r.get("last_modified")):
+        validators[num] = {"etag": r["etag"], "last_modified": r["last_modified"],
+                           "size": r["size"]}
+
+
+def test_preview(stamp_num, refresh=False, validators=None):
+    """Test a single stamp's preview endpoint. Returns result dict.
+
+    validators ({"etag", "last_modified", "size"} from an earlier OK response)
+    make the request conditional; an unchanged preview comes back as a
+    bodyless 304, reported with the size stored in its validators.
+    """
     suffix = "?refresh=true" if refresh else ""
     url = f"{BASE_URL}/api/v2/stamp/{stamp_num}/preview{suffix}"
 
     try:
         req = urllib.request.Request(url, method="GET")
+        if validators and not refresh:
+            if validators.get("etag"):
+                req.add_header("If-None-Match", validators["etag"])
+            if validators.get("last_modified"):
+                req.add_header("If-Modified-Since", validators["last_modified"])
         # Don't follow redirects — we want to see 302s
         opener = urllib.request.build_opener(NoRedirectHandler())
         resp = opener.open(req, timeout=60)
@@ -72,8 +225,27 @@ def test_preview(stamp_num, refresh=False):
             "engine": headers.get("x-rendering-engine", ""),
             "method": headers.get("x-conversion-method", ""),
             "location": "",
+            "etag": headers.get("etag", ""),
+            "last_modified": headers.get("last-modified", ""),
         }
     except urllib.error.HTTPError as e:
+        if e.code == 304:
+            validators = validators or {}
+            return {
+                "http_code": 304,
+                # The unchanged preview's size from the stored validators, so
+                # size summaries don't count it with blank renders
+                "size": validators.get("size", 0),
+                "content_type": "",
+                "cache": e.headers.get("x-cache", ""),
+                "recursive": "",
+                "engine": e.headers.get("x-rendering-engine", ""),
+                "method": "",
+                "location": "",
+                "etag": e.headers.get("ETag", validators.get("etag", "")),
+                "last_modified": e.headers.get("Last-Modified",
+                                               validators.get("last_modified", "")),
+            }
         if e.code == 302:
             location = e.headers.get("Location", "")
             return {
@@ -109,6 +281,89 @@ def test_preview(stamp_num, refresh=False):
         }
 
 
+def fetch_db_recent_sales(limit):
+    """HTML stamps by their latest sale in stamp_sales_history, newest first."""
+    if pymysql is None:
+        raise RuntimeError("--source db requires pymysql (pip install pymysql)")
+    sql = ("SELECT s.stamp, MAX(ssh.block_index) AS last_sale "
+           "FROM stamp_sales_history ssh JOIN StampTableV4 s ON s.cpid = ssh.cpid "
+           "WHERE s.stamp_mimetype = %s "
+           "GROUP BY s.stamp ORDER BY last_sale DESC LIMIT %s")
+    conn = pymysql.connect(**load_constant("DB_CONFIG"))
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, (HTML_MIMETYPE, limit))
+            return [stamp for stamp, _ in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def fetch_recent_sales(limit, source="api"):
+    """Stamp numbers with recent sales, most recent sale first.
+
+    With source "db" they come straight from stamp_sales_history. The API
+    route is internal: outside development it needs INTERNAL_API_KEY
+    (sent as X-API-Key) and refuses other callers, in which case warm-up
+    falls back to mint order.
+    """
+    if source == "db":
+        return fetch_db_recent_sales(limit)
+
+    headers = {}
+    if os.environ.get("INTERNAL_API_KEY"):
+        headers["X-API-Key"] = os.environ["INTERNAL_API_KEY"]
+    stamps = []
+    seen = set()
+    page = 1
+    while len(stamps) < limit:
+        url = f"{BASE_URL}/api/internal/stamp-recent-sales?limit=100&page={page}"
+        try:
+            req = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                data = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            hint = "" if headers else "; set INTERNAL_API_KEY or use --source db"
+            print(f"  ⚠ Recent sales refused (HTTP {e.code}{hint}); skipping the sales tier")
+            break
+        except (urllib.error.URLError, ValueError) as e:
+            print(f"  ⚠ Recent sales unavailable ({e}); skipping the sales tier")
+            break
+
+        batch = data.get("data", [])
+        for sale in batch:
+            if sale.get("stamp") is not None and sale["stamp"] not in seen:
+                seen.add(sale["stamp"])
+                stamps.append(sale["stamp"])
+        page += 1
+        if len(batch) < 100:
+            break
+
+    return stamps[:limit]
+
+
+def warm_priority(stamps, recent_sales, recent_mints):
+    """Order stamps for warm-up; returns [(stamp_dict, tier)]."""
+    by_num = {s["stamp"]: s for s in stamps}
+    ordered = []
+    seen = set()
+
+    def take(nums, tier):
+        for num in nums:
+            if num in by_num and num not in seen:
+                seen.add(num)
+                ordered.append((by_num[num], tier))
+
+    take(sorted(by_num, reverse=True)[:recent_mints], "recent_mint")
+    take(recent_sales, "recent_sale")
+    take(sorted(by_num), "rest")
+    return ordered
+
+
+def is_cache_hit(result):
+    """True when the preview came from cache (s3-hit, redis-hit)."""
+    return result["cache"].endswith("hit")
+
+
 class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
     """Handler that raises on redirects so we can inspect 302s."""
     def redirect_request(self, req, fp, code, msg, headers, newurl):
@@ -125,6 +380,9 @@ def classify(result):
 
     if code == 200 and size >= MIN_VALID_SIZE:
         return "OK"
+    if code == 304:
+        # Only sent for validators stored from an OK render: unchanged since
+        return "OK"
     if code == 200 and size < MIN_VALID_SIZE:
         return "BLANK"
     if code == 302:
@@ -136,20 +394,402 @@ def classify(result):
     return f"HTTP_{code}"
 
 
+def warm(args, metrics, all_stamps):
+    """Drive preview requests in priority order until the cache is warm."""
+    print("[2/3] Fetching recent sales...")
+    sales = fetch_recent_sales(args.recent_sales, args.source) if args.recent_sales else []
+    print(f"  {len(sales)} stamps with recent sales\n")
+    queue = warm_priority(all_stamps, sales, args.recent_mints)
+    if 0 < args.sample < len(queue):
+        queue = queue[:args.sample]
+    tiers = {}
+    for _, tier in queue:
+        tiers[tier] = tiers.get(tier, 0) + 1
+
+    stage("warm")
+    print(f"[3/3] Warming {len(queue)} previews "
+          f"({', '.join(f'{t} {n}' for t, n in tiers.items())}), "
+          f"concurrency {args.concurrency}, target {args.target_hit_rate:.0%} hits")
+
+    def request(entry):
+        r = test_preview(entry[0]["stamp"])
+        time.sleep(0.1)  # Rate limit per worker
+        return entry, r
+
+    start = time.perf_counter()
+    hits = set()
+    tier_hits = {t: 0 for t in tiers}
+    tier_warm = {}
+    requests = 0
+    for n in range(1, args.max_passes + 1):
+        pending = [e for e in queue if e[0]["stamp"] not in hits]
+        renders = errors = 0
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for (stamp, tier), r in pool.map(request, pending):
+                requests += 1
+                if is_cache_hit(r):
+                    hits.add(stamp["stamp"])
+                    tier_hits[tier] += 1
+                    if tier_hits[tier] >= args.target_hit_rate * tiers[tier]:
+                        tier_warm.setdefault(tier, time.perf_counter() - start)
+                elif classify(r) in ("OK", "REDIRECT"):
+                    renders += 1
+                else:
+                    errors += 1
+        rate = len(hits) / len(queue) if queue else 1.0
+        print(f"  Pass {n}: {len(pending)} requests, {renders} rendered, {errors} failed, "
+              f"{rate:.1%} hits after {time.perf_counter() - start:.1f}s")
+        if rate >= args.target_hit_rate:
+            break
+
+    elapsed = time.perf_counter() - start
+    warmed = bool(queue) and len(hits) / len(queue) >= args.target_hit_rate
+    metrics.count("stamps_total", len(all_stamps))
+    metrics.count("warm_requests", requests)
+    metrics.count("warm_hits", len(hits))
+    metrics.count("warm_passes", n)
+    print()
+    print("=" * 40)
+    for tier, total in tiers.items():
+        at = tier_warm.get(tier)
+        print(f"  {tier:<12} {tier_hits[tier]:>6}/{total:<6} "
+              f"{f'warm after {at:.1f}s' if at is not None else 'not warm'}")
+    if warmed:
+        print(f"\n✓ Cache warm ({len(hits)}/{len(queue)} hits) in {elapsed:.1f}s, "
+              f"{requests} requests")
+        metrics.count("time_to_warm_seconds", round(elapsed, 3))
+        sys.exit(0)
+    print(f"\n✗ Only {len(hits)}/{len(queue)} hits after {n} passes ({elapsed:.1f}s)")
+    sys.exit(1)
+
+
+def daemon(args, metrics):
+    """Recheck previews on a backoff schedule until stopped or --duration ends."""
+    schedule = Schedule(args.base_interval, args.max_interval, args.fail_interval)
+    counters = Counters()
+    limiter = RateLimiter(args.rate)
+    lock = threading.Lock()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    if args.metrics_port:
+        serve_metrics(counters, args.metrics_port)
+        print(f"  Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    def check(num):
+        limiter.acquire()
+        start = time.perf_counter()
+        r = test_preview(num)
+        status = classify(r)
+        counters.record(num, status, time.perf_counter() - start)
+        with lock:
+            interval = schedule.record(num, status, time.monotonic())
+        if status not in HEALTHY:
+            print(f"  ✗ #{num}: {status} (HTTP {r['http_code']}, {r['size']}B), "
+                  f"recheck in {interval:.0f}s")
+            sys.stdout.flush()
+
+    print(f"Monitoring previews at up to {args.rate:g} requests/s "
+          f"(intervals {args.base_interval:g}s..{args.max_interval:g}s, "
+          f"failing {args.fail_interval:g}s)")
+    deadline = time.monotonic() + args.duration if args.duration else None
+    next_discovery = next_report = time.monotonic()
+    inflight = set()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        try:
+            while not stop.is_set() and (deadline is None or time.monotonic() < deadline):
+                now = time.monotonic()
+                if now >= next_discovery:
+                    next_discovery = now + args.discover_interval
+                    try:
+                        stamps = list_stamps(args, verbose=False)
+                    except Exception as e:
+                        print(f"  ⚠ Could not refresh the stamp list: {e}")
+                    else:
+                        with lock:
+                            added = sum(schedule.add(s["stamp"], now) for s in stamps)
+                            counters.scheduled = len(schedule)
+                        if added:
+                            print(f"  + {added} new stamps scheduled ({len(schedule)} total)")
+                if now >= next_report:
+                    next_report = now + args.report_interval
+                    summary = ", ".join(f"{k} {v}" for k, v in sorted(counters.by_status().items()))
+                    print(f"  [{time.strftime('%H:%M:%S')}] {summary or 'no checks yet'}")
+                    sys.stdout.flush()
+
+                inflight = {f for f in inflight if not f.done()}
+                num = None
+                if len(inflight) < args.concurrency:
+                    with lock:
+                        num = schedule.pop_due(now)
+                if num is None:
+                    stop.wait(0.05)
+                    continue
+                inflight.add(pool.submit(check, num))
+        except KeyboardInterrupt:
+            pass
+        stop.set()
+
+    statuses = counters.by_status()
+    checks = sum(counters.checks.values())
+    metrics.count("stamps_total", len(schedule))
+    metrics.count("checks", checks)
+    for status, n in statuses.items():
+        metrics.count(f"status_{status.lower()}", n)
+    print(f"\nStopped after {checks} checks: "
+          f"{', '.join(f'{k} {v}' for k, v in sorted(statuses.items())) or 'none'}")
+    sys.exit(0)
+
+
+def print_table_summary(results):
+    """Per-engine status counts and size/latency histograms."""
+    if not len(results):
+        return
+    print("\n  Status by engine:")
+    print(f"    {'engine':<16}" + "".join(f"{s:>9}" for s in STATUSES))
+    for engine, row in results.by_engine().items():
+        print(f"    {engine[:16]:<16}" + "".join(f"{row[s]:>9}" for s in STATUSES))
+    for name, bins, unit in (("size", SIZE_BINS, "B"), ("latency", LATENCY_BINS, "ms")):
+        hist = results.histogram(name, bins)
+        if hist is None:
+            print("  (histograms need numpy)")
+            return
+        counts, edges = hist
+        print(f"\n  {name} histogram:")
+        peak = max(counts) or 1
+        for n, lo, hi in zip(counts, edges, edges[1:]):
+            print(f"    {lo:>10,.0f}-{hi:<10,.0f} {unit:<2} {n:>7} {'#' * (40 * n // peak)}")
+
+
+def load_results(path):
+    """Print the summary of a results file saved with --results-out."""
+    results = ResultTable.load(path)
+    counts = results.counts()
+    print(f"=== {path}: {len(results)} stamps ===")
+    for status, n in counts.items():
+        print(f"  {status:<10} {n}")
+    print("  Latency ms: " + " ".join(f"{k}={v:.0f}"
+                                      for k, v in results.latency_percentiles().items()))
+    print_table_summary(results)
+    failures = results.failures()
+    if failures:
+        print(f"\n  {len(failures)} failures:")
+        for r in failures:
+            print(f"    #{r['stamp']} status={r['status']} size={r['size']}B engine={r['engine']}")
+
+
+def build_corpus(args, metrics):
+    """Sample HTML stamps, categorize their content and write a corpus file."""
+    print("=== Building preview benchmark corpus ===\n")
+    print("[1/3] Fetching HTML stamp list...")
+    all_stamps = list_stamps(args)
+    scan = sorted(all_stamps, key=lambda s: s["stamp"])
+    if 0 < args.corpus_scan < len(scan):
+        scan = random.Random(args.seed).sample(scan, args.corpus_scan)
+
+    print(f"\n[2/3] Downloading HTML for {len(scan)} stamps...")
+
+    def inspect(stamp):
+        try:
+            with urllib.request.urlopen(urljoin(BASE_URL + "/", stamp["stamp_url"]),
+                                        timeout=30) as resp:
+                html = resp.read().decode("utf-8", "replace")
+        except (urllib.error.URLError, ValueError) as e:
+            print(f"  ⚠ #{stamp['stamp']}: {e}")
+            return None
+        features = preview_benchmark.html_features(html)
+        return {"stamp": stamp["stamp"], "tx_hash": stamp["tx_hash"],
+                "category": preview_benchmark.categorize(features),
+                "bytes": features["bytes"], "scripts": features["scripts"]}
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        candidates = [c for c in pool.map(inspect, scan) if c]
+    by_category = {c: 0 for c in preview_benchmark.CATEGORIES}
+    for c in candidates:
+        by_category[c["category"]] += 1
+    print("  " + ", ".join(f"{k} {v}" for k, v in by_category.items()))
+
+    stamps = preview_benchmark.select_corpus(candidates, args.per_category, args.seed)
+    try:
+        corpus = preview_benchmark.write_corpus(args.build_corpus, stamps, BASE_URL)
+    except ValueError as e:
+        print(f"\n[3/3] ✗ Corpus not written: {e}")
+        sys.exit(1)
+    metrics.count("corpus_stamps", len(stamps))
+    print(f"\n[3/3] ✓ Corpus v{corpus['version']} with {len(stamps)} stamps "
+          f"written to {args.build_corpus}")
+    sys.exit(0)
+
+
+def benchmark(args, metrics):
+    """Force cold renders of a corpus and report latency per engine/method."""
+    corpus = preview_benchmark.load_corpus(args.benchmark)
+    work = [s for _ in range(args.rounds) for s in corpus["stamps"]]
+    print("=== Cold-render benchmark ===\n")
+    print(f"  Corpus v{corpus['version']} ({len(corpus['stamps'])} stamps, "
+          f"{corpus['digest'][:12]}), {args.rounds} round(s), "
+          f"concurrency {args.concurrency}, {BASE_URL}\n")
+
+    def render(stamp):
+        start = time.perf_counter()
+        r = test_preview(stamp["stamp"], refresh=True)
+        latency_ms = (time.perf_counter() - start) * 1000
+        time.sleep(0.5)  # Rate limit re-renders per worker
+        return {"stamp": stamp["stamp"], "category": stamp["category"],
+                "status": classify(r), "latency_ms": round(latency_ms, 1),
+                "size": r["size"], "engine": r["engine"], "method": r["method"]}
+
+    stage("benchmark")
+    samples = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i, sample in enumerate(pool.map(render, work)):
+            samples.append(sample)
+            if (i + 1) % 10 == 0 or sample["status"] != "OK":
+                print(f"  [{i + 1}/{len(work)}] #{sample['stamp']} {sample['category']}: "
+                      f"{sample['status']} {sample['latency_ms']:.0f}ms {sample['size']}B")
+                sys.stdout.flush()
+
+    stage("report")
+    summary = preview_benchmark.summarize(samples)
+    print()
+    preview_benchmark.print_summary(summary)
+    report = {
+        "label": args.label,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "base_url": BASE_URL,
+        "corpus": {"path": str(args.benchmark), "version": corpus["version"],
+                   "digest": corpus["digest"]},
+        "settings": {"rounds": args.rounds, "concurrency": args.concurrency},
+        "summary": summary,
+        "samples": samples,
+    }
+    metrics.count("renders", len(samples))
+    metrics.count("blank_rate", summary["overall"].get("blank_rate", 0))
+    if args.benchmark_out:
+        args.benchmark_out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.benchmark_out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"  Report written to {args.benchmark_out}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = preview_benchmark.compare(json.load(f), report, args.threshold)
+        if regressions is None:
+            sys.exit(2)
+        metrics.count("regressions", regressions)
+        if regressions:
+            print(f"\n✗ {regressions} regression(s)")
+            sys.exit(1)
+        print("\n✓ No regressions")
+    sys.exit(0)
+
+
 def main():
+    global BASE_URL
     parser = argparse.ArgumentParser()
     parser.add_argument("--sample", type=int, default=0, help="Random sample size")
     parser.add_argument("--refresh", action="store_true", help="Force re-render all")
     parser.add_argument("--refresh-failed", action="store_true",
                         help="Re-render only failed/blank stamps")
+    parser.add_argument("--base-url", default=BASE_URL, help="Site to validate")
+    parser.add_argument("--validators-file", type=Path, default=VALIDATORS_FILE,
+                        help="ETag/Last-Modified history used for conditional requests")
+    parser.add_argument("--no-conditional", action="store_true",
+                        help="Always download previews; don't read or update validators")
+    parser.add_argument("--source", choices=("api", "db"), default="api",
+                        help="Where to list HTML stamps from")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only check stamps newer than the last run's (see --cursor-file)")
+    parser.add_argument("--cursor-file", type=Path, default=CURSOR_FILE,
+                        help="Where --incremental keeps the last stamp seen")
+    parser.add_argument("--warm", action="store_true",
+                        help="Warm the preview cache in priority order instead of validating")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Parallel requests when warming, building a corpus or benchmarking")
+    parser.add_argument("--target-hit-rate", type=float, default=0.95,
+                        help="Stop warming once this fraction of stamps are cache hits")
+    parser.add_argument("--max-passes", type=int, default=3)
+    parser.add_argument("--recent-mints", type=int, default=500,
+                        help="Newest stamps warmed first")
+    parser.add_argument("--recent-sales", type=int, default=500,
+                        help="Recently sold stamps warmed next")
+    parser.add_argument("--build-corpus", type=Path, metavar="PATH",
+                        help="Build (or version-bump) a benchmark corpus file and exit")
+    parser.add_argument("--corpus-scan", type=int, default=400,
+                        help="Stamps whose HTML is inspected when building a corpus")
+    parser.add_argument("--per-category", type=int, default=10,
+                        help="Corpus stamps per content category")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--benchmark", type=Path, metavar="CORPUS",
+                        help="Cold-render every stamp in CORPUS and report latency per engine")
+    parser.add_argument("--rounds", type=int, default=1,
+                        help="Benchmark: renders per corpus stamp")
+    parser.add_argument("--label", default="",
+                        help="Benchmark: name for this run, e.g. the renderer version")
+    parser.add_argument("--benchmark-out", type=Path, metavar="PATH",
+                        help="Benchmark: write the report as JSON")
+    parser.add_argument("--compare", type=Path, metavar="OLD_JSON",
+                        help="Benchmark: diff against an earlier report")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Benchmark: relative p95 increase counted as a regression")
+    parser.add_argument("--results-out", metavar="PATH.npz",
+                        help="Save the per-stamp results table (needs numpy)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Print per-engine counts and size/latency histograms")
+    parser.add_argument("--load-results", metavar="PATH.npz",
+                        help="Summarize a saved results table and exit")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep rechecking previews on a backoff schedule")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Daemon: maximum requests per second")
+    parser.add_argument("--base-interval", type=float, default=600,
+                        help="Daemon: first recheck interval for a healthy stamp (s)")
+    parser.add_argument("--max-interval", type=float, default=86400,
+                        help="Daemon: longest recheck interval (s)")
+    parser.add_argument("--fail-interval", type=float, default=60,
+                        help="Daemon: recheck interval for failing stamps (s)")
+    parser.add_argument("--discover-interval", type=float, default=600,
+                        help="Daemon: how often to refresh the stamp list (s)")
+    parser.add_argument("--report-interval", type=float, default=60,
+                        help="Daemon: how often to print a status summary (s)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Daemon: serve Prometheus counters on this port")
+    parser.add_argument("--duration", type=float, default=0,
+                        help="Daemon: stop after this many seconds (0 = run until killed)")
+    add_metrics_arguments(parser)
     args = parser.parse_args()
-
+    BASE_URL = args.base_url.rstrip("/")
+    if args.load_results:
+        load_results(args.load_results)
+        return
+
+    with instrument("validate-html-previews", args) as metrics:
+        if args.build_corpus:
+            build_corpus(args, metrics)
+        if args.benchmark:
+            benchmark(args, metrics)
+        if args.daemon:
+            daemon(args, metrics)
+        run(args, metrics)
+
+
+def run(args, metrics):
     print("=== HTML Stamp Preview Validation ===\n")
 
     # Fetch all HTML stamps
-    print("[1/4] Fetching HTML stamp list...")
-    all_stamps = fetch_html_stamps()
-    print(f"  Total: {len(all_stamps)} HTML stamps\n")
+    stage("fetch")
+    print(f"[1/{3 if args.warm else 4}] Fetching HTML stamp list ({args.source})...")
+    last_seen = read_cursor(args.cursor_file) if args.incremental else None
+    all_stamps = list_stamps(args, last_seen)
+    if last_seen is not None:
+        print(f"  Total: {len(all_stamps)} new HTML stamps after #{last_seen}\n")
+    else:
+        print(f"  Total: {len(all_stamps)} HTML stamps\n")
+    if args.incremental and not all_stamps:
+        print("✓ Nothing new to validate")
+        sys.exit(0)
+
+    if args.warm:
+        warm(args, metrics, all_stamps)
 
     # Sample if requested
     test_stamps = all_stamps
@@ -158,24 +798,24 @@ def main():
         print(f"  Testing random sample of {len(test_stamps)}\n")
 
     # Test each preview
+    stage("test")
     print(f"[2/4] Testing {len(test_stamps)} preview endpoints...")
-    results = []
-    counts = {"OK": 0, "BLANK": 0, "FALLBACK": 0, "REDIRECT": 0, "TIMEOUT": 0, "OTHER": 0}
+    results = ResultTable()
+    validators = {} if args.no_conditional else load_validators(args.validators_file)
+    unchanged = bytes_saved = 0
 
     for i, stamp in enumerate(test_stamps):
         num = stamp["stamp"]
-        r = test_preview(num, refresh=args.refresh)
+        start = time.perf_counter()
+        r = test_preview(num, refresh=args.refresh, validators=validators.get(num))
+        latency_ms = (time.perf_counter() - start) * 1000
         status = classify(r)
-
-        results.append({
-            "stamp": num,
-            "tx_hash": stamp["tx_hash"],
-            "status": status,
-            **r,
-        })
-
-        key = status if status in counts else "OTHER"
-        counts[key] = counts.get(key, 0) + 1
+        results.append(num, status, r, latency_ms, stamp["tx_hash"])
+        if r["http_code"] == 304:
+            unchanged += 1
+            bytes_saved += r["size"]
+        if not args.no_conditional:
+            update_validators(validators, num, status, r)
 
         # Progress every 10 or on non-OK
         if (i + 1) % 10 == 0 or status != "OK":
@@ -191,6 +831,12 @@ def main():
         time.sleep(0.5 if args.refresh else 0.1)
 
     # Summary
+    stage("summary")
+    counts = results.counts()
+    metrics.count("stamps_total", len(all_stamps))
+    metrics.count("stamps_tested", len(test_stamps))
+    for status, n in counts.items():
+        metrics.count(f"status_{status.lower()}", n)
     print(f"\n[3/4] Results Summary")
     print("=" * 40)
     total = len(test_stamps)
@@ -201,9 +847,29 @@ def main():
     print(f"  Redirect (S3):   {counts['REDIRECT']}")
     print(f"  Timeout:         {counts['TIMEOUT']}")
     print(f"  Other errors:    {counts['OTHER']}")
+    if unchanged:
+        print(f"  Unchanged (304): {unchanged}, {bytes_saved:,} bytes not downloaded")
+    metrics.count("unchanged", unchanged)
+    metrics.count("bytes_saved", bytes_saved)
+    if not args.no_conditional:
+        save_validators(args.validators_file, validators)
+    latency = results.latency_percentiles()
+    if latency:
+        print("  Latency ms:      " + " ".join(f"{k}={v:.0f}" for k, v in latency.items()))
+        print(f"  Cache hits:      {results.cache_hit_rate():.0%}")
+    if args.summary:
+        print_table_summary(results)
+    if args.results_out:
+        try:
+            results.save(args.results_out)
+            print(f"  Results saved to {args.results_out}")
+        except RuntimeError as e:
+            print(f"  ⚠ Results not saved: {e}")
 
     # Failed details
-    failed = [r for r in results if r["status"] not in ("OK", "REDIRECT")]
+    failed = results.failures()
+    stage("investigate")
+    metrics.count("failed", len(failed))
     if failed:
         print(f"\n[4/4] {len(failed)} stamps need investigation:")
         print("-" * 60)
@@ -229,9 +895,16 @@ def main():
                     fixed += 1
                 time.sleep(1)  # Rate limit re-renders
             print(f"\n  Fixed {fixed}/{len(failed)} stamps on re-render")
+            metrics.count("fixed_on_rerender", fixed)
     else:
         print(f"\n[4/4] All {total} HTML stamps rendered successfully!")
 
+    if args.incremental:
+        # Sampled-out stamps are skipped for good; --incremental is meant for full runs
+        newest = max(s["stamp"] for s in all_stamps)
+        write_cursor(args.cursor_file, max(newest, last_seen or newest))
+        print(f"\n  Cursor advanced to #{newest} ({args.cursor_file})")
+
     # Return exit code based on failure rate
     fail_rate = len(failed) / total if total > 0 else 0
     sys.exit(1 if fail_rate > 0.05 else 0)  # Fail if >5% broken
@@ -4,11 +4,14 @@ Validate comprehensive.json test coverage and structure.
 Ensures all requests have test scripts and validates test patterns.
 """
 
+import argparse
 import json
 import sys
 from pathlib import Path
 from typing import List, Dict, Tuple
 
+from tool_metrics import add_arguments as add_metrics_arguments, instrument, stage
+
 COLLECTION_PATH = Path('/home/StampchainWorkspace/BTCStampsExplorer/tests/postman/collections/comprehensive.json')
 
 
@@ -138,12 +141,23 @@ def find_recent_sales_requests(all_requests: List[Dict]) -> Dict:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Validate comprehensive.json test coverage")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    with instrument("validate_test_coverage", args) as metrics:
+        metrics.exit_code = validate(metrics)
+    return metrics.exit_code
+
+
+def validate(metrics):
     print("=" * 70)
     print("BTC Stamps Explorer - Test Coverage Validation")
     print("=" * 70)
     print()
 
     # Load collection
+    stage("load")
     print(f"Loading collection from: {COLLECTION_PATH}")
     data = load_collection()
     print(f"✓ Collection loaded: {data['info']['name']}")
@@ -156,6 +170,7 @@ def main():
     print()
 
     # Validate test coverage
+    stage("coverage")
     print("=" * 70)
     print("TEST COVERAGE VALIDATION")
     print("=" * 70)
@@ -175,6 +190,10 @@ def main():
         else:
             untested_requests.append((req, issues))
 
+    metrics.count("requests", len(all_requests))
+    metrics.count("tested", len(tested_requests))
+    metrics.count("untested", len(untested_requests))
+    metrics.count("warnings", len(requests_with_issues))
     print(f"Tested requests: {len(tested_requests)}/{len(all_requests)}")
     print(f"Untested requests: {len(untested_requests)}")
     print(f"Requests with warnings: {len(requests_with_issues)}")
@@ -204,6 +223,7 @@ def main():
         print()
 
     # Validate Recent Sales requests
+    stage("recent_sales")
     print("=" * 70)
     print("RECENT SALES REQUESTS VALIDATION")
     print("=" * 70)
@@ -241,6 +261,7 @@ def main():
     print()
 
     # Validate Error Scenarios
+    stage("error_scenarios")
     print("=" * 70)
     print("ERROR SCENARIOS VALIDATION")
     print("=" * 70)
@@ -284,6 +305,7 @@ def main():
     print()
 
     # Final summary
+    stage("summary")
     print("=" * 70)
     print("VALIDATION SUMMARY")
     print("=" * 70)